@@ -1,9 +1,18 @@
 from flask import Flask, render_template, request, send_file
 import pandas as pd
-from fpdf import FPDF
+import numpy as np
+from fpdf import FPDF, FPDF_VERSION
 import io
 import os
 import math
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import python_calamine  # noqa: F401  (Rust XLSX reader used by pandas' 'calamine' engine)
+    EXCEL_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_ENGINE = 'openpyxl'
 
 PDF_AUTHOR_NAME = "Er.Aravind MRT VREDC"
 
@@ -17,10 +26,71 @@ class AuthorPDF(FPDF):
         if self.author_name:
             self.set_font('Arial', 'I', 10)
             self.set_text_color(80, 80, 80)
-            self.cell(0, 10, self.author_name, 0, 0, 'R')
+            self.cell(0, 10, self.author_name, align='R')
             self.ln(5)
             self.set_text_color(0, 0, 0)
 
+    def write_lines(self, h, lines):
+        """Write consecutive full-width lines as one left-aligned multi_cell and return to the left margin."""
+        self.multi_cell(0, h, '\n'.join(lines), 0, 'L')
+        self.set_x(self.l_margin)
+
+    def row_writer(self, col_widths, h, border=1, align='C'):
+        """Return a function that draws one table row of pre-formatted texts across the fixed column widths."""
+        cell, ln = self.cell, self.ln
+        widths = tuple(col_widths)
+
+        def write_row(texts):
+            for width, text in zip(widths, texts):
+                cell(width, h, text, border=border, align=align)
+            ln()
+        return write_row
+
+    def output_bytes(self):
+        """Return the rendered document as bytes under both fpdf2 (bytearray) and PyFPDF 1.7 (latin-1 str)."""
+        if FPDF_VERSION.startswith('1.'):
+            return self.output(dest='S').encode('latin-1')
+        # fpdf2 hands back its own buffer; dest='S' is deprecated there and only adds a warning
+        return bytes(self.output())
+
+
+
+class ReportPDF(AuthorPDF):
+    """AuthorPDF carrying the consumer details shared by every report of a request."""
+
+    def __init__(self, meta, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.meta = meta
+        self.set_margins(20, 20, 20)  # Set proper margins: left, top, right (20mm each)
+        self.set_auto_page_break(auto=True, margin=20)  # Auto page break with bottom margin
+
+    def add_cover(self, title, show_iex_loss, show_cpp_loss):
+        """Start the first page with the title, consumer information and T&D loss sections."""
+        meta = self.meta
+        self.add_page()
+        self.set_font('Arial', 'B', 16)  # Larger title font
+        self.cell(0, 15, title, ln=True, align='C')
+        self.ln(10)
+
+        # Consumer Information Section
+        self.set_font('Arial', 'B', 14)
+        self.cell(0, 10, 'Consumer Information:', ln=True)
+        self.set_font('Arial', '', 12)
+        self.cell(0, 8, f"Consumer Number: {meta['consumer_number']}", ln=True)
+        self.cell(0, 8, f"Consumer Name: {meta['consumer_name']}", ln=True)
+        self.cell(0, 8, f"Multiplication Factor (Consumed Energy): {meta['multiplication_factor']}", ln=True)
+        self.ln(5)
+
+        # Technical Parameters Section
+        self.set_font('Arial', 'B', 14)
+        self.cell(0, 10, 'Technical Parameters:', ln=True)
+        self.set_font('Arial', '', 12)
+        if show_iex_loss:
+            self.cell(0, 8, f"I.E.X T&D Loss (%): {meta['t_and_d_loss']}", ln=True)
+        if show_cpp_loss:
+            self.cell(0, 8, f"C.P.P T&D Loss (%): {meta['cpp_t_and_d_loss']}", ln=True)
+        self.ln(5)
+
 
 app = Flask(__name__)
 
@@ -42,6 +112,227 @@ def compute_wheeling_components(total_excess_kwh, t_and_d_loss_percent):
     charges = reference_kwh * WHEELING_RATE_PER_KWH
     return reference_kwh, charges
 
+
+def round_kwh(values):
+    """Round kWh values half-up (away from zero), matching int(value ± 0.5); scalars come back as int."""
+    v = np.asarray(values, dtype=float)
+    rounded = np.trunc(np.where(v >= 0, v + 0.5, v - 0.5)).astype(np.int64)
+    return int(rounded) if rounded.ndim == 0 else rounded
+
+
+MONTH_NAMES = ('January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December')
+
+
+def get_month_name(month_num):
+    """Convert a month number to its name, echoing the input when it is not a month number."""
+    try:
+        return MONTH_NAMES[int(month_num) - 1]
+    except (ValueError, IndexError):
+        return str(month_num)
+
+
+def read_energy_excel(file, energy_column):
+    """Read the Date, Time and Energy columns of an uploaded energy workbook.
+
+    The columns are named by position (Date, Time, ``energy_column``) so files whose
+    header text differs still stack row-wise.
+    """
+    try:
+        df = pd.read_excel(file, header=0, engine=EXCEL_ENGINE, usecols=[0, 1, 2])
+        return df.set_axis(['Date', 'Time', energy_column], axis=1)
+    except pd.errors.ParserError:
+        # Fewer than three columns: re-read as-is so the caller can report it
+        file.seek(0)
+        return pd.read_excel(file, header=0, engine=EXCEL_ENGINE)
+
+
+def submit_energy_reads(files, energy_column):
+    """Read uploaded workbooks concurrently; returns one finished Future per file, in upload order.
+
+    Read errors are raised by ``Future.result()`` so callers can report them per file.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(files)))) as pool:
+        return [pool.submit(read_energy_excel, file, energy_column) for file in files]
+
+
+def format_distinct(values, formatter):
+    """Apply a per-value formatter once per distinct value, e.g. to the dates and slot times repeated down a report table."""
+    codes, uniques = pd.factorize(values)
+    labels = [formatter(value) for value in uniques]
+    if (codes < 0).any():
+        # factorize codes missing values as -1, which picks this trailing entry
+        labels.append(formatter(np.nan))
+    return np.array(labels, dtype=object)[codes]
+
+
+def stack_frames(frames):
+    """Stack per-file frames; a single upload is used as is rather than copied by concat."""
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def parse_energy_dates(values):
+    """Parse an uploaded Date column, expecting dd/mm/yyyy text or Excel dates.
+
+    The strict formats go through pandas' cached fast path; anything else falls
+    back to day-first inference one value at a time.
+    """
+    dates = pd.to_datetime(values, format='%d/%m/%Y', errors='coerce', cache=True)
+    retry = dates.isna() & values.notna()
+    if retry.any():
+        # Excel date cells arrive as 'yyyy-mm-dd hh:mm:ss' once stringified
+        dates.loc[retry] = pd.to_datetime(values[retry], format='ISO8601', errors='coerce', cache=True)
+        retry = dates.isna() & values.notna()
+    if retry.any():
+        dates.loc[retry] = values[retry].map(lambda v: pd.to_datetime(v, errors='coerce', dayfirst=True))
+    return dates
+
+
+def slot_time_labels(times):
+    """Return 'HH:MM - HH:MM' slot labels for a Series of slot start times or ranges."""
+    t = times.astype(str).str.strip()
+    # Every day repeats the same slot times, so label the distinct values and spread them back
+    codes, uniques = pd.factorize(t)
+    t = pd.Series(uniques, dtype=t.dtype)
+    has_range = t.str.contains('-', regex=False)
+    # Accept both '0:15' and '00:15' as valid start times
+    start = pd.to_datetime(t.where(~has_range), format='%H:%M', errors='coerce')
+    retry = start.isna() & ~has_range
+    if retry.any():
+        # Rare formats such as '00:15:00' fall back to per-value parsing
+        start.loc[retry] = t[retry].map(lambda v: pd.to_datetime(v, errors='coerce'))
+    end = start + pd.Timedelta(minutes=15)
+    labels = start.dt.strftime('%H:%M') + ' - ' + end.dt.strftime('%H:%M')
+    # Unparseable values are kept as-is; change '23:45 - 24:00' to '23:45 - 00:00'
+    labels = t.where(has_range | start.isna(), labels).replace({'23:45 - 24:00': '23:45 - 00:00'})
+    return pd.Series(labels.array.take(codes, allow_fill=True), index=times.index)
+
+
+def slot_start_parts(slot_times):
+    """Return (hour, minute) Series for each slot's start time; NaN where it cannot be parsed.
+
+    Labels shaped 'HH:MM' or 'HH:MM - ...' are decoded straight from their character codes;
+    anything else falls back to the regex on just those rows.
+    """
+    text = slot_times.astype(str)
+    codes = np.asarray(text.to_numpy(), dtype='U7').view(np.uint32).reshape(-1, 7)
+    digits = codes[:, [0, 1, 3, 4]] - ord('0')
+    fast = ((digits < 10).all(axis=1) & (codes[:, 2] == ord(':'))
+            & ((codes[:, 5] == 0) | ((codes[:, 5] == ord(' ')) & (codes[:, 6] == ord('-')))))
+    hours = np.where(fast, digits[:, 0] * 10 + digits[:, 1], np.nan)
+    minutes = np.where(fast, digits[:, 2] * 10 + digits[:, 3], np.nan)
+    if not fast.all():
+        slow = ~fast
+        start = text[slow].str.split('-', n=1).str[0].str.strip()
+        parts = start.str.extract(r'^(\d+):(\d+)$').astype(float)
+        hours[slow] = parts[0].to_numpy()
+        minutes[slow] = parts[1].to_numpy()
+    return pd.Series(hours, index=slot_times.index), pd.Series(minutes, index=slot_times.index)
+
+
+TOD_CATEGORIES = ['C1', 'C2', 'C4', 'C5', 'Unknown']
+
+
+def classify_tod(hours):
+    """Map slot start hours to categorical TOD labels (C1/C2/C4/C5, 'Unknown' when the hour is missing)."""
+    h = hours.to_numpy(dtype=float)
+    conditions = [
+        (h >= 6) & (h < 10),                      # Morning peak: 6:00 AM - 10:00 AM (C1) - EXCLUDES 10:00-10:15 slot
+        (h >= 18) & (h < 22),                     # Evening peak: 6:00 PM - 10:00 PM (C2) - EXCLUDES 22:00-22:15 slot
+        ((h >= 5) & (h < 6)) | ((h >= 10) & (h < 18)),  # Normal hours: 5-6 AM + 10 AM-6 PM (C4)
+        (h >= 22) | (h < 5),                      # Night hours: 22:00 PM to 5:00 AM (C5)
+    ]
+    labels = np.select(conditions, TOD_CATEGORIES[:4], default='Unknown')
+    return pd.Series(pd.Categorical(labels, categories=TOD_CATEGORIES), index=hours.index)
+
+
+def tod_sums(frame, columns):
+    """Sum columns per TOD category present in frame with one np.bincount pass over the TOD_Category codes."""
+    codes = frame['TOD_Category'].cat.codes.to_numpy()
+    present = np.bincount(codes, minlength=len(TOD_CATEGORIES)) > 0
+    return pd.DataFrame(
+        {col: np.bincount(codes, weights=frame[col].to_numpy(dtype=float), minlength=len(TOD_CATEGORIES))[present]
+         for col in columns},
+        index=pd.Index(TOD_CATEGORIES)[present],
+    )
+
+
+def slot_start_datetimes(dates, slot_times):
+    """Return the start timestamp of each slot (midnight when the slot time cannot be parsed)."""
+    hours, minutes = slot_start_parts(slot_times)
+    return dates.dt.normalize() + pd.to_timedelta((hours * 60 + minutes).fillna(0), unit='m')
+
+
+# Missing_Info text for every combination of missing sources, coded as iex | cpp << 1 | cons << 2
+MISSING_INFO_LABELS = np.array([
+    ('[Missing in I.E.X] ' if code & 1 else '') + ('[Missing in C.P.P] ' if code & 2 else '')
+    + ('[Missing in CONSUMED] ' if code & 4 else '')
+    for code in range(8)
+], dtype=object)
+
+
+def missing_info(missing_iex, missing_cpp, missing_cons):
+    """Label each slot with the sources it is missing from, as a Categorical over MISSING_INFO_LABELS."""
+    codes = missing_iex.astype(np.int8) | (missing_cpp.astype(np.int8) << 1) | (missing_cons.astype(np.int8) << 2)
+    return pd.Categorical.from_codes(codes, MISSING_INFO_LABELS)
+
+
+def sequential_adjustment(iex_after_loss, cpp_after_loss, consumption):
+    """Adjust consumption against I.E.X first, then C.P.P; returns (iex_adj, iex_excess, remaining, cpp_adj, cpp_excess)."""
+    iex_adjustment = np.minimum(iex_after_loss, consumption)
+    # x - min(x, y) == max(x - y, 0), so each excess and the remaining consumption is one subtraction
+    iex_excess = np.subtract(iex_after_loss, iex_adjustment)
+    remaining = np.subtract(consumption, iex_adjustment)
+    cpp_adjustment = np.minimum(cpp_after_loss, remaining)
+    cpp_excess = np.subtract(cpp_after_loss, cpp_adjustment)
+    return iex_adjustment, iex_excess, remaining, cpp_adjustment, cpp_excess
+
+
+def apply_date_filters(df, year, month, date_filter):
+    """Filter an energy frame by year/month and an optional dd/mm/yyyy date.
+
+    With both year and month, slots are kept from the 1st at 00:00 up to the last
+    day at 23:45 using each slot's start time. Raises ValueError with a
+    user-facing message when a filter value is invalid.
+    """
+    filtered = df
+    if year and month:
+        try:
+            # Handle potential float strings by converting to float first, then int
+            year_int = int(float(year))
+            month_int = int(float(month))
+            start_date = pd.Timestamp(year_int, month_int, 1, 0, 0)
+        except ValueError as e:
+            raise ValueError(f"Invalid year or month value. Year: '{year}', Month: '{month}'. Error: {str(e)}")
+        end_date = start_date + pd.offsets.MonthEnd(1) + pd.Timedelta(hours=23, minutes=45)
+
+        # Extract slot start time from range if needed and combine it with the date
+        slot_start = df['Time'].astype(str).str.strip().str.split('-', n=1).str[0].str.strip()
+        stamps = df['Date'].dt.strftime('%Y-%m-%d') + ' ' + slot_start
+        date_time = pd.to_datetime(stamps, format='%Y-%m-%d %H:%M', errors='coerce', cache=True)
+        retry = date_time.isna() & stamps.notna()
+        if retry.any():
+            date_time.loc[retry] = stamps[retry].map(lambda v: pd.to_datetime(v, errors='coerce'))
+        filtered = df[(date_time >= start_date) & (date_time <= end_date)]
+    else:
+        if year:
+            try:
+                filtered = filtered[filtered['Date'].dt.year == int(float(year))]
+            except ValueError:
+                raise ValueError(f"Invalid year value: '{year}'")
+        if month:
+            try:
+                filtered = filtered[filtered['Date'].dt.month == int(float(month))]
+            except ValueError:
+                raise ValueError(f"Invalid month value: '{month}'")
+    if date_filter:
+        try:
+            date_obj = pd.to_datetime(date_filter, format='%d/%m/%Y')
+        except Exception:
+            raise ValueError(f"Invalid date format for filter: {date_filter}. Use dd/mm/yyyy.")
+        filtered = filtered[filtered['Date'] == date_obj]
+    return filtered
+
 @app.route('/', methods=['GET', 'POST'])
 def index():
     if request.method == 'POST':
@@ -105,23 +396,19 @@ def index():
         gen_df = None
         if generated_files:
             gen_dfs = []
-            for gen_file in generated_files:
+            for gen_file, pending_read in zip(generated_files, submit_energy_reads(generated_files, 'Energy_MW')):
                 try:
-                    temp_df = pd.read_excel(gen_file, header=0)
+                    temp_df = pending_read.result()
                     if temp_df.shape[1] < 3:
                         return render_template('index.html', error=f"Generated energy Excel file '{gen_file.filename}' must have at least 3 columns: Date, Time, and Energy in MW.")
                     
-                    # Add filename to help with debugging
-                    temp_df['Source_File'] = gen_file.filename
                     gen_dfs.append(temp_df)
                 except Exception as e:
                     return render_template('index.html', error=f"Error reading generated energy Excel file '{gen_file.filename}': {str(e)}")
             
             # Combine all generated energy dataframes
             if gen_dfs:
-                gen_df = pd.concat(gen_dfs, ignore_index=True)
-                gen_df = gen_df.iloc[:, :3]
-                gen_df.columns = ['Date', 'Time', 'Energy_MW']
+                gen_df = stack_frames(gen_dfs)
                 # Strip whitespace from Date and Time columns
                 gen_df['Date'] = gen_df['Date'].astype(str).str.strip()
                 gen_df['Time'] = gen_df['Time'].astype(str).str.strip()
@@ -133,31 +420,26 @@ def index():
                     print(f"WARNING: {nan_count} non-numeric Energy_MW values found in I.E.X files and converted to NaN")
                 
                 # Standardize date format to yyyy-mm-dd for robust filtering
-                gen_df['Date'] = pd.to_datetime(gen_df['Date'], errors='coerce', dayfirst=True)
+                gen_df['Date'] = parse_energy_dates(gen_df['Date'])
                 gen_df['Source_Type'] = 'I.E.X'
         
         # Process C.P.P (Captive Power Purchase) files (if provided)
         cpp_df = None
         if cpp_files:
             cpp_dfs = []
-            for cpp_file in cpp_files:
+            for cpp_file, pending_read in zip(cpp_files, submit_energy_reads(cpp_files, 'Energy_MW')):
                 try:
-                    temp_df = pd.read_excel(cpp_file, header=0)
+                    temp_df = pending_read.result()
                     if temp_df.shape[1] < 3:
                         return render_template('index.html', error=f"C.P.P energy Excel file '{cpp_file.filename}' must have at least 3 columns: Date, Time, and Energy in MW.")
                     
-                    # Add filename to help with debugging
-                    temp_df['Source_File'] = cpp_file.filename
-                    temp_df['Source_Type'] = 'C.P.P'
                     cpp_dfs.append(temp_df)
                 except Exception as e:
                     return render_template('index.html', error=f"Error reading C.P.P energy file '{cpp_file.filename}': {str(e)}")
             
             # Process C.P.P data if files were uploaded
             if cpp_dfs:
-                cpp_df = pd.concat(cpp_dfs, ignore_index=True)
-                cpp_df = cpp_df.iloc[:, :3]
-                cpp_df.columns = ['Date', 'Time', 'Energy_MW']
+                cpp_df = stack_frames(cpp_dfs)
                 cpp_df['Date'] = cpp_df['Date'].astype(str).str.strip()
                 cpp_df['Time'] = cpp_df['Time'].astype(str).str.strip()
                 
@@ -167,7 +449,7 @@ def index():
                 if nan_count > 0:
                     print(f"WARNING: {nan_count} non-numeric Energy_MW values found in C.P.P files and converted to NaN")
                 
-                cpp_df['Date'] = pd.to_datetime(cpp_df['Date'], errors='coerce', dayfirst=True)
+                cpp_df['Date'] = parse_energy_dates(cpp_df['Date'])
                 cpp_df['Source_Type'] = 'C.P.P'
         
         # Combine I.E.X and C.P.P data if both exist
@@ -183,7 +465,8 @@ def index():
         else:
             return render_template('index.html', error="No valid generation energy files were found.")
         
-        gen_df = combined_gen_df
+        # Source_Type only ever holds two labels
+        gen_df = combined_gen_df.astype({'Source_Type': 'category'})
         
         # Debug: Check combined data totals
         print(f"\n=== COMBINED DATA DEBUG ===")
@@ -211,36 +494,29 @@ def index():
                 print(f"Total C.P.P MW in combined data: {cpp_total_mw:.4f} MW")
         print("=== END COMBINED DATA DEBUG ===\n")
         
-        # Function to convert month number to month name
-        def get_month_name(month_num):
-            month_names = ['January', 'February', 'March', 'April', 'May', 'June', 
-                          'July', 'August', 'September', 'October', 'November', 'December']
-            try:
-                return month_names[int(month_num) - 1]
-            except (ValueError, IndexError):
-                return str(month_num)
-        
         # Auto-detect month and year if enabled
         if auto_detect_month and not (month and year):
-            # Extract unique months and years from the data
-            unique_months = gen_df['Date'].dt.month.unique()
-            unique_years = gen_df['Date'].dt.year.unique()
-            
-            if len(unique_months) == 1 and not month:
-                month = str(int(unique_months[0]))
-                print(f"Auto-detected month: {month} ({get_month_name(month)})")
-            elif len(unique_months) > 1 and not month:
-                # If multiple months, use the most frequent one
-                month = str(int(gen_df['Date'].dt.month.value_counts().idxmax()))
-                print(f"Multiple months detected, using most frequent: {month} ({get_month_name(month)})")
-            
-            if len(unique_years) == 1 and not year:
-                year = str(int(unique_years[0]))
-                print(f"Auto-detected year: {year}")
-            elif len(unique_years) > 1 and not year:
-                # If multiple years, use the most frequent one
-                year = str(int(gen_df['Date'].dt.year.value_counts().idxmax()))
-                print(f"Multiple years detected, using most frequent: {year}")
+            # Only scan the data for the part the user left blank; one value_counts pass gives
+            # both the number of distinct values and the most frequent one
+            if not month:
+                month_counts = gen_df['Date'].dt.month.value_counts()
+                if len(month_counts) == 1:
+                    month = str(int(month_counts.index[0]))
+                    print(f"Auto-detected month: {month} ({get_month_name(month)})")
+                elif len(month_counts) > 1:
+                    # If multiple months, use the most frequent one
+                    month = str(int(month_counts.idxmax()))
+                    print(f"Multiple months detected, using most frequent: {month} ({get_month_name(month)})")
+            
+            if not year:
+                year_counts = gen_df['Date'].dt.year.value_counts()
+                if len(year_counts) == 1:
+                    year = str(int(year_counts.index[0]))
+                    print(f"Auto-detected year: {year}")
+                elif len(year_counts) > 1:
+                    # If multiple years, use the most frequent one
+                    year = str(int(year_counts.idxmax()))
+                    print(f"Multiple years detected, using most frequent: {year}")
                 
             # Add information to be displayed in PDF
             cpp_count = len(cpp_files) if cpp_files else 0
@@ -266,64 +542,11 @@ def index():
         print("=== END BEFORE FILTERING DEBUG ===\n")
         
         # Filter by year/month with custom slot logic (handle slot ranges in Time column)
-        filtered_gen = gen_df.copy()
-        if year and month:
-            try:
-                # Handle potential float strings by converting to float first, then int
-                year_int = int(float(year))
-                month_int = int(float(month))
-            except ValueError as e:
-                return render_template('index.html', error=f"Invalid year or month value. Year: '{year}', Month: '{month}'. Error: {str(e)}")
-            
-            # Start: 1st of month at 00:00, End: last day of month at 23:45 (inclusive)
-            start_date = pd.Timestamp(year_int, month_int, 1, 0, 0)
-            if month_int == 12:
-                end_date = pd.Timestamp(year_int, 12, 31, 23, 45)
-            else:
-                # Get the last day of the month
-                if month_int == 2:
-                    # Handle February and leap years
-                    if (year_int % 4 == 0 and year_int % 100 != 0) or (year_int % 400 == 0):
-                        last_day = 29
-                    else:
-                        last_day = 28
-                elif month_int in [4, 6, 9, 11]:
-                    last_day = 30
-                else:
-                    last_day = 31
-                end_date = pd.Timestamp(year_int, month_int, last_day, 23, 45)
-            # Extract slot start time from range if needed
-            def extract_start_time(t):
-                t = str(t).strip()
-                if '-' in t:
-                    return t.split('-')[0].strip()
-                return t
-            gen_df['Slot_Start'] = gen_df['Time'].apply(extract_start_time)
-            # Combine Date and Slot_Start for filtering
-            gen_df['DateTime'] = pd.to_datetime(gen_df['Date'].dt.strftime('%Y-%m-%d') + ' ' + gen_df['Slot_Start'], errors='coerce')
-            # Filter to include only slots within the same day (00:00 to 23:45)
-            filtered_gen = gen_df[(gen_df['DateTime'] >= start_date) & (gen_df['DateTime'] <= end_date)]
-            # Ensure each day has exactly 96 slots (15-minute intervals from 00:00 to 23:45)
-            print(f"Filtered generated data: {len(filtered_gen)} rows")
-        else:
-            if year:
-                try:
-                    year_int = int(float(year))
-                    filtered_gen = filtered_gen[filtered_gen['Date'].dt.year == year_int]
-                except ValueError:
-                    return render_template('index.html', error=f"Invalid year value: '{year}'")
-            if month:
-                try:
-                    month_int = int(float(month))
-                    filtered_gen = filtered_gen[filtered_gen['Date'].dt.month == month_int]
-                except ValueError:
-                    return render_template('index.html', error=f"Invalid month value: '{month}'")
-        if date_filter:
-            try:
-                date_obj = pd.to_datetime(date_filter, dayfirst=True)
-                filtered_gen = filtered_gen[filtered_gen['Date'] == date_obj]
-            except Exception:
-                return render_template('index.html', error=f"Invalid date format for filter: {date_filter}. Use dd/mm/yyyy.")
+        try:
+            filtered_gen = apply_date_filters(gen_df, year, month, date_filter)
+        except ValueError as e:
+            return render_template('index.html', error=str(e))
+        print(f"Filtered generated data: {len(filtered_gen)} rows")
         if (year or month or date_filter) and filtered_gen.empty:
             # Debug output for root cause
             debug_msg = []
@@ -331,73 +554,42 @@ def index():
             debug_msg.append(f"[DEBUG] year: {year}, month: {month}, date_filter: {date_filter}")
             debug_msg.append(f"[DEBUG] gen_df['Date'] sample: {gen_df['Date'].head(10).tolist()}")
             debug_msg.append(f"[DEBUG] gen_df['Time'] sample: {gen_df['Time'].head(10).tolist()}")
-            if 'DateTime' in gen_df.columns:
-                debug_msg.append(f"[DEBUG] gen_df['DateTime'] sample: {gen_df['DateTime'].head(10).tolist()}")
             available_months = ', '.join(sorted(gen_df['Date'].dt.strftime('%d/%m/%Y').dropna().unique()))
             debug_msg.append(f"[DEBUG] Available dates: {available_months}")
             return render_template('index.html', error=f"No data for the selected filter in the GENERATED file. Available dates: {available_months}\n\n" + '\n'.join(debug_msg))
-        gen_df = filtered_gen
         # Debug: Check MW to kWh conversion
         print(f"\n=== MW TO kWH CONVERSION DEBUG ===")
-        print(f"Number of slots in gen_df: {len(gen_df)}")
-        print(f"MW sample values: {gen_df['Energy_MW'].head(10).tolist()}")
-        print(f"MW data type: {gen_df['Energy_MW'].dtype}")
-        print(f"Total MW in gen_df: {gen_df['Energy_MW'].sum():.4f} MW")
-        
-        gen_df['Energy_kWh'] = gen_df['Energy_MW'] * 250
+        print(f"Number of slots in gen_df: {len(filtered_gen)}")
+        print(f"MW sample values: {filtered_gen['Energy_MW'].head(10).tolist()}")
+        print(f"MW data type: {filtered_gen['Energy_MW'].dtype}")
+        print(f"Total MW in gen_df: {filtered_gen['Energy_MW'].sum():.4f} MW")
+        
+        # Separate T&D loss factors based on source type (no loss for anything else)
+        iex_loss_factor = (1 - t_and_d_loss / 100) if t_and_d_loss > 0 else 1.0
+        cpp_loss_factor = (1 - cpp_t_and_d_loss / 100) if cpp_t_and_d_loss > 0 else 1.0
+        gen_df = (filtered_gen
+            .assign(Energy_kWh=lambda d: d['Energy_MW'] * 250,
+                    Slot_Time=lambda d: slot_time_labels(d['Time']),
+                    Slot_Date=lambda d: d['Date'].dt.strftime('%d/%m/%Y'))
+            .assign(After_Loss=lambda d: d['Energy_kWh'] * np.select(
+                        [d['Source_Type'] == 'I.E.X', d['Source_Type'] == 'C.P.P'],
+                        [iex_loss_factor, cpp_loss_factor], 1.0),
+                    Slot_DT=lambda d: slot_start_datetimes(d['Date'], d['Slot_Time'])))
         
         print(f"Total kWh after conversion: {gen_df['Energy_kWh'].sum():.4f} kWh")
         print(f"Manual check: {gen_df['Energy_MW'].sum():.4f} MW * 250 = {gen_df['Energy_MW'].sum() * 250:.4f} kWh")
         print(f"Any NaN values in Energy_MW? {gen_df['Energy_MW'].isna().sum()}")
         print(f"Any zero values in Energy_MW? {(gen_df['Energy_MW'] == 0).sum()}")
         print("=== END MW TO kWH DEBUG ===\n")
-        
-        # Apply separate T&D losses based on source type
-        def apply_td_loss(row):
-            if row['Source_Type'] == 'I.E.X':
-                return row['Energy_kWh'] * (1 - t_and_d_loss / 100) if t_and_d_loss > 0 else row['Energy_kWh']
-            elif row['Source_Type'] == 'C.P.P':
-                return row['Energy_kWh'] * (1 - cpp_t_and_d_loss / 100) if cpp_t_and_d_loss > 0 else row['Energy_kWh']
-            else:
-                return row['Energy_kWh']  # Fallback, no loss applied
-        
-        gen_df['After_Loss'] = gen_df.apply(apply_td_loss, axis=1)
-        # Shift generated time by -15 minutes to represent slot start
-        # Standardize slot time to 'HH:MM - HH:MM' format
-        def slot_time_range(row):
-            t = str(row['Time']).strip()
-            if '-' in t:
-                # Already in 'HH:MM - HH:MM' format
-                return t
-            # Accept both '0:15' and '00:15' as valid
-            try:
-                # Try both formats
-                try:
-                    start = pd.to_datetime(t, format='%H:%M').time()
-                except Exception:
-                    start = pd.to_datetime(t, format='%H:%M').time() if len(t) == 4 else pd.to_datetime(t).time()
-            except Exception:
-                try:
-                    start = pd.to_datetime(t).time()
-                except Exception:
-                    return t
-            end_dt = (pd.Timestamp.combine(pd.Timestamp.today(), start) + pd.Timedelta(minutes=15)).time()
-            return f"{start.strftime('%H:%M')} - {end_dt.strftime('%H:%M')}"
-        gen_df['Slot_Time'] = gen_df.apply(slot_time_range, axis=1)
-        # Fix slot time: change '23:45 - 24:00' to '23:45 - 00:00'
-        gen_df['Slot_Time'] = gen_df['Slot_Time'].replace({'23:45 - 24:00': '23:45 - 00:00'})
-        gen_df['Slot_Date'] = gen_df['Date'].dt.strftime('%d/%m/%Y')
 
         # Process multiple consumed energy Excel files
         cons_dfs = []
-        for cons_file in consumed_files:
+        for cons_file, pending_read in zip(consumed_files, submit_energy_reads(consumed_files, 'Energy_kWh')):
             try:
-                temp_df = pd.read_excel(cons_file, header=0)
+                temp_df = pending_read.result()
                 if temp_df.shape[1] < 3:
                     return render_template('index.html', error=f"Consumed energy Excel file '{cons_file.filename}' must have at least 3 columns: Date, Time, and Energy in kWh.")
                 
-                # Add filename to help with debugging
-                temp_df['Source_File'] = cons_file.filename
                 cons_dfs.append(temp_df)
             except Exception as e:
                 return render_template('index.html', error=f"Error reading consumed energy Excel file '{cons_file.filename}': {str(e)}")
@@ -405,14 +597,12 @@ def index():
         # Combine all consumed energy dataframes
         if not cons_dfs:
             return render_template('index.html', error="No valid consumed energy Excel files were found.")
-        cons_df = pd.concat(cons_dfs, ignore_index=True)
-        cons_df = cons_df.iloc[:, :3]
-        cons_df.columns = ['Date', 'Time', 'Energy_kWh']
+        cons_df = stack_frames(cons_dfs)
         # Strip whitespace from Date and Time columns
         cons_df['Date'] = cons_df['Date'].astype(str).str.strip()
         cons_df['Time'] = cons_df['Time'].astype(str).str.strip()
         # Standardize date format to yyyy-mm-dd for robust filtering
-        cons_df['Date'] = pd.to_datetime(cons_df['Date'], errors='coerce', dayfirst=True)
+        cons_df['Date'] = parse_energy_dates(cons_df['Date'])
         # Debug: Print first 10 unique slot dates and times for both files (after slot columns are created for both)
         if 'Slot_Date' in gen_df.columns and 'Slot_Time' in gen_df.columns:
             print('GEN Slot_Date:', gen_df['Slot_Date'].unique()[:10])
@@ -425,72 +615,20 @@ def index():
         else:
             print('CON Slot_Date/Slot_Time columns missing!')
         # Filter by year/month with custom slot logic (handle slot ranges in Time column)
-        filtered_cons = cons_df.copy()
-        if year and month:
-            try:
-                year_int = int(float(year))
-                month_int = int(float(month))
-            except ValueError as e:
-                return render_template('index.html', error=f"Invalid year or month value in consumption data. Year: '{year}', Month: '{month}'. Error: {str(e)}")
-            
-            # Start: 1st of month at 00:00, End: last day of month at 23:45 (inclusive)
-            start_date = pd.Timestamp(year_int, month_int, 1, 0, 0)
-            if month_int == 12:
-                end_date = pd.Timestamp(year_int, 12, 31, 23, 45)
-            else:
-                # Get the last day of the month
-                if month_int == 2:
-                    # Handle February and leap years
-                    if (year_int % 4 == 0 and year_int % 100 != 0) or (year_int % 400 == 0):
-                        last_day = 29
-                    else:
-                        last_day = 28
-                elif month_int in [4, 6, 9, 11]:
-                    last_day = 30
-                else:
-                    last_day = 31
-                end_date = pd.Timestamp(year_int, month_int, last_day, 23, 45)
-            def extract_start_time(t):
-                t = str(t).strip()
-                if '-' in t:
-                    return t.split('-')[0].strip()
-                return t
-            cons_df['Slot_Start'] = cons_df['Time'].apply(extract_start_time)
-            cons_df['DateTime'] = pd.to_datetime(cons_df['Date'].dt.strftime('%Y-%m-%d') + ' ' + cons_df['Slot_Start'], errors='coerce')
-            # Filter to include only slots within the same day (00:00 to 23:45)
-            filtered_cons = cons_df[(cons_df['DateTime'] >= start_date) & (cons_df['DateTime'] <= end_date)]
-            # Ensure each day has exactly 96 slots (15-minute intervals from 00:00 to 23:45)
-            print(f"Filtered consumed data: {len(filtered_cons)} rows")
-        else:
-            if year:
-                try:
-                    year_int = int(float(year))
-                    filtered_cons = filtered_cons[filtered_cons['Date'].dt.year == year_int]
-                except ValueError:
-                    return render_template('index.html', error=f"Invalid year value in consumption filtering: '{year}'")
-            if month:
-                try:
-                    month_int = int(float(month))
-                    filtered_cons = filtered_cons[filtered_cons['Date'].dt.month == month_int]
-                except ValueError:
-                    return render_template('index.html', error=f"Invalid month value in consumption filtering: '{month}'")
-                filtered_cons = filtered_cons[filtered_cons['Date'].dt.month == month_int]
-        if date_filter:
-            try:
-                date_obj = pd.to_datetime(date_filter, dayfirst=True)
-                filtered_cons = filtered_cons[filtered_cons['Date'] == date_obj]
-            except Exception:
-                return render_template('index.html', error=f"Invalid date format for filter: {date_filter}. Use dd/mm/yyyy.")
+        try:
+            filtered_cons = apply_date_filters(cons_df, year, month, date_filter)
+        except ValueError as e:
+            return render_template('index.html', error=str(e))
+        print(f"Filtered consumed data: {len(filtered_cons)} rows")
         if (year or month or date_filter) and filtered_cons.empty:
             available_months = ', '.join(sorted(cons_df['Date'].dt.strftime('%d/%m/%Y').dropna().unique()))
             return render_template('index.html', error=f"No data for the selected filter in the CONSUMED file. Available dates: {available_months}")
-        cons_df = filtered_cons
-        cons_df['Energy_kWh'] = pd.to_numeric(cons_df['Energy_kWh'], errors='coerce') * multiplication_factor
         # Standardize slot time to 'HH:MM - HH:MM' format for consumption too
-        cons_df['Slot_Time'] = cons_df.apply(slot_time_range, axis=1)
-        # Fix slot time: change '23:45 - 24:00' to '23:45 - 00:00' (if present)
-        cons_df['Slot_Time'] = cons_df['Slot_Time'].replace({'23:45 - 24:00': '23:45 - 00:00'})
-        cons_df['Slot_Date'] = cons_df['Date'].dt.strftime('%d/%m/%Y')
+        cons_df = (filtered_cons
+            .assign(Energy_kWh=lambda d: pd.to_numeric(d['Energy_kWh'], errors='coerce') * multiplication_factor,
+                    Slot_Time=lambda d: slot_time_labels(d['Time']),
+                    Slot_Date=lambda d: d['Date'].dt.strftime('%d/%m/%Y'))
+            .assign(Slot_DT=lambda d: slot_start_datetimes(d['Date'], d['Slot_Time'])))
 
         # Debug: Print first 10 unique slot dates and times for both files (after slot columns are created)
         if 'Slot_Date' in gen_df.columns and 'Slot_Time' in gen_df.columns:
@@ -525,10 +663,12 @@ def index():
             
             if incomplete_days:
                 print(f"Warning: The following days do not have exactly 96 slots: {incomplete_days}")
-                # For each incomplete day, identify which slots are missing
-                for day in incomplete_days:
-                    day_slots = set(df[df[date_col] == day][time_col])
-                    missing_slots = [slot for slot in expected_slots if slot not in day_slots]
+                # For each incomplete day, identify which slots are missing; one groupby over the incomplete
+                # days' rows replaces a full-frame filter per day, and Index.difference keeps the slot order
+                expected_index = pd.Index(expected_slots)
+                incomplete_rows = df.loc[df[date_col].isin(incomplete_days)]
+                for day, day_slots in incomplete_rows.groupby(date_col)[time_col]:
+                    missing_slots = expected_index.difference(day_slots, sort=False).tolist()
                     print(f"Day {day} is missing {len(missing_slots)} slots: {missing_slots[:5]}...")
             
             return incomplete_days, expected_slots
@@ -538,9 +678,11 @@ def index():
         cons_incomplete_days, _ = validate_day_slots(cons_df)
         
         # Sequential adjustment logic: First I.E.X, then C.P.P
-        # Separate I.E.X and C.P.P data for sequential adjustment
-        iex_df = gen_df[gen_df['Source_Type'] == 'I.E.X'].copy() if enable_iex else pd.DataFrame()
-        cpp_df_only = gen_df[gen_df['Source_Type'] == 'C.P.P'].copy() if enable_cpp else pd.DataFrame()
+        # Separate I.E.X and C.P.P data for sequential adjustment in one pass over the categorical
+        # source codes; the parts are only read from, so they need no defensive copies
+        gen_by_source = dict(list(gen_df.groupby('Source_Type', observed=True, sort=False)))
+        iex_df = gen_by_source.get('I.E.X', gen_df.iloc[:0]) if enable_iex else pd.DataFrame()
+        cpp_df_only = gen_by_source.get('C.P.P', gen_df.iloc[:0]) if enable_cpp else pd.DataFrame()
         
         # Debug: Check data separation for I.E.X and C.P.P
         print(f"\n=== DATA SEPARATION DEBUG ===")
@@ -559,90 +701,85 @@ def index():
             print("C.P.P is disabled")
         print("=== END DATA SEPARATION DEBUG ===\n")
         
-        # Build all slot combinations from consumption and both generation sources
-        cons_slots_set = set((d, t) for d, t in zip(cons_df['Slot_Date'], cons_df['Slot_Time']))
-        iex_slots_set = set((d, t) for d, t in zip(iex_df['Slot_Date'], iex_df['Slot_Time'])) if not iex_df.empty else set()
-        cpp_slots_set = set((d, t) for d, t in zip(cpp_df_only['Slot_Date'], cpp_df_only['Slot_Time'])) if not cpp_df_only.empty else set()
-        
-        all_slots = pd.DataFrame(
-            list(cons_slots_set | iex_slots_set | cpp_slots_set),
-            columns=['Slot_Date', 'Slot_Time'])
-        
-        # Merge consumption data first
-        merged = pd.merge(all_slots, cons_df[['Slot_Date', 'Slot_Time', 'Energy_kWh']], on=['Slot_Date', 'Slot_Time'], how='left')
-        merged['Energy_kWh_cons'] = merged['Energy_kWh'].fillna(0)
-        merged.drop('Energy_kWh', axis=1, inplace=True)
+        # Outer-join consumption with both generation sources so every slot seen in any file is kept;
+        # the _has_* markers stay NaN for slots a source does not cover. The frames are aligned on a
+        # shared slot index that is built once per frame, not per merge.
+        slot_keys = ['Slot_Date', 'Slot_Time', 'Slot_DT']
+        merged = cons_df.set_index(slot_keys)[['Energy_kWh']].set_axis(['Energy_kWh_cons'], axis=1)
+        merged['_has_cons'] = True
         
-        # Merge I.E.X data
+        # Join I.E.X data
         if not iex_df.empty:
-            iex_merge = iex_df[['Slot_Date', 'Slot_Time', 'After_Loss', 'Energy_kWh']].copy()
-            iex_merge.columns = ['Slot_Date', 'Slot_Time', 'IEX_After_Loss', 'IEX_Energy_kWh']
-            merged = pd.merge(merged, iex_merge, on=['Slot_Date', 'Slot_Time'], how='left')
-            merged['IEX_After_Loss'] = merged['IEX_After_Loss'].fillna(0)
-            merged['IEX_Energy_kWh'] = merged['IEX_Energy_kWh'].fillna(0)
+            iex_merge = iex_df.set_index(slot_keys)[['After_Loss', 'Energy_kWh']].set_axis(['IEX_After_Loss', 'IEX_Energy_kWh'], axis=1)
+            iex_merge['_has_iex'] = True
+            merged = merged.join(iex_merge, how='outer')
         else:
             merged['IEX_After_Loss'] = 0
             merged['IEX_Energy_kWh'] = 0
+            merged['_has_iex'] = np.nan
         
-        # Merge C.P.P data
+        # Join C.P.P data
         if not cpp_df_only.empty:
-            cpp_merge = cpp_df_only[['Slot_Date', 'Slot_Time', 'After_Loss', 'Energy_kWh']].copy()
-            cpp_merge.columns = ['Slot_Date', 'Slot_Time', 'CPP_After_Loss', 'CPP_Energy_kWh']
-            merged = pd.merge(merged, cpp_merge, on=['Slot_Date', 'Slot_Time'], how='left')
-            merged['CPP_After_Loss'] = merged['CPP_After_Loss'].fillna(0)
-            merged['CPP_Energy_kWh'] = merged['CPP_Energy_kWh'].fillna(0)
+            cpp_merge = cpp_df_only.set_index(slot_keys)[['After_Loss', 'Energy_kWh']].set_axis(['CPP_After_Loss', 'CPP_Energy_kWh'], axis=1)
+            cpp_merge['_has_cpp'] = True
+            merged = merged.join(cpp_merge, how='outer')
         else:
             merged['CPP_After_Loss'] = 0
             merged['CPP_Energy_kWh'] = 0
+            merged['_has_cpp'] = np.nan
+        merged = merged.reset_index()
         
-        # Sequential Adjustment Calculation
-        # Step 1: I.E.X adjustment first
-        merged['IEX_Adjustment'] = merged[['IEX_After_Loss', 'Energy_kWh_cons']].min(axis=1)
-        merged['IEX_Excess'] = (merged['IEX_After_Loss'] - merged['Energy_kWh_cons']).apply(lambda x: max(0, x))
-        
-        # Step 2: Calculate remaining consumption after I.E.X adjustment
-        merged['Remaining_Consumption'] = (merged['Energy_kWh_cons'] - merged['IEX_Adjustment']).apply(lambda x: max(0, x))
+        energy_cols = ['Energy_kWh_cons', 'IEX_After_Loss', 'IEX_Energy_kWh', 'CPP_After_Loss', 'CPP_Energy_kWh']
+        merged[energy_cols] = merged[energy_cols].fillna(0)
         
-        # Step 3: C.P.P adjustment with remaining consumption
-        merged['CPP_Adjustment'] = merged[['CPP_After_Loss', 'Remaining_Consumption']].min(axis=1)
-        merged['CPP_Excess'] = (merged['CPP_After_Loss'] - merged['Remaining_Consumption']).apply(lambda x: max(0, x))
+        # Sequential Adjustment Calculation
+        iex_after_loss = merged['IEX_After_Loss'].to_numpy(dtype=float)
+        cpp_after_loss = merged['CPP_After_Loss'].to_numpy(dtype=float)
+        consumption = merged['Energy_kWh_cons'].to_numpy(dtype=float)
+        # Steps 1-3: I.E.X adjustment first, then C.P.P against the remaining consumption
+        iex_adjustment, iex_excess, remaining, cpp_adjustment, cpp_excess = sequential_adjustment(
+            iex_after_loss, cpp_after_loss, consumption)
+        merged['IEX_Adjustment'] = iex_adjustment
+        merged['IEX_Excess'] = iex_excess
+        merged['Remaining_Consumption'] = remaining
+        merged['CPP_Adjustment'] = cpp_adjustment
+        merged['CPP_Excess'] = cpp_excess
         
         # Step 4: Total calculations
-        merged['Total_Excess'] = merged['IEX_Excess'] + merged['CPP_Excess']
-        merged['Total_Generated_After_Loss'] = merged['IEX_After_Loss'] + merged['CPP_After_Loss']
-        merged['Total_Generated_Before_Loss'] = merged['IEX_Energy_kWh'] + merged['CPP_Energy_kWh']
+        merged['Total_Excess'] = iex_excess + cpp_excess
+        merged['Total_Generated_After_Loss'] = iex_after_loss + cpp_after_loss
+        merged['Total_Generated_Before_Loss'] = (merged['IEX_Energy_kWh'].to_numpy(dtype=float)
+                                                 + merged['CPP_Energy_kWh'].to_numpy(dtype=float))
         
         # Debug: Print sequential calculation summary
         print("\n=== SEQUENTIAL ADJUSTMENT DEBUG ===")
         print(f"Enable I.E.X: {enable_iex}, Enable C.P.P: {enable_cpp}")
         if enable_iex and enable_cpp:
-            print(f"Total I.E.X Before Loss: {merged['IEX_Energy_kWh'].sum():.4f} kWh")
-            print(f"Total I.E.X After Loss: {merged['IEX_After_Loss'].sum():.4f} kWh")
-            print(f"Total C.P.P Before Loss: {merged['CPP_Energy_kWh'].sum():.4f} kWh")
-            print(f"Total C.P.P After Loss: {merged['CPP_After_Loss'].sum():.4f} kWh")
-            print(f"Total Consumption: {merged['Energy_kWh_cons'].sum():.4f} kWh")
-            print(f"Total I.E.X Excess: {merged['IEX_Excess'].sum():.4f} kWh")
-            print(f"Total C.P.P Excess: {merged['CPP_Excess'].sum():.4f} kWh")
-            print(f"Total Combined Excess: {merged['Total_Excess'].sum():.4f} kWh")
-            print(f"Remaining Consumption Total: {merged['Remaining_Consumption'].sum():.4f} kWh")
+            debug_totals = merged[['IEX_Energy_kWh', 'IEX_After_Loss', 'CPP_Energy_kWh', 'CPP_After_Loss',
+                                   'Energy_kWh_cons', 'IEX_Excess', 'CPP_Excess', 'Total_Excess',
+                                   'Remaining_Consumption']].sum()
+            print(f"Total I.E.X Before Loss: {debug_totals['IEX_Energy_kWh']:.4f} kWh")
+            print(f"Total I.E.X After Loss: {debug_totals['IEX_After_Loss']:.4f} kWh")
+            print(f"Total C.P.P Before Loss: {debug_totals['CPP_Energy_kWh']:.4f} kWh")
+            print(f"Total C.P.P After Loss: {debug_totals['CPP_After_Loss']:.4f} kWh")
+            print(f"Total Consumption: {debug_totals['Energy_kWh_cons']:.4f} kWh")
+            print(f"Total I.E.X Excess: {debug_totals['IEX_Excess']:.4f} kWh")
+            print(f"Total C.P.P Excess: {debug_totals['CPP_Excess']:.4f} kWh")
+            print(f"Total Combined Excess: {debug_totals['Total_Excess']:.4f} kWh")
+            print(f"Remaining Consumption Total: {debug_totals['Remaining_Consumption']:.4f} kWh")
         print("=== END DEBUG ===\n")
         
         # For backward compatibility with existing PDF code
         merged['After_Loss'] = merged['Total_Generated_After_Loss']
         merged['Energy_kWh_gen'] = merged['Total_Generated_Before_Loss']
         merged['Excess'] = merged['Total_Excess']
-        # Track missing slots for reporting
-        merged['Missing_Info'] = ''
-        merged['is_missing_iex'] = ~merged.apply(lambda row: (row['Slot_Date'], row['Slot_Time']) in iex_slots_set, axis=1)
-        merged['is_missing_cpp'] = ~merged.apply(lambda row: (row['Slot_Date'], row['Slot_Time']) in cpp_slots_set, axis=1)
-        merged['is_missing_cons'] = ~merged.apply(lambda row: (row['Slot_Date'], row['Slot_Time']) in cons_slots_set, axis=1)
-        
-        if enable_iex:
-            merged.loc[merged['is_missing_iex'], 'Missing_Info'] += '[Missing in I.E.X] '
-        if enable_cpp:
-            merged.loc[merged['is_missing_cpp'], 'Missing_Info'] += '[Missing in C.P.P] '
-        merged.loc[merged['is_missing_cons'], 'Missing_Info'] += '[Missing in CONSUMED] '
-        merged.drop(['is_missing_iex', 'is_missing_cpp', 'is_missing_cons'], axis=1, inplace=True)
+        # Track missing slots for reporting (slots a source did not cover in the merges above)
+        is_missing_iex = merged['_has_iex'].isna().to_numpy()
+        is_missing_cpp = merged['_has_cpp'].isna().to_numpy()
+        is_missing_cons = merged['_has_cons'].isna().to_numpy()
+        has_gen = ~(is_missing_iex & is_missing_cpp)
+        merged['Missing_Info'] = missing_info(is_missing_iex & enable_iex, is_missing_cpp & enable_cpp, is_missing_cons)
+        merged.drop(['_has_iex', '_has_cpp', '_has_cons'], axis=1, inplace=True)
         # Compose error/warning message for PDF
         error_message = ''
         local_missing_days_msg = globals().get('missing_days_msg', '')
@@ -650,16 +787,15 @@ def index():
         if local_missing_days_msg or local_slot_mismatch_msg:
             error_message = local_missing_days_msg + local_slot_mismatch_msg + '\nProceeding with only the matching days and slots (missing slots filled with zero).'
 
-        # Check for missing days in either file (priority: match Slot_Date between files)
-        cons_days = set(cons_df['Slot_Date'].unique())
-        iex_days = set(iex_df['Slot_Date'].unique()) if not iex_df.empty else set()
-        cpp_days = set(cpp_df_only['Slot_Date'].unique()) if not cpp_df_only.empty else set()
+        # Check for missing days in either file (priority: match Slot_Date between files);
+        # every source row is in merged, so its markers give each side's days as an Index
+        slot_dates = merged['Slot_Date']
+        cons_days = pd.Index(slot_dates[~is_missing_cons].unique())
+        all_gen_days = pd.Index(slot_dates[has_gen].unique())
+        common_days = cons_days.intersection(all_gen_days)
         
-        all_gen_days = iex_days | cpp_days
-        common_days = cons_days & all_gen_days
-        
-        missing_in_gen = sorted(list(cons_days - all_gen_days))
-        missing_in_cons = sorted(list(all_gen_days - cons_days))
+        missing_in_gen = sorted(cons_days.difference(all_gen_days))
+        missing_in_cons = sorted(all_gen_days.difference(cons_days))
         
         missing_days_msg = ""
         if missing_in_gen:
@@ -667,98 +803,60 @@ def index():
         if missing_in_cons:
             missing_days_msg += f"Warning: The following days are present in GENERATION but missing in CONSUMED: {', '.join(missing_in_cons)}\n"
         
-        # Check for missing slots (time intervals) for common days
+        # Check for missing slots (time intervals) for common days; the merge presence markers
+        # already say which source covered each slot, so only the mismatched rows are grouped
+        in_common_day = slot_dates.isin(common_days).to_numpy()
+        gen_gaps = merged.loc[in_common_day & ~is_missing_cons & ~has_gen].groupby('Slot_Date')['Slot_Time'].unique()
+        cons_gaps = merged.loc[in_common_day & is_missing_cons & has_gen].groupby('Slot_Date')['Slot_Time'].unique()
         slot_mismatch_msg = ""
-        for day in sorted(common_days):
-            cons_slots = set(cons_df[cons_df['Slot_Date'] == day]['Slot_Time'])
-            iex_slots = set(iex_df[iex_df['Slot_Date'] == day]['Slot_Time']) if not iex_df.empty else set()
-            cpp_slots = set(cpp_df_only[cpp_df_only['Slot_Date'] == day]['Slot_Time']) if not cpp_df_only.empty else set()
-            all_gen_slots = iex_slots | cpp_slots
-            
-            missing_slots_in_gen = cons_slots - all_gen_slots
-            missing_slots_in_cons = all_gen_slots - cons_slots
-            
-            if missing_slots_in_gen:
-                slot_mismatch_msg += f"Day {day}: Slots in CONSUMED but missing in GENERATION: {', '.join(sorted(missing_slots_in_gen))}\n"
-            if missing_slots_in_cons:
-                slot_mismatch_msg += f"Day {day}: Slots in GENERATION but missing in CONSUMED: {', '.join(sorted(missing_slots_in_cons))}\n"
+        for day in gen_gaps.index.union(cons_gaps.index):
+            if day in gen_gaps.index:
+                slot_mismatch_msg += f"Day {day}: Slots in CONSUMED but missing in GENERATION: {', '.join(sorted(gen_gaps[day]))}\n"
+            if day in cons_gaps.index:
+                slot_mismatch_msg += f"Day {day}: Slots in GENERATION but missing in CONSUMED: {', '.join(sorted(cons_gaps[day]))}\n"
 
         # If there are missing days or slots, add warning message
         warning_msg = ''
         if missing_days_msg or slot_mismatch_msg:
             warning_msg = missing_days_msg + slot_mismatch_msg
             warning_msg += "\nProceeding with only the matching days and slots (intersection)."
-        # Sort merged data chronologically by Slot_Date and Slot_Time (slot start)
-        def slot_time_to_minutes(slot_time):
-            # Extract start time from 'HH:MM - HH:MM' and convert to minutes since midnight
-            try:
-                start = slot_time.split('-')[0].strip()
-                h, m = map(int, start.split(':'))
-                return h * 60 + m
-            except Exception:
-                return 0
-        merged['Slot_Date_dt'] = pd.to_datetime(merged['Slot_Date'], format='%d/%m/%Y', errors='coerce')
-        merged['Slot_Time_min'] = merged['Slot_Time'].apply(slot_time_to_minutes)
-        merged = merged.sort_values(['Slot_Date_dt', 'Slot_Time_min']).reset_index(drop=True)
+        # Sort merged data chronologically by slot start (Slot_DT is carried through the merges)
+        merged = merged.sort_values('Slot_DT', kind='mergesort').reset_index(drop=True)
         
         # Add TOD (Time of Day) classification
-        def classify_tod(slot_time):
-            # Extract start time from 'HH:MM - HH:MM'
-            try:
-                start_time = slot_time.split('-')[0].strip()
-                hour, minute = map(int, start_time.split(':'))
-                
-                # Morning peak: 6:00 AM - 10:00 AM (C1) - EXCLUDES 10:00-10:15 slot
-                if 6 <= hour < 10:
-                    return 'C1'
-                # Evening peak: 6:00 PM - 10:00 PM (C2) - EXCLUDES 22:00-22:15 slot
-                elif 18 <= hour < 22:
-                    return 'C2'
-                # Normal hours: 5:00 AM - 6:00 AM + 10:00 AM to 6:00 PM (C4) - INCLUDES 10:00 and 22:00 slots
-                elif (5 <= hour < 6) or (10 <= hour < 18):
-                    return 'C4'
-                # Night hours: 22:00 PM to 5:00 AM (C5)
-                elif (hour >= 22) or (hour < 5):
-                    return 'C5'
-                else:
-                    return 'Unknown'
-            except Exception:
-                return 'Unknown'
-        
-        merged['TOD_Category'] = merged['Slot_Time'].apply(classify_tod)
+        merged['TOD_Category'] = classify_tod(slot_start_parts(merged['Slot_Time'])[0])
         
         # Debug: Print some TOD classifications to verify fix
         print(f"\n=== TOD CLASSIFICATION DEBUG ===")
         test_times = merged[merged['Slot_Time'].str.contains('09:45|10:00|10:15|21:45|22:00|22:15', na=False)]
         if not test_times.empty:
-            for _, row in test_times.head(10).iterrows():
-                print(f"Time: {row['Slot_Time']} -> TOD: {row['TOD_Category']}")
+            for slot_time, tod in test_times[['Slot_Time', 'TOD_Category']].head(10).itertuples(index=False, name=None):
+                print(f"Time: {slot_time} -> TOD: {tod}")
         print("=== END TOD DEBUG ===\n")
         
-        # Group excess energy by TOD category using sequential adjustment totals
-        tod_excess = merged.groupby('TOD_Category')['Total_Excess'].sum().reset_index()
+        # Group excess energy by TOD category using sequential adjustment totals; the I.E.X
+        # excess rides along so every financial excess figure comes from this one pass
+        tod_excess = tod_sums(merged, ['Total_Excess', 'IEX_Excess'])
+        # Rounded once here so the detailed and day-wise PDFs print the same per-TOD figures
+        tod_excess_rounded = dict(zip(tod_excess.index, round_kwh(tod_excess['Total_Excess'].to_numpy()).tolist()))
         
         # Calculate financial values using sequential adjustment total with rounded values for consistency
         total_excess_financial = merged['Total_Excess'].sum()
         
-        # Helper function for consistent rounding throughout the application
-        def round_kwh_financial(value):
-            return int(value + 0.5) if value >= 0 else int(value - 0.5)
-        
         # Round the total for financial calculations to match table display values
-        total_excess_financial_rounded = round_kwh_financial(total_excess_financial)
+        total_excess_financial_rounded = round_kwh(total_excess_financial)
         
         # Base rate for all excess energy using rounded values
         base_rate = 7.25  # rupees per kWh
         base_amount = total_excess_financial_rounded * base_rate
         
         # Additional charges for specific TOD categories using rounded values
-        c1_c2_excess_raw = tod_excess.loc[tod_excess['TOD_Category'].isin(['C1', 'C2']), 'Total_Excess'].sum()
-        c1_c2_excess = round_kwh_financial(c1_c2_excess_raw)
+        c1_c2_excess_raw = tod_excess['Total_Excess'].reindex(['C1', 'C2'], fill_value=0.0).sum()
+        c1_c2_excess = round_kwh(c1_c2_excess_raw)
         c1_c2_additional = c1_c2_excess * 1.8125  # rupees per kWh
         
-        c5_excess_raw = tod_excess.loc[tod_excess['TOD_Category'] == 'C5', 'Total_Excess'].sum()
-        c5_excess = round_kwh_financial(c5_excess_raw)
+        c5_excess_raw = tod_excess['Total_Excess'].get('C5', 0.0)
+        c5_excess = round_kwh(c5_excess_raw)
         c5_additional = c5_excess * 0.3625  # rupees per kWh
         
         # Calculate total amount
@@ -771,8 +869,8 @@ def index():
         total_with_etax = total_amount + etax
         
         # Calculate IEX excess for specific charges using rounded values
-        iex_excess_financial_raw = merged['IEX_Excess'].sum()
-        iex_excess_financial = round_kwh_financial(iex_excess_financial_raw)
+        iex_excess_financial_raw = tod_excess['IEX_Excess'].sum()
+        iex_excess_financial = round_kwh(iex_excess_financial_raw)
         
         # Calculate negative factors using rounded values
         etax_on_iex = total_excess_financial_rounded * 0.1
@@ -789,28 +887,29 @@ def index():
         # Round up final amount to next highest value
         final_amount_rounded = math.ceil(final_amount)
         
-        merged.drop(['Slot_Date_dt', 'Slot_Time_min'], axis=1, inplace=True)
-        # Totals using sequential adjustment calculations
-        sum_injection = merged['Energy_kWh_gen'].sum()  # Generated before loss
-        total_generated_after_loss = merged['After_Loss'].sum()
-        total_consumed = merged['Energy_kWh_cons'].sum()
+        # Totals using sequential adjustment calculations (one reduction per frame)
+        merged_totals = merged.sum(numeric_only=True)
+        sum_injection = merged_totals['Energy_kWh_gen']  # Generated before loss
+        total_generated_after_loss = merged_totals['After_Loss']
+        total_consumed = merged_totals['Energy_kWh_cons']
         
         # Use the new sequential adjustment totals instead of old combined logic
-        total_excess = merged['Total_Excess'].sum()  # Use Total_Excess from sequential calculation
+        total_excess = merged_totals['Total_Excess']  # Use Total_Excess from sequential calculation
         comparison = sum_injection - total_generated_after_loss
         
         # For PDF, show all slots or only excess slots (using Total_Excess)
         merged_excess = merged[merged['Total_Excess'] > 0].copy()  # Filter by Total_Excess
         merged_all = merged.copy()
+        excess_totals = merged_excess.sum(numeric_only=True)
         
         # DEBUG: Show difference between full totals and excess-only totals
         print(f"\n=== EXCESS VS ALL TOTALS DEBUG ===")
-        excess_iex_total = merged_excess['IEX_Energy_kWh'].sum() if 'IEX_Energy_kWh' in merged_excess.columns else 0
-        excess_cpp_total = merged_excess['CPP_Energy_kWh'].sum() if 'CPP_Energy_kWh' in merged_excess.columns else 0
+        excess_iex_total = excess_totals.get('IEX_Energy_kWh', 0)
+        excess_cpp_total = excess_totals.get('CPP_Energy_kWh', 0)
         excess_generation_total = excess_iex_total + excess_cpp_total
         
-        all_iex_total = merged['IEX_Energy_kWh'].sum()
-        all_cpp_total = merged['CPP_Energy_kWh'].sum()
+        all_iex_total = merged_totals['IEX_Energy_kWh']
+        all_cpp_total = merged_totals['CPP_Energy_kWh']
         all_generation_total = all_iex_total + all_cpp_total
         
         print(f"EXCESS SLOTS ONLY - I.E.X: {excess_iex_total:.4f} kWh, C.P.P: {excess_cpp_total:.4f} kWh, Total: {excess_generation_total:.4f} kWh")
@@ -820,15 +919,15 @@ def index():
         
         # CORRECTED: For excess PDF, use only excess slot totals; for all PDF, use sequential totals
         sum_injection_excess = excess_generation_total  # Only excess slots
-        total_generated_after_loss_excess = merged_excess['IEX_After_Loss'].sum() + merged_excess['CPP_After_Loss'].sum()  # Only excess slots
+        total_generated_after_loss_excess = excess_totals['IEX_After_Loss'] + excess_totals['CPP_After_Loss']  # Only excess slots
         # Use the total consumed energy from all slots for consistency across all PDFs
-        total_consumed_excess = merged['Energy_kWh_cons'].sum()  # Total consumption from all slots
-        total_excess_excess = merged_excess['Total_Excess'].sum()  # Use Total_Excess
+        total_consumed_excess = total_consumed  # Total consumption from all slots
+        total_excess_excess = excess_totals['Total_Excess']  # Use Total_Excess
         
         sum_injection_all = all_generation_total  # All sequential totals
-        total_generated_after_loss_all = merged_all['IEX_After_Loss'].sum() + merged_all['CPP_After_Loss'].sum()  # All sequential totals
-        total_consumed_all = merged_all['Energy_kWh_cons'].sum()
-        total_excess_all = merged_all['Total_Excess'].sum()  # Use Total_Excess
+        total_generated_after_loss_all = merged_totals['IEX_After_Loss'] + merged_totals['CPP_After_Loss']  # All sequential totals
+        total_consumed_all = total_consumed
+        total_excess_all = total_excess  # Use Total_Excess
         excess_status = 'Excess' if total_excess > 0 else 'No Excess'
         comparison_excess = sum_injection_excess - total_generated_after_loss_excess
         comparison_all = sum_injection_all - total_generated_after_loss_all
@@ -856,25 +955,35 @@ def index():
             if isinstance(d, str):
                 return d
             return d.strftime('%d/%m/%Y')
-        def generate_pdf(pdf_data, sum_injection, total_generated_after_loss, comparison, total_consumed, total_excess, excess_status, filename, auto_detect=auto_detect_month, gen_files=generated_files, cpp_files=cpp_files, cons_files=consumed_files, full_totals=None):
+        # Cover details shared by every PDF generated for this request
+        report_meta = {
+            'consumer_number': consumer_number,
+            'consumer_name': consumer_name,
+            'multiplication_factor': multiplication_factor,
+            't_and_d_loss': t_and_d_loss,
+            'cpp_t_and_d_loss': cpp_t_and_d_loss,
+        }
+
+        def generate_pdf(pdf_data, sum_injection, total_generated_after_loss, comparison, total_consumed, total_excess, excess_status, filename, auto_detect=auto_detect_month, gen_files=generated_files, cpp_files=cpp_files, cons_files=consumed_files, full_totals=None, excess_only=False):
             # Debug: Check what data PDF generation receives
             print(f"\n=== PDF GENERATION DEBUG ===")
             print(f"PDF received total_excess parameter: {total_excess:.4f} kWh")
             print(f"PDF received total_generated_after_loss: {total_generated_after_loss:.4f} kWh")
             print(f"PDF received total_consumed: {total_consumed:.4f} kWh")
             print(f"PDF data shape: {pdf_data.shape}")
+            column_totals = pdf_data.sum(numeric_only=True)
             if 'IEX_Energy_kWh' in pdf_data.columns:
-                print(f"PDF data IEX_Energy_kWh sum: {pdf_data['IEX_Energy_kWh'].sum():.4f} kWh")
+                print(f"PDF data IEX_Energy_kWh sum: {column_totals['IEX_Energy_kWh']:.4f} kWh")
             if 'CPP_Energy_kWh' in pdf_data.columns:
-                print(f"PDF data CPP_Energy_kWh sum: {pdf_data['CPP_Energy_kWh'].sum():.4f} kWh")
+                print(f"PDF data CPP_Energy_kWh sum: {column_totals['CPP_Energy_kWh']:.4f} kWh")
             if 'Total_Excess' in pdf_data.columns:
-                print(f"PDF data Total_Excess sum: {pdf_data['Total_Excess'].sum():.4f} kWh")
+                print(f"PDF data Total_Excess sum: {column_totals['Total_Excess']:.4f} kWh")
             if 'Excess' in pdf_data.columns:
-                print(f"PDF data Excess sum: {pdf_data['Total_Excess'].sum():.4f} kWh")
+                print(f"PDF data Excess sum: {column_totals['Total_Excess']:.4f} kWh")
             if 'IEX_Excess' in pdf_data.columns:
-                print(f"PDF data IEX_Excess sum: {pdf_data['IEX_Excess'].sum():.4f} kWh")
+                print(f"PDF data IEX_Excess sum: {column_totals['IEX_Excess']:.4f} kWh")
             if 'CPP_Excess' in pdf_data.columns:
-                print(f"PDF data CPP_Excess sum: {pdf_data['CPP_Excess'].sum():.4f} kWh")
+                print(f"PDF data CPP_Excess sum: {column_totals['CPP_Excess']:.4f} kWh")
             if full_totals:
                 print(f"Full totals provided: IEX_Before={full_totals.get('iex_before', 0):.4f}, CPP_Before={full_totals.get('cpp_before', 0):.4f}")
                 print(f"Full totals provided: IEX_After={full_totals.get('iex_after', 0):.4f}, CPP_After={full_totals.get('cpp_after', 0):.4f}")
@@ -884,39 +993,9 @@ def index():
             # Import datetime for timestamp
             from datetime import datetime
             
-            pdf = AuthorPDF()
-            pdf.set_margins(20, 20, 20)  # Set proper margins: left, top, right (20mm each)
-            pdf.set_auto_page_break(auto=True, margin=20)  # Auto page break with bottom margin
-            pdf.add_page()
-            
             # FIRST PAGE - DESCRIPTION AND INFORMATION ONLY
-            pdf.set_font('Arial', 'B', 16)  # Larger title font
-            pdf.cell(0, 15, 'Energy Adjustment Report', ln=True, align='C')
-            pdf.ln(10)
-            
-            # Consumer Information Section
-            pdf.set_font('Arial', 'B', 14)
-            pdf.cell(0, 10, 'Consumer Information:', ln=True)
-            pdf.set_font('Arial', '', 12)
-            pdf.cell(0, 8, f'Consumer Number: {consumer_number}', ln=True)
-            pdf.cell(0, 8, f'Consumer Name: {consumer_name}', ln=True)
-            pdf.cell(0, 8, f'Multiplication Factor (Consumed Energy): {multiplication_factor}', ln=True)
-            pdf.ln(5)
-            
-            # Technical Parameters Section
-            pdf.set_font('Arial', 'B', 14)
-            pdf.cell(0, 10, 'Technical Parameters:', ln=True)
-            pdf.set_font('Arial', '', 12)
-            
-            # Display T&D losses based on what sources are used
-            if generated_files and cpp_files:
-                pdf.cell(0, 8, f'I.E.X T&D Loss (%): {t_and_d_loss}', ln=True)
-                pdf.cell(0, 8, f'C.P.P T&D Loss (%): {cpp_t_and_d_loss}', ln=True)
-            elif generated_files:
-                pdf.cell(0, 8, f'I.E.X T&D Loss (%): {t_and_d_loss}', ln=True)
-            elif cpp_files:
-                pdf.cell(0, 8, f'C.P.P T&D Loss (%): {cpp_t_and_d_loss}', ln=True)
-            pdf.ln(5)
+            pdf = ReportPDF(report_meta)
+            pdf.add_cover('Energy Adjustment Report', bool(generated_files), bool(cpp_files))
             
             # Data Sources Section
             pdf.set_font('Arial', 'B', 14)
@@ -976,144 +1055,144 @@ def index():
                     pdf.set_font('Arial', 'B', 8)  # Multi-source headers: Font size 8
                     
                     # First row - main headers
-                    pdf.cell(16, 8, 'Date', 1, 0, 'C')
-                    pdf.cell(20, 8, 'Time', 1, 0, 'C')
-                    pdf.cell(12, 8, 'TOD', 1, 0, 'C')
-                    pdf.cell(18, 8, 'Consumed', 1, 0, 'C')
-                    pdf.cell(18, 8, 'IEX After', 1, 0, 'C')
-                    pdf.cell(16, 8, 'IEX', 1, 0, 'C')
-                    pdf.cell(18, 8, 'CPP After', 1, 0, 'C')
-                    pdf.cell(16, 8, 'CPP', 1, 0, 'C')
-                    pdf.cell(18, 8, 'Total', 1, 0, 'C')
-                    pdf.cell(12, 8, 'Missing', 1, 0, 'C')
+                    pdf.cell(16, 8, 'Date', border=1, align='C')
+                    pdf.cell(20, 8, 'Time', border=1, align='C')
+                    pdf.cell(12, 8, 'TOD', border=1, align='C')
+                    pdf.cell(18, 8, 'Consumed', border=1, align='C')
+                    pdf.cell(18, 8, 'IEX After', border=1, align='C')
+                    pdf.cell(16, 8, 'IEX', border=1, align='C')
+                    pdf.cell(18, 8, 'CPP After', border=1, align='C')
+                    pdf.cell(16, 8, 'CPP', border=1, align='C')
+                    pdf.cell(18, 8, 'Total', border=1, align='C')
+                    pdf.cell(12, 8, 'Missing', border=1, align='C')
                     pdf.ln()
                     
                     # Second row - specifications
-                    pdf.cell(16, 8, '', 1, 0, 'C')
-                    pdf.cell(20, 8, '', 1, 0, 'C')
-                    pdf.cell(12, 8, '', 1, 0, 'C')
-                    pdf.cell(18, 8, '(kWh)', 1, 0, 'C')
-                    pdf.cell(18, 8, 'Loss (kWh)', 1, 0, 'C')
-                    pdf.cell(16, 8, 'Excess', 1, 0, 'C')
-                    pdf.cell(18, 8, 'Loss (kWh)', 1, 0, 'C')
-                    pdf.cell(16, 8, 'Excess', 1, 0, 'C')
-                    pdf.cell(18, 8, 'Excess', 1, 0, 'C')
-                    pdf.cell(12, 8, 'Info', 1, 0, 'C')
+                    pdf.cell(16, 8, '', border=1, align='C')
+                    pdf.cell(20, 8, '', border=1, align='C')
+                    pdf.cell(12, 8, '', border=1, align='C')
+                    pdf.cell(18, 8, '(kWh)', border=1, align='C')
+                    pdf.cell(18, 8, 'Loss (kWh)', border=1, align='C')
+                    pdf.cell(16, 8, 'Excess', border=1, align='C')
+                    pdf.cell(18, 8, 'Loss (kWh)', border=1, align='C')
+                    pdf.cell(16, 8, 'Excess', border=1, align='C')
+                    pdf.cell(18, 8, 'Excess', border=1, align='C')
+                    pdf.cell(12, 8, 'Info', border=1, align='C')
                     pdf.ln()
                     
                     # Third row - units
-                    pdf.cell(16, 8, '', 1, 0, 'C')
-                    pdf.cell(20, 8, '', 1, 0, 'C')
-                    pdf.cell(12, 8, '', 1, 0, 'C')
-                    pdf.cell(18, 8, '', 1, 0, 'C')
-                    pdf.cell(18, 8, '', 1, 0, 'C')
-                    pdf.cell(16, 8, '(kWh)', 1, 0, 'C')
-                    pdf.cell(18, 8, '', 1, 0, 'C')
-                    pdf.cell(16, 8, '(kWh)', 1, 0, 'C')
-                    pdf.cell(18, 8, '(kWh)', 1, 0, 'C')
-                    pdf.cell(12, 8, '', 1, 0, 'C')
+                    pdf.cell(16, 8, '', border=1, align='C')
+                    pdf.cell(20, 8, '', border=1, align='C')
+                    pdf.cell(12, 8, '', border=1, align='C')
+                    pdf.cell(18, 8, '', border=1, align='C')
+                    pdf.cell(18, 8, '', border=1, align='C')
+                    pdf.cell(16, 8, '(kWh)', border=1, align='C')
+                    pdf.cell(18, 8, '', border=1, align='C')
+                    pdf.cell(16, 8, '(kWh)', border=1, align='C')
+                    pdf.cell(18, 8, '(kWh)', border=1, align='C')
+                    pdf.cell(12, 8, '', border=1, align='C')
                     pdf.ln()
                     
-                    # Reset font to table data font after headers
-                    pdf.set_font('Arial', '', 9)  # Multi-source table content font size
-                    
                 else:
                     # Standard table for single source with properly formatted headers
                     pdf.set_font('Arial', 'B', 9)  # Single-source headers: Font size 9
                     
                     # First row - main headers with borders
-                    pdf.cell(20, 8, 'Date', 1, 0, 'C')
-                    pdf.cell(25, 8, 'Time', 1, 0, 'C')  
-                    pdf.cell(15, 8, 'TOD', 1, 0, 'C')  
-                    pdf.cell(25, 8, 'Generated', 1, 0, 'C')
-                    pdf.cell(25, 8, 'Consumed', 1, 0, 'C') 
-                    pdf.cell(25, 8, 'Excess', 1, 0, 'C')
-                    pdf.cell(15, 8, 'Missing', 1, 0, 'C')
+                    pdf.cell(20, 8, 'Date', border=1, align='C')
+                    pdf.cell(25, 8, 'Time', border=1, align='C')  
+                    pdf.cell(15, 8, 'TOD', border=1, align='C')  
+                    pdf.cell(25, 8, 'Generated', border=1, align='C')
+                    pdf.cell(25, 8, 'Consumed', border=1, align='C') 
+                    pdf.cell(25, 8, 'Excess', border=1, align='C')
+                    pdf.cell(15, 8, 'Missing', border=1, align='C')
                     pdf.ln()
                     
                     # Second row for "After Loss", "Energy", "Energy", "Info"
-                    pdf.cell(20, 8, '', 1, 0, 'C')  # Border for Date column
-                    pdf.cell(25, 8, '', 1, 0, 'C')  # Border for Time column
-                    pdf.cell(15, 8, '', 1, 0, 'C')  # Border for TOD column
-                    pdf.cell(25, 8, 'After Loss', 1, 0, 'C')
-                    pdf.cell(25, 8, 'Energy', 1, 0, 'C')
-                    pdf.cell(25, 8, 'Energy', 1, 0, 'C')
-                    pdf.cell(15, 8, 'Info', 1, 0, 'C')
+                    pdf.cell(20, 8, '', border=1, align='C')  # Border for Date column
+                    pdf.cell(25, 8, '', border=1, align='C')  # Border for Time column
+                    pdf.cell(15, 8, '', border=1, align='C')  # Border for TOD column
+                    pdf.cell(25, 8, 'After Loss', border=1, align='C')
+                    pdf.cell(25, 8, 'Energy', border=1, align='C')
+                    pdf.cell(25, 8, 'Energy', border=1, align='C')
+                    pdf.cell(15, 8, 'Info', border=1, align='C')
                     pdf.ln()
                     
                     # Third row for units "(kWh)"
-                    pdf.cell(20, 8, '', 1, 0, 'C')  # Border for Date column
-                    pdf.cell(25, 8, '', 1, 0, 'C')  # Border for Time column
-                    pdf.cell(15, 8, '', 1, 0, 'C')  # Border for TOD column
-                    pdf.cell(25, 8, '(kWh)', 1, 0, 'C')
-                    pdf.cell(25, 8, '(kWh)', 1, 0, 'C')
-                    pdf.cell(25, 8, '(kWh)', 1, 0, 'C')
-                    pdf.cell(15, 8, '', 1, 0, 'C')  # Border for Missing Info column
+                    pdf.cell(20, 8, '', border=1, align='C')  # Border for Date column
+                    pdf.cell(25, 8, '', border=1, align='C')  # Border for Time column
+                    pdf.cell(15, 8, '', border=1, align='C')  # Border for TOD column
+                    pdf.cell(25, 8, '(kWh)', border=1, align='C')
+                    pdf.cell(25, 8, '(kWh)', border=1, align='C')
+                    pdf.cell(25, 8, '(kWh)', border=1, align='C')
+                    pdf.cell(15, 8, '', border=1, align='C')  # Border for Missing Info column
                     pdf.ln()
                 
-                # Reset font to table data font after headers
-                pdf.set_font('Arial', '', 8)  # Single-source table content font size
+                # Reset font to table data font after headers (one call per header block)
+                pdf.set_font('Arial', '', 8)
             
-            # Add initial table headers
-            add_table_headers()
+            # Add initial table headers (an excess-only report with no excess slots gets a note instead)
+            if pdf_data.empty:
+                pdf.set_font('Arial', '', 10)
+                pdf.cell(0, 8, 'No slots with excess energy in the selected period.', ln=True)
+            else:
+                add_table_headers()
+                # Multi-source rows on the first table page use font size 9; headers leave size 8 set for the rest
+                if generated_files and cpp_files:
+                    pdf.set_font('Arial', '', 9)
             
-            # Set table content font size based on source type
+            # Build each column's cell texts up front and emit them against fixed column widths
             if generated_files and cpp_files:
-                pdf.set_font('Arial', '', 9)  # Multi-source: table content font size 9
+                col_widths = (16, 20, 12, 18, 18, 16, 18, 16, 18, 12)
+                row_columns = ('Slot_Date', 'Slot_Time', 'TOD_Category', 'Energy_kWh_cons', 'IEX_After_Loss',
+                               'IEX_Excess', 'CPP_After_Loss', 'CPP_Excess', 'Total_Excess', 'Missing_Info')
+                # Sequential adjustment table data with rounded excess values
+                rounded_columns = ('Energy_kWh_cons', 'IEX_After_Loss', 'IEX_Excess', 'CPP_After_Loss', 'CPP_Excess', 'Total_Excess')
+                decimal_columns = ()
+                missing_chars = 3  # Truncate missing info
             else:
-                pdf.set_font('Arial', '', 8)  # Single-source: table content font size 8
-            table_complete = False  # Flag to track if table data is finished
-            
-            # Helper function for proper rounding (≥0.5 rounds up) to avoid scope issues
-            def round_excess(value):
-                return int(value + 0.5) if value >= 0 else int(value - 0.5)
-            
-            for idx, row in pdf_data.iterrows():
-                # Check if we need a new page (leaving space for summary)
-                if pdf.get_y() > 250:  # Near bottom of page
+                col_widths = (20, 25, 15, 25, 25, 25, 15)
+                row_columns = ('Slot_Date', 'Slot_Time', 'TOD_Category', 'After_Loss', 'Energy_kWh_cons',
+                               'Total_Excess', 'Missing_Info')
+                # Standard table data for single source
+                rounded_columns = ('Total_Excess',)
+                decimal_columns = ('After_Loss', 'Energy_kWh_cons')
+                missing_chars = 4
+
+            # Iterate raw column arrays rather than boxing every row into a Series
+            column_arrays = {col: pdf_data[col].to_numpy() for col in row_columns}
+            if not pdf_data.empty:
+                # Format every cell in vectorised passes (text columns once per distinct value),
+                # so the row loop only emits strings
+                for col in decimal_columns:
+                    column_arrays[col] = np.char.mod('%.2f', column_arrays[col].astype(float))
+                # Round the kWh columns (≥0.5 rounds up)
+                for col in rounded_columns:
+                    column_arrays[col] = np.char.mod('%d', round_kwh(column_arrays[col]))
+                column_arrays['Slot_Date'] = format_distinct(column_arrays['Slot_Date'], safe_date_str)
+                column_arrays['Slot_Time'] = format_distinct(column_arrays['Slot_Time'], format_time)
+                # Missing_Info is a Categorical, so factorising works on its codes and each label is cut once
+                column_arrays['Missing_Info'] = format_distinct(pdf_data['Missing_Info'].array, lambda m: m[:missing_chars])
+            def rows_fitting_on_page():
+                # Rows are drawn while the cursor is above y=250, leaving space for the summary
+                y, count = pdf.get_y(), 0
+                while y <= 250:
+                    y += 7
+                    count += 1
+                return count
+
+            # Emit the table one page-sized chunk at a time instead of testing the cursor per row
+            rows = zip(*(column_arrays[col] for col in row_columns))
+            write_row = pdf.row_writer(col_widths, 7)  # Built once; the layout is fixed for the whole table
+            remaining_rows = len(pdf_data)
+            while remaining_rows:
+                page_capacity = rows_fitting_on_page()
+                if page_capacity == 0:
                     pdf.add_page()
-                    # Only add headers if we're still in the table data section
-                    if not table_complete:
-                        add_table_headers()  # Add headers on new page only for table data
-                
-                if generated_files and cpp_files:
-                    # Sequential adjustment table data with adjusted column widths
-                    pdf.cell(16, 7, safe_date_str(row['Slot_Date']), 1, 0, 'C')
-                    pdf.cell(20, 7, format_time(row['Slot_Time']), 1, 0, 'C')  # Increased time column width
-                    
-                    tod_cat = row.get('TOD_Category', '')
-                    pdf.cell(12, 7, tod_cat, 1, 0, 'C')
-                    
-                    pdf.cell(18, 7, f"{round_excess(row['Energy_kWh_cons'])}", 1, 0, 'C')
-                    pdf.cell(18, 7, f"{round_excess(row.get('IEX_After_Loss', 0))}", 1, 0, 'C')
-                    # Show rounded excess values instead of decimals
-                    iex_excess_rounded = round_excess(row.get('IEX_Excess', 0))
-                    pdf.cell(16, 7, f"{iex_excess_rounded}", 1, 0, 'C')
-                    pdf.cell(18, 7, f"{round_excess(row.get('CPP_After_Loss', 0))}", 1, 0, 'C')
-                    cpp_excess_rounded = round_excess(row.get('CPP_Excess', 0))
-                    pdf.cell(16, 7, f"{cpp_excess_rounded}", 1, 0, 'C')
-                    total_excess_rounded = round_excess(row['Total_Excess'])
-                    pdf.cell(18, 7, f"{total_excess_rounded}", 1, 0, 'C')
-                    pdf.cell(12, 7, row.get('Missing_Info', '')[:3], 1, 0, 'C')  # Truncate missing info
-                else:
-                    # Standard table data for single source
-                    pdf.cell(20, 7, safe_date_str(row['Slot_Date']), 1, 0, 'C')
-                    pdf.cell(25, 7, format_time(row['Slot_Time']), 1, 0, 'C')  # Increased time column width
-                    
-                    tod_cat = row.get('TOD_Category', '')
-                    pdf.cell(15, 7, tod_cat, 1, 0, 'C')
-                    
-                    pdf.cell(25, 7, f"{row['After_Loss']:.2f}", 1, 0, 'C')
-                    pdf.cell(25, 7, f"{row['Energy_kWh_cons']:.2f}", 1, 0, 'C')
-                    # Show rounded excess values instead of decimals
-                    total_excess_rounded = round_excess(row['Total_Excess'])
-                    pdf.cell(25, 7, f"{total_excess_rounded}", 1, 0, 'C')
-                    pdf.cell(15, 7, row.get('Missing_Info', '')[:4], 1, 0, 'C')
-                
-                pdf.ln()
-            
-            # Mark table as complete - no more headers needed for subsequent pages
-            table_complete = True
+                    add_table_headers()  # Repeat the headers on every table page
+                    continue
+                for values in islice(rows, page_capacity):
+                    write_row(values)
+                remaining_rows -= min(page_capacity, remaining_rows)
             
             pdf.ln(2)
             # Show error/warning message in PDF if present
@@ -1131,10 +1210,6 @@ def index():
             pdf.cell(0, 10, 'DETAILED CALCULATION SUMMARY:', ln=True)
             pdf.set_font('Arial', '', 11)
             
-            # Helper function for proper rounding (≥0.5 rounds up) to match table values
-            def round_kwh_summary(value):
-                return int(value + 0.5) if value >= 0 else int(value - 0.5)
-            
             if generated_files and cpp_files:
                 # Sequential adjustment summary - use rounded totals from table data for precision
                 if full_totals:
@@ -1147,25 +1222,27 @@ def index():
                     total_cpp_excess_raw = full_totals.get('cpp_excess', 0)
                 else:
                     # Calculate from pdf_data but round to match table display
-                    total_iex_before_loss_raw = pdf_data['IEX_Energy_kWh'].sum() if 'IEX_Energy_kWh' in pdf_data.columns else 0
-                    total_cpp_before_loss_raw = pdf_data['CPP_Energy_kWh'].sum() if 'CPP_Energy_kWh' in pdf_data.columns else 0
-                    total_iex_after_loss_raw = pdf_data['IEX_After_Loss'].sum() if 'IEX_After_Loss' in pdf_data.columns else 0
-                    total_cpp_after_loss_raw = pdf_data['CPP_After_Loss'].sum() if 'CPP_After_Loss' in pdf_data.columns else 0
-                    total_iex_excess_raw = pdf_data['IEX_Excess'].sum() if 'IEX_Excess' in pdf_data.columns else 0
-                    total_cpp_excess_raw = pdf_data['CPP_Excess'].sum() if 'CPP_Excess' in pdf_data.columns else 0
+                    total_iex_before_loss_raw = column_totals.get('IEX_Energy_kWh', 0)
+                    total_cpp_before_loss_raw = column_totals.get('CPP_Energy_kWh', 0)
+                    total_iex_after_loss_raw = column_totals.get('IEX_After_Loss', 0)
+                    total_cpp_after_loss_raw = column_totals.get('CPP_After_Loss', 0)
+                    total_iex_excess_raw = column_totals.get('IEX_Excess', 0)
+                    total_cpp_excess_raw = column_totals.get('CPP_Excess', 0)
                 
-                # Round all values to match table display (this is what users see in the detailed table)
-                total_iex_before_loss_rounded = round_kwh_summary(total_iex_before_loss_raw)
-                total_iex_after_loss_rounded = round_kwh_summary(total_iex_after_loss_raw)
-                total_cpp_before_loss_rounded = round_kwh_summary(total_cpp_before_loss_raw)
-                total_cpp_after_loss_rounded = round_kwh_summary(total_cpp_after_loss_raw)
-                total_iex_excess_rounded = round_kwh_summary(total_iex_excess_raw)
-                total_cpp_excess_rounded = round_kwh_summary(total_cpp_excess_raw)
+                # Round all values to match table display (this is what users see in the detailed table),
+                # in one vectorised pass
+                (total_iex_before_loss_rounded, total_iex_after_loss_rounded,
+                 total_cpp_before_loss_rounded, total_cpp_after_loss_rounded,
+                 total_iex_excess_rounded, total_cpp_excess_rounded,
+                 iex_adjustment_rounded, cpp_adjustment_rounded) = round_kwh([
+                    total_iex_before_loss_raw, total_iex_after_loss_raw,
+                    total_cpp_before_loss_raw, total_cpp_after_loss_raw,
+                    total_iex_excess_raw, total_cpp_excess_raw,
+                    total_iex_after_loss_raw - total_iex_excess_raw,
+                    total_cpp_after_loss_raw - total_cpp_excess_raw,
+                ]).tolist()
                 total_excess_rounded = total_iex_excess_rounded + total_cpp_excess_rounded
                 
-                iex_adjustment_rounded = round_kwh_summary(total_iex_after_loss_raw - total_iex_excess_raw)
-                cpp_adjustment_rounded = round_kwh_summary(total_cpp_after_loss_raw - total_cpp_excess_raw)
-                
                 pdf.cell(0, 8, f'I.E.X Generation (before T&D loss): {total_iex_before_loss_rounded} kWh', ln=True)
                 pdf.cell(0, 8, f'I.E.X Generation (after {t_and_d_loss}% T&D loss): {total_iex_after_loss_rounded} kWh', ln=True)
                 pdf.cell(0, 8, f'I.E.X Adjustment with Consumption: {iex_adjustment_rounded} kWh', ln=True)
@@ -1174,8 +1251,8 @@ def index():
                 
                 pdf.cell(0, 8, f'C.P.P Generation (before T&D loss): {total_cpp_before_loss_rounded} kWh', ln=True)
                 pdf.cell(0, 8, f'C.P.P Generation (after {cpp_t_and_d_loss}% T&D loss): {total_cpp_after_loss_rounded} kWh', ln=True)
-                remaining_consumption_total_raw = pdf_data['Remaining_Consumption'].sum() if 'Remaining_Consumption' in pdf_data.columns else 0
-                remaining_consumption_total_rounded = round_kwh_summary(remaining_consumption_total_raw)
+                remaining_consumption_total_raw = column_totals.get('Remaining_Consumption', 0)
+                remaining_consumption_total_rounded = round_kwh(remaining_consumption_total_raw)
                 pdf.cell(0, 8, f'Remaining Consumption (after I.E.X adjustment): {remaining_consumption_total_rounded} kWh', ln=True)
                 pdf.cell(0, 8, f'C.P.P Adjustment with Remaining Consumption: {cpp_adjustment_rounded} kWh', ln=True)
                 pdf.cell(0, 8, f'C.P.P Excess Energy (rounded): {total_cpp_excess_rounded} kWh', ln=True)
@@ -1184,10 +1261,10 @@ def index():
                 pdf.set_font('Arial', 'B', 11)
                 pdf.cell(0, 8, f'TOTAL CALCULATIONS:', ln=True)
                 pdf.set_font('Arial', '', 11)
-                total_generation_before_rounded = round_kwh_summary(total_iex_before_loss_raw + total_cpp_before_loss_raw)
-                total_generation_after_rounded = round_kwh_summary(total_iex_after_loss_raw + total_cpp_after_loss_raw)
-                total_consumed_rounded = round_kwh_summary(total_consumed)
-                comparison_rounded = round_kwh_summary((total_iex_before_loss_raw + total_cpp_before_loss_raw) - (total_iex_after_loss_raw + total_cpp_after_loss_raw))
+                total_generation_before_rounded = round_kwh(total_iex_before_loss_raw + total_cpp_before_loss_raw)
+                total_generation_after_rounded = round_kwh(total_iex_after_loss_raw + total_cpp_after_loss_raw)
+                total_consumed_rounded = round_kwh(total_consumed)
+                comparison_rounded = round_kwh((total_iex_before_loss_raw + total_cpp_before_loss_raw) - (total_iex_after_loss_raw + total_cpp_after_loss_raw))
                 
                 pdf.cell(0, 8, f'Total Generation (before loss): {total_generation_before_rounded} kWh', ln=True)
                 pdf.cell(0, 8, f'Total Generation (after loss): {total_generation_after_rounded} kWh', ln=True)
@@ -1197,18 +1274,18 @@ def index():
             else:
                 # Standard summary for single source - use rounded totals to match table
                 total_excess_raw = total_excess
-                total_excess_rounded = round_kwh_summary(total_excess_raw)
+                total_excess_rounded = round_kwh(total_excess_raw)
                 
                 if enable_iex:
                     if full_totals:
                         total_iex_before_loss_raw = full_totals.get('iex_before', 0)
                         total_iex_after_loss_raw = full_totals.get('iex_after', 0)
                     else:
-                        total_iex_before_loss_raw = pdf_data['IEX_Energy_kWh'].sum() if 'IEX_Energy_kWh' in pdf_data.columns else 0
-                        total_iex_after_loss_raw = pdf_data['IEX_After_Loss'].sum() if 'IEX_After_Loss' in pdf_data.columns else 0
+                        total_iex_before_loss_raw = column_totals.get('IEX_Energy_kWh', 0)
+                        total_iex_after_loss_raw = column_totals.get('IEX_After_Loss', 0)
                     
-                    total_iex_before_loss_rounded = round_kwh_summary(total_iex_before_loss_raw)
-                    total_iex_after_loss_rounded = round_kwh_summary(total_iex_after_loss_raw)
+                    total_iex_before_loss_rounded = round_kwh(total_iex_before_loss_raw)
+                    total_iex_after_loss_rounded = round_kwh(total_iex_after_loss_raw)
                     pdf.cell(0, 8, f'I.E.X Generation (before T&D loss): {total_iex_before_loss_rounded} kWh', ln=True)
                     pdf.cell(0, 8, f'I.E.X Generation (after {t_and_d_loss}% T&D loss): {total_iex_after_loss_rounded} kWh', ln=True)
                 
@@ -1217,15 +1294,15 @@ def index():
                         total_cpp_before_loss_raw = full_totals.get('cpp_before', 0)
                         total_cpp_after_loss_raw = full_totals.get('cpp_after', 0)
                     else:
-                        total_cpp_before_loss_raw = pdf_data['CPP_Energy_kWh'].sum() if 'CPP_Energy_kWh' in pdf_data.columns else 0
-                        total_cpp_after_loss_raw = pdf_data['CPP_After_Loss'].sum() if 'CPP_After_Loss' in pdf_data.columns else 0
+                        total_cpp_before_loss_raw = column_totals.get('CPP_Energy_kWh', 0)
+                        total_cpp_after_loss_raw = column_totals.get('CPP_After_Loss', 0)
                     
-                    total_cpp_before_loss_rounded = round_kwh_summary(total_cpp_before_loss_raw)
-                    total_cpp_after_loss_rounded = round_kwh_summary(total_cpp_after_loss_raw)
+                    total_cpp_before_loss_rounded = round_kwh(total_cpp_before_loss_raw)
+                    total_cpp_after_loss_rounded = round_kwh(total_cpp_after_loss_raw)
                     pdf.cell(0, 8, f'C.P.P Generation (before T&D loss): {total_cpp_before_loss_rounded} kWh', ln=True)
                     pdf.cell(0, 8, f'C.P.P Generation (after {cpp_t_and_d_loss}% T&D loss): {total_cpp_after_loss_rounded} kWh', ln=True)
                 
-                total_consumed_rounded = round_kwh_summary(total_consumed)
+                total_consumed_rounded = round_kwh(total_consumed)
                 pdf.cell(0, 8, f'Total Consumed Energy (after multiplication): {total_consumed_rounded} kWh', ln=True)
                 pdf.cell(0, 8, f'Total Excess Energy (rounded): {total_excess_rounded} kWh', ln=True)
             
@@ -1248,37 +1325,20 @@ def index():
             pdf.ln()
             pdf.set_font('Arial', '', 10)  # Consistent with table data font size
             
-            # Get TOD-wise excess from the dataframe using rounded values to match table display
-            tod_excess_raw = pdf_data.groupby('TOD_Category')['Total_Excess'].sum().reset_index()
-            
-            # Apply rounding to match table values (what users see in the detailed table)
-            def round_excess_breakdown(value):
-                return int(value + 0.5) if value >= 0 else int(value - 0.5)
-            
-            tod_descriptions = {
-                'C1': 'Morning Peak',
-                'C2': 'Evening Peak',
-                'C4': 'Normal Hours',
-                'C5': 'Night Hours',
-                'Unknown': 'Unknown Time Slot'
-            }
-            
-            # Calculate C category (sum of C1, C2, C4, C5) using rounded values
-            c_categories = ['C1', 'C2', 'C4', 'C5']
-            c_total_rounded = 0
+            # Reuse the TOD-wise excess aggregated for the financial calculations; the excess-only
+            # table holds the same slots minus the zero-excess ones, so only empty categories drop out
+            tod_rounded = tod_excess_rounded
+            if excess_only:
+                tod_rounded = {category: excess for category, excess in tod_excess_rounded.items()
+                               if tod_excess.at[category, 'Total_Excess'] > 0}
             
-            for _, row in tod_excess_raw.iterrows():
-                category = row['TOD_Category']
-                excess_raw = row['Total_Excess']
-                excess_rounded = round_excess_breakdown(excess_raw)
-                
+            for category, excess_rounded in tod_rounded.items():
                 pdf.cell(20, 10, category, 1)
                 pdf.cell(50, 10, f"{excess_rounded}", 1)  # Show rounded values to match table
                 pdf.ln()
-                
-                # Add to C category total if applicable
-                if category in c_categories:
-                    c_total_rounded += excess_rounded
+            
+            # Calculate C category (sum of C1, C2, C4, C5) using rounded values
+            c_total_rounded = sum(tod_rounded.get(category, 0) for category in ('C1', 'C2', 'C4', 'C5'))
             
             # Add C category total (sum of rounded individual values)
             pdf.cell(20, 10, 'C', 1)
@@ -1291,13 +1351,9 @@ def index():
             pdf.cell(0, 10, 'Financial Calculations:', ln=True)
             pdf.set_font('Arial', '', 10)  # Consistent with table data font size
             
-            # Helper function for proper rounding (≥0.5 rounds up)
-            def round_kwh(value):
-                return int(value + 0.5) if value >= 0 else int(value - 0.5)
-            
             # Get IEX excess for cross subsidy surcharge calculation
             if 'IEX_Excess' in pdf_data.columns:
-                iex_excess_total_raw = pdf_data['IEX_Excess'].sum()
+                iex_excess_total_raw = column_totals['IEX_Excess']
             else:
                 iex_excess_total_raw = 0
             
@@ -1311,66 +1367,61 @@ def index():
             
             iex_excess_rounded = round_kwh(iex_excess_total_raw)
             
+            # Steps 1-9 are collected while computing and written with the step 10 lines in one block
+            financial_lines = []
+
             # Base rate calculation using rounded total excess
             base_rate = 7.25  # rupees per kWh
             base_amount = total_excess_rounded_fin * base_rate
-            pdf.cell(0, 8, f"1. Base Rate: Total Excess Energy ({total_excess_rounded_fin} kWh) x Rs.7.25 = Rs.{base_amount:.2f}", ln=True)
+            financial_lines.append(f"1. Base Rate: Total Excess Energy ({total_excess_rounded_fin} kWh) x Rs.7.25 = Rs.{base_amount:.2f}")
             
             # Additional charges for specific TOD categories using rounded values from breakdown
             # Calculate rounded C1+C2 and C5 totals from the rounded TOD breakdown
-            c1_c2_excess_rounded = 0
-            c5_excess_rounded = 0
-            
-            for _, row in tod_excess_raw.iterrows():
-                category = row['TOD_Category']
-                excess_raw = row['Total_Excess']
-                excess_rounded = round_excess_breakdown(excess_raw)
-                
-                if category in ['C1', 'C2']:
-                    c1_c2_excess_rounded += excess_rounded
-                elif category == 'C5':
-                    c5_excess_rounded += excess_rounded
+            c1_c2_excess_rounded = tod_rounded.get('C1', 0) + tod_rounded.get('C2', 0)
+            c5_excess_rounded = tod_rounded.get('C5', 0)
             
             c1_c2_additional = c1_c2_excess_rounded * 1.8125  # rupees per kWh
-            pdf.cell(0, 8, f"2. C1+C2 Additional: Excess in C1+C2 ({c1_c2_excess_rounded} kWh) x Rs.1.8125 = Rs.{c1_c2_additional:.2f}", ln=True)
+            financial_lines.append(f"2. C1+C2 Additional: Excess in C1+C2 ({c1_c2_excess_rounded} kWh) x Rs.1.8125 = Rs.{c1_c2_additional:.2f}")
             
             c5_additional = c5_excess_rounded * 0.3625  # rupees per kWh
-            pdf.cell(0, 8, f"3. C5 Additional: Excess in C5 ({c5_excess_rounded} kWh) x Rs.0.3625 = Rs.{c5_additional:.2f}", ln=True)
+            financial_lines.append(f"3. C5 Additional: Excess in C5 ({c5_excess_rounded} kWh) x Rs.0.3625 = Rs.{c5_additional:.2f}")
             
             # Calculate total amount
             total_amount = base_amount + c1_c2_additional + c5_additional
-            pdf.cell(0, 8, f"4. Total Amount: Rs.{base_amount:.2f} + Rs.{c1_c2_additional:.2f} + Rs.{c5_additional:.2f} = Rs.{total_amount:.2f}", ln=True)
+            financial_lines.append(f"4. Total Amount: Rs.{base_amount:.2f} + Rs.{c1_c2_additional:.2f} + Rs.{c5_additional:.2f} = Rs.{total_amount:.2f}")
             
             # Calculate E-Tax (5% of total amount)
             etax = total_amount * 0.05
-            pdf.cell(0, 8, f"5. E-Tax (5% of Total Amount): Rs.{total_amount:.2f} x 0.05 = Rs.{etax:.2f}", ln=True)
+            financial_lines.append(f"5. E-Tax (5% of Total Amount): Rs.{total_amount:.2f} x 0.05 = Rs.{etax:.2f}")
             
             # Calculate total amount with E-Tax
             total_with_etax = total_amount + etax
-            pdf.cell(0, 8, f"6. Total Amount with E-Tax: Rs.{total_amount:.2f} + Rs.{etax:.2f} = Rs.{total_with_etax:.2f}", ln=True)
+            financial_lines.append(f"6. Total Amount with E-Tax: Rs.{total_amount:.2f} + Rs.{etax:.2f} = Rs.{total_with_etax:.2f}")
             
             # Calculate negative factors using rounded values for consistency
             etax_on_iex = total_excess_rounded * 0.1  # Use rounded total from summary
-            pdf.cell(0, 8, f"7. E-Tax on IEX: Total Excess ({total_excess_rounded} kWh) x Rs.0.1 = Rs.{etax_on_iex:.2f}", ln=True)
+            financial_lines.append(f"7. E-Tax on IEX: Total Excess ({total_excess_rounded} kWh) x Rs.0.1 = Rs.{etax_on_iex:.2f}")
             
             cross_subsidy_surcharge = iex_excess_rounded * 1.92
-            pdf.cell(0, 8, f"8. Cross Subsidy Surcharge: IEX Excess ({iex_excess_rounded} kWh) x Rs.1.92 = Rs.{cross_subsidy_surcharge:.2f}", ln=True)
+            financial_lines.append(f"8. Cross Subsidy Surcharge: IEX Excess ({iex_excess_rounded} kWh) x Rs.1.92 = Rs.{cross_subsidy_surcharge:.2f}")
             
             wheeling_reference_kwh, wheeling_charges = compute_wheeling_components(
                 total_excess_rounded_fin,
                 t_and_d_loss,
             )
 
-            pdf.cell(0, 8, f"9. Wheeling Charges: Adj. Loss Component ({wheeling_reference_kwh:.2f} kWh) x Rs.{WHEELING_RATE_PER_KWH:.2f} = Rs.{wheeling_charges:.2f}", ln=True)
+            financial_lines.append(f"9. Wheeling Charges: Adj. Loss Component ({wheeling_reference_kwh:.2f} kWh) x Rs.{WHEELING_RATE_PER_KWH:.2f} = Rs.{wheeling_charges:.2f}")
 
             # Calculate final amount to be collected with detailed breakdown
             final_amount = total_with_etax - (etax_on_iex + cross_subsidy_surcharge + wheeling_charges)
 
             # Break down the calculation like wheeling charges
-            pdf.cell(0, 8, f"10a. Total Amount to be Collected - Step 1:", ln=True)
-            pdf.cell(0, 8, f"     Rs.{total_with_etax:.2f} - (Rs.{etax_on_iex:.2f} + Rs.{cross_subsidy_surcharge:.2f} + Rs.{wheeling_charges:.2f})", ln=True)
-            pdf.cell(0, 8, f"10b. Total Amount to be Collected - Step 2:", ln=True)
-            pdf.cell(0, 8, f"     Rs.{total_with_etax:.2f} - Rs.{etax_on_iex + cross_subsidy_surcharge + wheeling_charges:.2f} = Rs.{final_amount:.2f}", ln=True)
+            pdf.write_lines(8, financial_lines + [
+                f"10a. Total Amount to be Collected - Step 1:",
+                f"     Rs.{total_with_etax:.2f} - (Rs.{etax_on_iex:.2f} + Rs.{cross_subsidy_surcharge:.2f} + Rs.{wheeling_charges:.2f})",
+                f"10b. Total Amount to be Collected - Step 2:",
+                f"     Rs.{total_with_etax:.2f} - Rs.{etax_on_iex + cross_subsidy_surcharge + wheeling_charges:.2f} = Rs.{final_amount:.2f}",
+            ])
 
             # Round up final amount to next highest value
             final_amount_rounded = math.ceil(final_amount)
@@ -1380,15 +1431,9 @@ def index():
 
             try:
                 print("DEBUG: Generating PDF output in generate_pdf function...")
-                pdf_output = io.BytesIO()
-                pdf_bytes = pdf.output(dest='S')
-                if isinstance(pdf_bytes, str):
-                    print("DEBUG: PDF bytes is a string, encoding to latin1")
-                    pdf_bytes = pdf_bytes.encode('latin1')
-                pdf_output.write(pdf_bytes)
-                pdf_output.seek(0)
+                pdf_bytes = pdf.output_bytes()
                 print("DEBUG: PDF generation successful")
-                return pdf_output
+                return pdf_bytes
             except UnicodeEncodeError as e:
                 print(f"ERROR: Unicode encoding error in generate_pdf: {e}")
                 # Find the problematic character
@@ -1430,39 +1475,9 @@ def index():
             from datetime import datetime, timedelta
             import pandas as pd
             
-            pdf = AuthorPDF()
-            pdf.set_margins(20, 20, 20)  # Set proper margins: left, top, right (20mm each)
-            pdf.set_auto_page_break(auto=True, margin=20)  # Auto page break with bottom margin
-            pdf.add_page()
-            
             # FIRST PAGE - DESCRIPTION AND INFORMATION ONLY
-            pdf.set_font('Arial', 'B', 16)  # Larger title font
-            pdf.cell(0, 15, 'Energy Adjustment Day-wise Summary Report', ln=True, align='C')
-            pdf.ln(10)
-            
-            # Consumer Information Section
-            pdf.set_font('Arial', 'B', 14)
-            pdf.cell(0, 10, 'Consumer Information:', ln=True)
-            pdf.set_font('Arial', '', 12)
-            pdf.cell(0, 8, f'Consumer Number: {consumer_number}', ln=True)
-            pdf.cell(0, 8, f'Consumer Name: {consumer_name}', ln=True)
-            pdf.cell(0, 8, f'Multiplication Factor (Consumed Energy): {multiplication_factor}', ln=True)
-            pdf.ln(5)
-            
-            # Technical Parameters Section
-            pdf.set_font('Arial', 'B', 14)
-            pdf.cell(0, 10, 'Technical Parameters:', ln=True)
-            pdf.set_font('Arial', '', 12)
-            
-            # Display T&D losses based on what sources are used
-            if enable_iex and enable_cpp:
-                pdf.cell(0, 8, f'I.E.X T&D Loss (%): {t_and_d_loss}', ln=True)
-                pdf.cell(0, 8, f'C.P.P T&D Loss (%): {cpp_t_and_d_loss}', ln=True)
-            elif enable_iex:
-                pdf.cell(0, 8, f'I.E.X T&D Loss (%): {t_and_d_loss}', ln=True)
-            elif enable_cpp:
-                pdf.cell(0, 8, f'C.P.P T&D Loss (%): {cpp_t_and_d_loss}', ln=True)
-            pdf.ln(5)
+            pdf = ReportPDF(report_meta)
+            pdf.add_cover('Energy Adjustment Day-wise Summary Report', enable_iex, enable_cpp)
             
             # Report Information Section
             pdf.set_font('Arial', 'B', 14)
@@ -1509,6 +1524,7 @@ def index():
             pdf.ln()
             pdf.set_font('Arial', '', 8)  # Reduced font size for day-wise table content
             # Determine full date range for the selected month
+            slot_days = pdf_data['Slot_DT'].dt.normalize()
             if month and year:
                 try:
                     month_int = int(float(month))
@@ -1535,25 +1551,24 @@ def index():
             else:
                 # Fallback: use min/max date in data
 
-                all_dates = pd.to_datetime(pdf_data['Slot_Date'], dayfirst=True, errors='coerce')
-                start_date = all_dates.min()
-                end_date = all_dates.max() + timedelta(days=1)
+                start_date = slot_days.min()
+                end_date = slot_days.max() + timedelta(days=1)
             all_days = pd.date_range(start=start_date, end=end_date - timedelta(days=1), freq='D')
-            daywise = pdf_data.groupby('Slot_Date').agg({
+            # pdf_data is already in slot order, so grouping by day can skip the key sort
+            daywise = pdf_data.groupby(slot_days, sort=False).agg({
                 'After_Loss': 'sum',
                 'Energy_kWh_cons': 'sum',
                 'Total_Excess': 'sum'
             })
-            daywise = daywise.reindex(all_days.strftime('%d/%m/%Y'), fill_value=0).reset_index()
-            daywise = daywise.rename(columns={'index': 'Slot_Date'})
-            for idx, row in daywise.iterrows():
-                pdf.cell(40, 10, row['Slot_Date'], 1)
-                pdf.cell(50, 10, f"{row['After_Loss']:.4f}", 1)
-                pdf.cell(50, 10, f"{row['Energy_kWh_cons']:.4f}", 1)
-                # Round excess values for display using proper rounding (≥0.5 rounds up)
-                total_excess_rounded = int(row['Total_Excess'] + 0.5) if row['Total_Excess'] >= 0 else int(row['Total_Excess'] - 0.5)
-                pdf.cell(50, 10, f"{total_excess_rounded}", 1)
-                pdf.ln()
+            daywise = daywise.reindex(all_days, fill_value=0)
+            write_row = pdf.row_writer((40, 50, 50, 50), 10, align='')
+            for texts in zip(
+                    daywise.index.strftime('%d/%m/%Y'),
+                    np.char.mod('%.4f', daywise['After_Loss'].to_numpy(dtype=float)),
+                    np.char.mod('%.4f', daywise['Energy_kWh_cons'].to_numpy(dtype=float)),
+                    # Excess values are rounded for display using proper rounding (≥0.5 rounds up)
+                    np.char.mod('%d', round_kwh(daywise['Total_Excess'].to_numpy(dtype=float)))):
+                write_row(texts)
             pdf.ln(2)
             
             # Skip detailed slot-wise data for day-wise PDF - go directly to summaries
@@ -1564,15 +1579,12 @@ def index():
             pdf.set_font('Arial', '', 11)  # Standardized font size to match regular PDF
             
             # Add calculation summary at the end using rounded values to match table display
-            sum_injection = pdf_data['Energy_kWh_gen'].sum() if 'Energy_kWh_gen' in pdf_data.columns else 0
-            total_generated_after_loss = pdf_data['After_Loss'].sum() if 'After_Loss' in pdf_data.columns else 0
+            column_totals = pdf_data.sum(numeric_only=True)
+            sum_injection = column_totals.get('Energy_kWh_gen', 0)
+            total_generated_after_loss = column_totals.get('After_Loss', 0)
             comparison = sum_injection - total_generated_after_loss
-            total_consumed = pdf_data['Energy_kWh_cons'].sum() if 'Energy_kWh_cons' in pdf_data.columns else 0
-            total_excess = pdf_data['Total_Excess'].sum() if 'Total_Excess' in pdf_data.columns else 0
-            
-            # Helper function for proper rounding to match table values
-            def round_kwh_daywise_summary(value):
-                return int(value + 0.5) if value >= 0 else int(value - 0.5)
+            total_consumed = column_totals.get('Energy_kWh_cons', 0)
+            total_excess = column_totals.get('Total_Excess', 0)
             
             # Determine if this is multi-source (IEX + CPP) or single source
             is_multi_source = generated_files and cpp_files
@@ -1589,25 +1601,27 @@ def index():
                     total_cpp_excess_raw = full_totals.get('cpp_excess', 0)
                 else:
                     # Calculate from pdf_data but round to match table display
-                    total_iex_before_loss_raw = pdf_data['IEX_Energy_kWh'].sum() if 'IEX_Energy_kWh' in pdf_data.columns else 0
-                    total_cpp_before_loss_raw = pdf_data['CPP_Energy_kWh'].sum() if 'CPP_Energy_kWh' in pdf_data.columns else 0
-                    total_iex_after_loss_raw = pdf_data['IEX_After_Loss'].sum() if 'IEX_After_Loss' in pdf_data.columns else 0
-                    total_cpp_after_loss_raw = pdf_data['CPP_After_Loss'].sum() if 'CPP_After_Loss' in pdf_data.columns else 0
-                    total_iex_excess_raw = pdf_data['IEX_Excess'].sum() if 'IEX_Excess' in pdf_data.columns else 0
-                    total_cpp_excess_raw = pdf_data['CPP_Excess'].sum() if 'CPP_Excess' in pdf_data.columns else 0
+                    total_iex_before_loss_raw = column_totals.get('IEX_Energy_kWh', 0)
+                    total_cpp_before_loss_raw = column_totals.get('CPP_Energy_kWh', 0)
+                    total_iex_after_loss_raw = column_totals.get('IEX_After_Loss', 0)
+                    total_cpp_after_loss_raw = column_totals.get('CPP_After_Loss', 0)
+                    total_iex_excess_raw = column_totals.get('IEX_Excess', 0)
+                    total_cpp_excess_raw = column_totals.get('CPP_Excess', 0)
                 
-                # Round all values to match table display (this is what users see in the detailed table)
-                total_iex_before_loss_rounded = round_kwh_daywise_summary(total_iex_before_loss_raw)
-                total_iex_after_loss_rounded = round_kwh_daywise_summary(total_iex_after_loss_raw)
-                total_cpp_before_loss_rounded = round_kwh_daywise_summary(total_cpp_before_loss_raw)
-                total_cpp_after_loss_rounded = round_kwh_daywise_summary(total_cpp_after_loss_raw)
-                total_iex_excess_rounded = round_kwh_daywise_summary(total_iex_excess_raw)
-                total_cpp_excess_rounded = round_kwh_daywise_summary(total_cpp_excess_raw)
+                # Round all values to match table display (this is what users see in the detailed table),
+                # in one vectorised pass
+                (total_iex_before_loss_rounded, total_iex_after_loss_rounded,
+                 total_cpp_before_loss_rounded, total_cpp_after_loss_rounded,
+                 total_iex_excess_rounded, total_cpp_excess_rounded,
+                 iex_adjustment_rounded, cpp_adjustment_rounded) = round_kwh([
+                    total_iex_before_loss_raw, total_iex_after_loss_raw,
+                    total_cpp_before_loss_raw, total_cpp_after_loss_raw,
+                    total_iex_excess_raw, total_cpp_excess_raw,
+                    total_iex_after_loss_raw - total_iex_excess_raw,
+                    total_cpp_after_loss_raw - total_cpp_excess_raw,
+                ]).tolist()
                 total_excess_rounded = total_iex_excess_rounded + total_cpp_excess_rounded
                 
-                iex_adjustment_rounded = round_kwh_daywise_summary(total_iex_after_loss_raw - total_iex_excess_raw)
-                cpp_adjustment_rounded = round_kwh_daywise_summary(total_cpp_after_loss_raw - total_cpp_excess_raw)
-                
                 pdf.cell(0, 8, f'I.E.X Generation (before T&D loss): {total_iex_before_loss_rounded} kWh', ln=True)
                 pdf.cell(0, 8, f'I.E.X Generation (after {t_and_d_loss}% T&D loss): {total_iex_after_loss_rounded} kWh', ln=True)
                 pdf.cell(0, 8, f'I.E.X Adjustment with Consumption: {iex_adjustment_rounded} kWh', ln=True)
@@ -1616,8 +1630,8 @@ def index():
                 
                 pdf.cell(0, 8, f'C.P.P Generation (before T&D loss): {total_cpp_before_loss_rounded} kWh', ln=True)
                 pdf.cell(0, 8, f'C.P.P Generation (after {cpp_t_and_d_loss}% T&D loss): {total_cpp_after_loss_rounded} kWh', ln=True)
-                remaining_consumption_total_raw = pdf_data['Remaining_Consumption'].sum() if 'Remaining_Consumption' in pdf_data.columns else 0
-                remaining_consumption_total_rounded = round_kwh_daywise_summary(remaining_consumption_total_raw)
+                remaining_consumption_total_raw = column_totals.get('Remaining_Consumption', 0)
+                remaining_consumption_total_rounded = round_kwh(remaining_consumption_total_raw)
                 pdf.cell(0, 8, f'Remaining Consumption (after I.E.X adjustment): {remaining_consumption_total_rounded} kWh', ln=True)
                 pdf.cell(0, 8, f'C.P.P Adjustment with Remaining Consumption: {cpp_adjustment_rounded} kWh', ln=True)
                 pdf.cell(0, 8, f'C.P.P Excess Energy (rounded): {total_cpp_excess_rounded} kWh', ln=True)
@@ -1626,10 +1640,10 @@ def index():
                 pdf.set_font('Arial', 'B', 11)
                 pdf.cell(0, 8, f'TOTAL CALCULATIONS:', ln=True)
                 pdf.set_font('Arial', '', 11)
-                total_generation_before_rounded = round_kwh_daywise_summary(total_iex_before_loss_raw + total_cpp_before_loss_raw)
-                total_generation_after_rounded = round_kwh_daywise_summary(total_iex_after_loss_raw + total_cpp_after_loss_raw)
-                total_consumed_rounded = round_kwh_daywise_summary(total_consumed)
-                comparison_rounded = round_kwh_daywise_summary((total_iex_before_loss_raw + total_cpp_before_loss_raw) - (total_iex_after_loss_raw + total_cpp_after_loss_raw))
+                total_generation_before_rounded = round_kwh(total_iex_before_loss_raw + total_cpp_before_loss_raw)
+                total_generation_after_rounded = round_kwh(total_iex_after_loss_raw + total_cpp_after_loss_raw)
+                total_consumed_rounded = round_kwh(total_consumed)
+                comparison_rounded = round_kwh((total_iex_before_loss_raw + total_cpp_before_loss_raw) - (total_iex_after_loss_raw + total_cpp_after_loss_raw))
                 
                 pdf.cell(0, 8, f'Total Generation (before loss): {total_generation_before_rounded} kWh', ln=True)
                 pdf.cell(0, 8, f'Total Generation (after loss): {total_generation_after_rounded} kWh', ln=True)
@@ -1639,18 +1653,18 @@ def index():
             else:
                 # Standard summary for single source - use rounded totals to match table
                 total_excess_raw = total_excess
-                total_excess_rounded = round_kwh_daywise_summary(total_excess_raw)
+                total_excess_rounded = round_kwh(total_excess_raw)
                 
                 if enable_iex:
                     if full_totals:
                         total_iex_before_loss_raw = full_totals.get('iex_before', 0)
                         total_iex_after_loss_raw = full_totals.get('iex_after', 0)
                     else:
-                        total_iex_before_loss_raw = pdf_data['IEX_Energy_kWh'].sum() if 'IEX_Energy_kWh' in pdf_data.columns else 0
-                        total_iex_after_loss_raw = pdf_data['IEX_After_Loss'].sum() if 'IEX_After_Loss' in pdf_data.columns else 0
+                        total_iex_before_loss_raw = column_totals.get('IEX_Energy_kWh', 0)
+                        total_iex_after_loss_raw = column_totals.get('IEX_After_Loss', 0)
                     
-                    total_iex_before_loss_rounded = round_kwh_daywise_summary(total_iex_before_loss_raw)
-                    total_iex_after_loss_rounded = round_kwh_daywise_summary(total_iex_after_loss_raw)
+                    total_iex_before_loss_rounded = round_kwh(total_iex_before_loss_raw)
+                    total_iex_after_loss_rounded = round_kwh(total_iex_after_loss_raw)
                     pdf.cell(0, 8, f'I.E.X Generation (before T&D loss): {total_iex_before_loss_rounded} kWh', ln=True)
                     pdf.cell(0, 8, f'I.E.X Generation (after {t_and_d_loss}% T&D loss): {total_iex_after_loss_rounded} kWh', ln=True)
                 
@@ -1659,15 +1673,15 @@ def index():
                         total_cpp_before_loss_raw = full_totals.get('cpp_before', 0)
                         total_cpp_after_loss_raw = full_totals.get('cpp_after', 0)
                     else:
-                        total_cpp_before_loss_raw = pdf_data['CPP_Energy_kWh'].sum() if 'CPP_Energy_kWh' in pdf_data.columns else 0
-                        total_cpp_after_loss_raw = pdf_data['CPP_After_Loss'].sum() if 'CPP_After_Loss' in pdf_data.columns else 0
+                        total_cpp_before_loss_raw = column_totals.get('CPP_Energy_kWh', 0)
+                        total_cpp_after_loss_raw = column_totals.get('CPP_After_Loss', 0)
                     
-                    total_cpp_before_loss_rounded = round_kwh_daywise_summary(total_cpp_before_loss_raw)
-                    total_cpp_after_loss_rounded = round_kwh_daywise_summary(total_cpp_after_loss_raw)
+                    total_cpp_before_loss_rounded = round_kwh(total_cpp_before_loss_raw)
+                    total_cpp_after_loss_rounded = round_kwh(total_cpp_after_loss_raw)
                     pdf.cell(0, 8, f'C.P.P Generation (before T&D loss): {total_cpp_before_loss_rounded} kWh', ln=True)
                     pdf.cell(0, 8, f'C.P.P Generation (after {cpp_t_and_d_loss}% T&D loss): {total_cpp_after_loss_rounded} kWh', ln=True)
                 
-                total_consumed_rounded = round_kwh_daywise_summary(total_consumed)
+                total_consumed_rounded = round_kwh(total_consumed)
                 pdf.cell(0, 8, f'Total Consumed Energy (after multiplication): {total_consumed_rounded} kWh', ln=True)
                 pdf.cell(0, 8, f'Total Excess Energy (rounded): {total_excess_rounded} kWh', ln=True)
             
@@ -1690,38 +1704,15 @@ def index():
             pdf.ln()
             pdf.set_font('Arial', '', 10)  # Consistent with table data font size
             
-            # Get TOD-wise excess from the dataframe using rounded values to match table display
-            tod_excess = pdf_data.groupby('TOD_Category')['Total_Excess'].sum().reset_index()
-            
-            # Apply rounding to match table values (what users see in the detailed table)
-            def round_excess_daywise(value):
-                return int(value + 0.5) if value >= 0 else int(value - 0.5)
-            
             # Define TOD category order with C at the top as requested
             tod_order = ['C', 'C1', 'C2', 'C4', 'C5', 'Unknown']
-            tod_descriptions = {
-                'C1': 'Morning Peak',
-                'C2': 'Evening Peak',
-                'C4': 'Normal Hours',
-                'C5': 'Night Hours',
-                'Unknown': 'Unknown Time Slot'
-            }
             
             # Calculate C category (sum of C1, C2, C4, C5) using rounded values
             c_categories = ['C1', 'C2', 'C4', 'C5']
-            c_total_rounded_daywise = 0
-            
-            # Store individual category values for ordered display
-            tod_values = {}
-            for _, row in tod_excess.iterrows():
-                category = row['TOD_Category']
-                excess_raw = row['Total_Excess']
-                excess_rounded = round_excess_daywise(excess_raw)
-                tod_values[category] = excess_rounded
-                
-                # Add to C category total if applicable
-                if category in c_categories:
-                    c_total_rounded_daywise += excess_rounded
+            
+            # The day-wise report covers every slot, so the rounded TOD figures from the financial pass apply as is
+            tod_values = tod_excess_rounded
+            c_total_rounded_daywise = sum(tod_values.get(category, 0) for category in c_categories)
             
             # Display TOD breakdown in proper order with C at the top
             pdf.cell(20, 10, 'C', 1)
@@ -1747,24 +1738,23 @@ def index():
             pdf.cell(0, 10, 'Financial Calculations:', ln=True)
             pdf.set_font('Arial', '', 10)  # Consistent with table data font size
             
-            # Helper function for proper rounding (≥0.5 rounds up)
-            def round_kwh_daywise(value):
-                return int(value + 0.5) if value >= 0 else int(value - 0.5)
-            
             # Get IEX excess for cross subsidy surcharge calculation
             if 'IEX_Excess' in pdf_data.columns:
-                iex_excess_total_raw = pdf_data['IEX_Excess'].sum()
+                iex_excess_total_raw = column_totals['IEX_Excess']
             else:
                 iex_excess_total_raw = 0
             
             # Use rounded values for financial calculations to match table display
-            total_excess_rounded_daywise = round_kwh_daywise(total_excess)
-            iex_excess_rounded = round_kwh_daywise(iex_excess_total_raw)
+            total_excess_rounded_daywise = round_kwh(total_excess)
+            iex_excess_rounded = round_kwh(iex_excess_total_raw)
             
+            # Steps 1-9 are collected while computing and written with the step 10 lines in one block
+            financial_lines = []
+
             # Base rate calculation using rounded total excess
             base_rate = 7.25  # rupees per kWh
             base_amount = total_excess_rounded_daywise * base_rate
-            pdf.cell(0, 8, f"1. Base Rate: Total Excess Energy ({total_excess_rounded_daywise} kWh) x Rs.7.25 = Rs.{base_amount:.2f}", ln=True)
+            financial_lines.append(f"1. Base Rate: Total Excess Energy ({total_excess_rounded_daywise} kWh) x Rs.7.25 = Rs.{base_amount:.2f}")
             
             # Additional charges for specific TOD categories using rounded values from breakdown
             # Calculate rounded C1+C2 and C5 totals from the rounded TOD breakdown
@@ -1772,45 +1762,47 @@ def index():
             c5_excess_rounded_daywise = tod_values.get('C5', 0)
             
             c1_c2_additional = c1_c2_excess_rounded_daywise * 1.8125  # rupees per kWh
-            pdf.cell(0, 8, f"2. C1+C2 Additional: Excess in C1+C2 ({c1_c2_excess_rounded_daywise} kWh) x Rs.1.8125 = Rs.{c1_c2_additional:.2f}", ln=True)
+            financial_lines.append(f"2. C1+C2 Additional: Excess in C1+C2 ({c1_c2_excess_rounded_daywise} kWh) x Rs.1.8125 = Rs.{c1_c2_additional:.2f}")
             
             c5_additional = c5_excess_rounded_daywise * 0.3625  # rupees per kWh
-            pdf.cell(0, 8, f"3. C5 Additional: Excess in C5 ({c5_excess_rounded_daywise} kWh) x Rs.0.3625 = Rs.{c5_additional:.2f}", ln=True)
+            financial_lines.append(f"3. C5 Additional: Excess in C5 ({c5_excess_rounded_daywise} kWh) x Rs.0.3625 = Rs.{c5_additional:.2f}")
             
             # Calculate partial amount for base rates and additional charges
             partial_amount = base_amount + c1_c2_additional + c5_additional
-            pdf.cell(0, 8, f"4. Partial Total: Rs.{base_amount:.2f} + Rs.{c1_c2_additional:.2f} + Rs.{c5_additional:.2f} = Rs.{partial_amount:.2f}", ln=True)
+            financial_lines.append(f"4. Partial Total: Rs.{base_amount:.2f} + Rs.{c1_c2_additional:.2f} + Rs.{c5_additional:.2f} = Rs.{partial_amount:.2f}")
             
             # Calculate E-Tax (5% of partial amount)
             etax = partial_amount * 0.05
-            pdf.cell(0, 8, f"5. E-Tax (5% of Partial Total): Rs.{partial_amount:.2f} x 0.05 = Rs.{etax:.2f}", ln=True)
+            financial_lines.append(f"5. E-Tax (5% of Partial Total): Rs.{partial_amount:.2f} x 0.05 = Rs.{etax:.2f}")
             
             # Calculate subtotal with E-Tax
             subtotal_with_etax = partial_amount + etax
-            pdf.cell(0, 8, f"6. Subtotal with E-Tax: Rs.{partial_amount:.2f} + Rs.{etax:.2f} = Rs.{subtotal_with_etax:.2f}", ln=True)
+            financial_lines.append(f"6. Subtotal with E-Tax: Rs.{partial_amount:.2f} + Rs.{etax:.2f} = Rs.{subtotal_with_etax:.2f}")
             
             # Calculate negative factors (deductions)
             etax_on_iex = total_excess_rounded_daywise * 0.1  # Use rounded value for consistency
-            pdf.cell(0, 8, f"7. E-Tax on IEX (Deduction): Total Excess ({total_excess_rounded_daywise} kWh) x Rs.0.1 = Rs.{etax_on_iex:.2f}", ln=True)
+            financial_lines.append(f"7. E-Tax on IEX (Deduction): Total Excess ({total_excess_rounded_daywise} kWh) x Rs.0.1 = Rs.{etax_on_iex:.2f}")
             
             cross_subsidy_surcharge = iex_excess_rounded * 1.92
-            pdf.cell(0, 8, f"8. Cross Subsidy Surcharge (Deduction): IEX Excess ({iex_excess_rounded} kWh) x Rs.1.92 = Rs.{cross_subsidy_surcharge:.2f}", ln=True)
+            financial_lines.append(f"8. Cross Subsidy Surcharge (Deduction): IEX Excess ({iex_excess_rounded} kWh) x Rs.1.92 = Rs.{cross_subsidy_surcharge:.2f}")
             
             wheeling_reference_kwh, wheeling_charges = compute_wheeling_components(
                 total_excess_rounded_daywise,
                 t_and_d_loss,
             )
 
-            pdf.cell(0, 8, f"9. Wheeling Charges: Adj. Loss Component ({wheeling_reference_kwh:.2f} kWh) x Rs.{WHEELING_RATE_PER_KWH:.2f} = Rs.{wheeling_charges:.2f}", ln=True)
+            financial_lines.append(f"9. Wheeling Charges: Adj. Loss Component ({wheeling_reference_kwh:.2f} kWh) x Rs.{WHEELING_RATE_PER_KWH:.2f} = Rs.{wheeling_charges:.2f}")
 
             # Calculate final amount to be collected with detailed breakdown
             final_amount = subtotal_with_etax - (etax_on_iex + cross_subsidy_surcharge + wheeling_charges)
 
             # Break down the calculation like in regular PDF
-            pdf.cell(0, 8, f"10a. Total Amount to be Collected - Step 1:", ln=True)
-            pdf.cell(0, 8, f"     Rs.{subtotal_with_etax:.2f} - (Rs.{etax_on_iex:.2f} + Rs.{cross_subsidy_surcharge:.2f} + Rs.{wheeling_charges:.2f})", ln=True)
-            pdf.cell(0, 8, f"10b. Total Amount to be Collected - Step 2:", ln=True)
-            pdf.cell(0, 8, f"     Rs.{subtotal_with_etax:.2f} - Rs.{etax_on_iex + cross_subsidy_surcharge + wheeling_charges:.2f} = Rs.{final_amount:.2f}", ln=True)
+            pdf.write_lines(8, financial_lines + [
+                f"10a. Total Amount to be Collected - Step 1:",
+                f"     Rs.{subtotal_with_etax:.2f} - (Rs.{etax_on_iex:.2f} + Rs.{cross_subsidy_surcharge:.2f} + Rs.{wheeling_charges:.2f})",
+                f"10b. Total Amount to be Collected - Step 2:",
+                f"     Rs.{subtotal_with_etax:.2f} - Rs.{etax_on_iex + cross_subsidy_surcharge + wheeling_charges:.2f} = Rs.{final_amount:.2f}",
+            ])
 
             # Round up final amount to next highest value
             final_amount_rounded = math.ceil(final_amount)
@@ -1820,15 +1812,9 @@ def index():
 
             try:
                 print("DEBUG: Generating PDF output in generate_daywise_pdf function...")
-                pdf_output = io.BytesIO()
-                pdf_bytes = pdf.output(dest='S')
-                if isinstance(pdf_bytes, str):
-                    print("DEBUG: PDF bytes is a string, encoding to latin1")
-                    pdf_bytes = pdf_bytes.encode('latin1')
-                pdf_output.write(pdf_bytes)
-                pdf_output.seek(0)
+                pdf_bytes = pdf.output_bytes()
                 print("DEBUG: PDF generation successful")
-                return pdf_output
+                return pdf_bytes
             except UnicodeEncodeError as e:
                 print(f"ERROR: Unicode encoding error in generate_daywise_pdf: {e}")
                 # Find the problematic character
@@ -1889,12 +1875,12 @@ def index():
         
         # Prepare full totals for PDF generation (always use totals from all data, not just excess)
         full_totals = {
-            'iex_before': merged['IEX_Energy_kWh'].sum(),
-            'cpp_before': merged['CPP_Energy_kWh'].sum(),
-            'iex_after': merged['IEX_After_Loss'].sum(),
-            'cpp_after': merged['CPP_After_Loss'].sum(),
-            'iex_excess': merged['IEX_Excess'].sum(),
-            'cpp_excess': merged['CPP_Excess'].sum()
+            'iex_before': merged_totals['IEX_Energy_kWh'],
+            'cpp_before': merged_totals['CPP_Energy_kWh'],
+            'iex_after': merged_totals['IEX_After_Loss'],
+            'cpp_after': merged_totals['CPP_After_Loss'],
+            'iex_excess': merged_totals['IEX_Excess'],
+            'cpp_excess': merged_totals['CPP_Excess']
         }
         
         import traceback
@@ -1903,7 +1889,7 @@ def index():
                 print('DEBUG: Generating excess only PDF...')
                 custom_filename = generate_custom_filename('energy_adjustment_excess_only.pdf', consumer_number, consumer_name, month, year)
                 pdf_obj = generate_pdf(
-                    merged_excess, sum_injection_excess, total_generated_after_loss_excess, comparison_excess, total_consumed_excess, total_excess_excess, excess_status, custom_filename, full_totals=full_totals)
+                    merged_excess, sum_injection_excess, total_generated_after_loss_excess, comparison_excess, total_consumed_excess, total_excess_excess, excess_status, custom_filename, full_totals=full_totals, excess_only=True)
                 print('DEBUG: generate_pdf (excess only) returned:', type(pdf_obj))
                 if pdf_obj is not None:
                     pdfs.append((custom_filename, pdf_obj))
@@ -1948,15 +1934,17 @@ def index():
                 clean_name = clean_name.replace(' ', '_')
                 zip_filename = f"{last_3_digits}_{clean_name}_energy_adjustment_reports.zip"
                 
-                with zipfile.ZipFile(zip_buffer, 'w') as zf:
-                    for fname, pdf_io in pdfs:
-                        zf.writestr(fname, pdf_io.getvalue())
+                # PDF content streams are already deflated, so the fastest level is enough
+                with zipfile.ZipFile(zip_buffer, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+                    for fname, pdf_bytes in pdfs:
+                        zf.writestr(fname, pdf_bytes)
                 zip_buffer.seek(0)
                 return send_file(zip_buffer, as_attachment=True, download_name=zip_filename, mimetype='application/zip')
             elif len(pdfs) == 1:
-                fname, pdf_io = pdfs[0]
+                fname, pdf_bytes = pdfs[0]
                 print(f'DEBUG: Returning PDF file to client: {fname}')
-                return send_file(pdf_io, as_attachment=True, download_name=fname, mimetype='application/pdf')
+                # BytesIO over an existing bytes object shares its buffer, so this does not copy
+                return send_file(io.BytesIO(pdf_bytes), as_attachment=True, download_name=fname, mimetype='application/pdf')
             else:
                 print('DEBUG: No PDF generated, returning error page')
                 return render_template('index.html', error="Please select at least one PDF output option.")
@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import io
 import os
 import math
@@ -7,7 +8,9 @@ import json
 import calendar
 import hashlib
 import zipfile
-from fpdf import FPDF
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from fpdf import FPDF, FPDF_VERSION
 from datetime import datetime, timedelta, date
 from pathlib import Path
 from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
@@ -16,23 +19,108 @@ import sys
 
 from typing import Any, Callable
 
+try:
+    import python_calamine  # noqa: F401  (Rust XLSX reader used by pandas' 'calamine' engine)
+    EXCEL_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_ENGINE = 'openpyxl'
+
 
 PDF_AUTHOR_NAME = "Er.Aravind MRT VREDC"
 
 
-def _robust_to_datetime(series):
-    """Try parsing a Series of dates flexibly: first day-first, then month-first.
-    Returns a pd.Series of datetimes (may contain NaT where parsing fails).
+def _slot_time_labels(times):
+    """Turn slot start times into 'HH:MM - HH:MM' labels, leaving ranges and unparseable values as-is."""
+    t = times.astype(str).str.strip()
+    # Every day repeats the same slot times, so label the distinct values and spread them back
+    codes, uniques = pd.factorize(t)
+    t = pd.Series(uniques, dtype=t.dtype)
+    has_range = t.str.contains('-', regex=False)
+    start = pd.to_datetime(t.where(~has_range), format='%H:%M', errors='coerce')
+    end = start + pd.Timedelta(minutes=15)
+    labels = start.dt.strftime('%H:%M') + ' - ' + end.dt.strftime('%H:%M')
+    labels = t.where(has_range | start.isna(), labels).replace({'23:45 - 24:00': '23:45 - 00:00'})
+    return pd.Series(labels.array.take(codes, allow_fill=True), index=times.index)
+
+def _parse_upload_dates(values):
+    """Parse an uploaded Date column day-first; columns Excel already typed as dates skip the string round-trip."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    if not pd.api.types.is_string_dtype(values):
+        values = values.astype(str)
+    # A month of 15-minute slots repeats each date string ~96 times: parse the distinct ones once
+    codes, uniques = pd.factorize(values.str.strip())
+    parsed = pd.DatetimeIndex(pd.to_datetime(uniques, errors='coerce', dayfirst=True))
+    return pd.Series(parsed.take(codes, allow_fill=True), index=values.index)
+
+
+def _slot_start_parts(slot_times):
+    """Return (hour, minute) Series for each slot's start time; NaN where it cannot be parsed.
+
+    Labels shaped 'HH:MM' or 'HH:MM - ...' are decoded straight from their character codes;
+    anything else falls back to the regex on just those rows.
     """
-    try:
-        parsed = pd.to_datetime(series, errors='coerce', dayfirst=True)
-        if parsed.notna().any():
-            return parsed
-        # Fallback: try without dayfirst
-        parsed = pd.to_datetime(series, errors='coerce', dayfirst=False)
-        return parsed
-    except Exception:
-        return pd.to_datetime(series, errors='coerce')
+    text = slot_times.astype(str)
+    codes = np.asarray(text.to_numpy(), dtype='U7').view(np.uint32).reshape(-1, 7)
+    digits = codes[:, [0, 1, 3, 4]] - ord('0')
+    fast = ((digits < 10).all(axis=1) & (codes[:, 2] == ord(':'))
+            & ((codes[:, 5] == 0) | ((codes[:, 5] == ord(' ')) & (codes[:, 6] == ord('-')))))
+    hours = np.where(fast, digits[:, 0] * 10 + digits[:, 1], np.nan)
+    minutes = np.where(fast, digits[:, 2] * 10 + digits[:, 3], np.nan)
+    if not fast.all():
+        slow = ~fast
+        start = text[slow].str.split('-', n=1).str[0].str.strip()
+        parts = start.str.extract(r'^(\d+):(\d+)$').astype(float)
+        hours[slow] = parts[0].to_numpy()
+        minutes[slow] = parts[1].to_numpy()
+    return pd.Series(hours, index=slot_times.index), pd.Series(minutes, index=slot_times.index)
+
+
+TOD_CATEGORIES = ['C1', 'C2', 'C4', 'C5', 'Unknown']
+
+
+def _classify_tod(hours):
+    """Map slot start hours to categorical TOD labels (C1/C2/C4/C5, 'Unknown' when the hour is missing)."""
+    h = hours.to_numpy(dtype=float)
+    conditions = [
+        (h >= 6) & (h < 10),                      # Morning peak: 6:00 AM - 10:00 AM (C1)
+        (h >= 18) & (h < 22),                     # Evening peak: 6:00 PM - 10:00 PM (C2)
+        ((h >= 5) & (h < 6)) | ((h >= 10) & (h < 18)),  # Normal hours: 5-6 AM + 10 AM-6 PM (C4)
+        (h >= 22) | (h < 5),                      # Night hours: 22:00 PM to 5:00 AM (C5)
+    ]
+    labels = np.select(conditions, TOD_CATEGORIES[:4], default='Unknown')
+    return pd.Series(pd.Categorical(labels, categories=TOD_CATEGORIES), index=hours.index)
+
+def _tod_sums(frame, columns):
+    """Sum columns per TOD category present in frame with one np.bincount pass over the TOD_Category codes."""
+    codes = frame['TOD_Category'].cat.codes.to_numpy()
+    present = np.bincount(codes, minlength=len(TOD_CATEGORIES)) > 0
+    return pd.DataFrame(
+        {col: np.bincount(codes, weights=frame[col].to_numpy(dtype=float), minlength=len(TOD_CATEGORIES))[present]
+         for col in columns},
+        index=pd.Index(TOD_CATEGORIES)[present],
+    )
+
+def _round_kwh(values):
+    """Round kWh values half-up (away from zero) to an int64 array, matching int(value ± 0.5)."""
+    v = np.asarray(values, dtype=float)
+    return np.trunc(np.where(v >= 0, v + 0.5, v - 0.5)).astype(np.int64)
+
+def _format_rounded_kwh(values):
+    """Format kWh values as half-up (away from zero) rounded integers, matching int(value ± 0.5)."""
+    return np.char.mod('%d', _round_kwh(values))
+
+# Missing_Info text for every combination of missing sources, coded as iex | cpp << 1 | cons << 2
+MISSING_INFO_LABELS = np.array([
+    ('[Missing in I.E.X] ' if code & 1 else '') + ('[Missing in C.P.P] ' if code & 2 else '')
+    + ('[Missing in CONSUMED] ' if code & 4 else '')
+    for code in range(8)
+], dtype=object)
+
+def _missing_info(missing_iex, missing_cpp, missing_cons):
+    """Label each slot with the sources it is missing from, as a Categorical over MISSING_INFO_LABELS."""
+    codes = missing_iex.astype(np.int8) | (missing_cpp.astype(np.int8) << 1) | (missing_cons.astype(np.int8) << 2)
+    return pd.Categorical.from_codes(codes, MISSING_INFO_LABELS)
 
 # Additional Surcharge configuration (rates vary by regulatory period)
 ADDITIONAL_SURCHARGE_WINDOWS = [
@@ -63,6 +151,18 @@ ADDITIONAL_SURCHARGE_WINDOWS = [
 ]
 
 
+MONTH_NAMES = ('January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December')
+
+
+def get_month_name(month_num):
+    """Convert a month number to its name, echoing the input when it is not a month number."""
+    try:
+        return MONTH_NAMES[int(month_num) - 1]
+    except (ValueError, IndexError):
+        return str(month_num)
+
+
 def _get_month_period_bounds(month_value, year_value):
     """Return (month_start, month_end, label) for given month/year strings."""
     if not month_value or not year_value:
@@ -167,11 +267,11 @@ def _round_kwh_half_up(value):
         value = float(value)
     except Exception:
         value = 0.0
-    return int(value + 0.5) if value >= 0 else int(value - 0.5)
+    return int(_round_kwh(value if np.isfinite(value) else 0.0))
 
 
-def compute_wheeling_components(total_excess_kwh, t_and_d_loss_percent):
-    """Return wheeling helper values per revised TN formula."""
+def compute_wheeling_components(total_excess_kwh, t_and_d_loss_percent, unit_rate=0.0):
+    """Return wheeling helper values per revised TN formula, with the charges at unit_rate Rs/kWh."""
     try:
         loss_pct = float(t_and_d_loss_percent or 0)
     except Exception:
@@ -192,6 +292,7 @@ def compute_wheeling_components(total_excess_kwh, t_and_d_loss_percent):
         "combined_kwh": combined_kwh,
         "reduction_kwh": reduction_component,
         "adjusted_kwh": adjusted_kwh,
+        "charges": adjusted_kwh * unit_rate,
     }
 
 
@@ -204,10 +305,33 @@ class AuthorPDF(FPDF):
         if self.author_name:
             self.set_font('Arial', 'I', 10)
             self.set_text_color(80, 80, 80)
-            self.cell(0, 10, self.author_name, 0, 0, 'R')
+            self.cell(0, 10, self.author_name, align='R')
             self.ln(5)
             self.set_text_color(0, 0, 0)
 
+    def write_lines(self, h, lines):
+        """Write consecutive full-width lines as one left-aligned multi_cell and return to the left margin."""
+        self.multi_cell(0, h, '\n'.join(lines), 0, 'L')
+        self.set_x(self.l_margin)
+
+    def row_writer(self, col_widths, h, border=1, align='C'):
+        """Return a function that draws one table row of pre-formatted texts across the fixed column widths."""
+        cell, ln = self.cell, self.ln
+        widths = tuple(col_widths)
+
+        def write_row(texts):
+            for width, text in zip(widths, texts):
+                cell(width, h, text, border=border, align=align)
+            ln()
+        return write_row
+
+    def output_bytes(self):
+        """Return the rendered document as bytes under both fpdf2 (bytearray) and PyFPDF 1.7 (latin-1 str)."""
+        if FPDF_VERSION.startswith('1.'):
+            return self.output(dest='S').encode('latin-1')
+        # fpdf2 hands back its own buffer; dest='S' is deprecated there and only adds a warning
+        return bytes(self.output())
+
 
 def _resolve_tariff_window(target_date: datetime):
     windows = sorted(TARIFF_WINDOWS, key=lambda w: w["start"])
@@ -522,7 +646,7 @@ def render_bpsc_calculator() -> None:
         pdf.cell(0, 7, f"Total BPSC: {totals['total_bpsc']:.2f}", ln=True)
         pdf.cell(0, 7, f"Final Amount: {totals['final_amount']:.2f}", ln=True)
 
-        return pdf.output(dest='S').encode('latin-1')
+        return pdf.output_bytes()
 
     def _generate_bpsc_excel(
         consumer_name: str,
@@ -850,7 +974,8 @@ def render_bpsc_calculator() -> None:
 
         fixed_pct_value = float(fixed_bpsc_pct or 0.0) if use_fixed_bpsc else None
 
-        for row_id, row in edited_df.iterrows():
+        # Plain dict rows keep the row.get lookups below without building a Series per row
+        for row_id, row in edited_df.to_dict('index').items():
             row_id = int(row_id)
             entry = entries_by_id.get(row_id)
             if entry is None:
@@ -1258,6 +1383,28 @@ def _find_subset_solutions(values_cents: list[int], target_cents: int, max_solut
     return _subset_solutions_dp_positive(values_cents, target_cents, max_solutions=max_solutions)
 
 
+@st.cache_data(max_entries=32, show_spinner=False)
+def _read_energy_excel(file_hash, _file_bytes, energy_column):
+    """Parse an uploaded energy workbook, cached on its SHA-256 so reruns with new parameters skip the XLSX parse.
+
+    Only the Date, Time and Energy columns are read, named by position (Date, Time, ``energy_column``)
+    so files whose header text differs still stack row-wise. The bytes are excluded from the cache key
+    (leading underscore) because capture_uploaded_artifact has already hashed them.
+    """
+    try:
+        df = pd.read_excel(io.BytesIO(_file_bytes), header=0, engine=EXCEL_ENGINE, usecols=[0, 1, 2])
+        return df.set_axis(['Date', 'Time', energy_column], axis=1)
+    except pd.errors.ParserError:
+        # Fewer than three columns: re-read as-is so the caller can report it
+        return pd.read_excel(io.BytesIO(_file_bytes), header=0, engine=EXCEL_ENGINE)
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _read_subset_excel(file_sig, _file_bytes):
+    """Parse the subset calculator's workbook once per upload (keyed on its MD5) instead of on every rerun."""
+    return pd.read_excel(io.BytesIO(_file_bytes))
+
+
 def render_subset_calculator() -> None:
     st.title("Subset Calculator")
     st.caption("Upload an Excel sheet and find row combinations whose numeric values sum to the target.")
@@ -1324,8 +1471,10 @@ def render_subset_calculator() -> None:
 
     # Reset stored results when inputs change
     try:
-        file_sig = hashlib.md5(uploaded.getvalue()).hexdigest()
+        file_bytes = uploaded.getvalue()
+        file_sig = hashlib.md5(file_bytes).hexdigest()
     except Exception:
+        file_bytes = None
         file_sig = str(getattr(uploaded, "name", "uploaded"))
     ctx_key = f"{file_sig}|col={int(value_col_num)}|target={float(target_value):.2f}"
     if st.session_state.get("subset_ctx_key") != ctx_key:
@@ -1335,7 +1484,7 @@ def render_subset_calculator() -> None:
         st.session_state.pop("subset_excluded_rows", None)
 
     try:
-        df = pd.read_excel(uploaded)
+        df = _read_subset_excel(file_sig, file_bytes) if file_bytes is not None else pd.read_excel(uploaded)
     except Exception as e:
         st.error(f"Failed to read Excel file: {e}")
         return
@@ -1499,7 +1648,7 @@ def render_subset_calculator() -> None:
         if solution_mode == "Find only one solution" and len(patterns) == 1:
             excluded_set = set(st.session_state.get("subset_excluded_rows", []) or [])
             editor_df = selected_df.copy()
-            editor_df.insert(0, "Exclude_Next_Search", editor_df.index.to_series().apply(lambda i: i in excluded_set))
+            editor_df.insert(0, "Exclude_Next_Search", editor_df.index.isin(excluded_set))
             st.caption("Tick rows to exclude, then click 'Find another possibility'.")
             edited = st.data_editor(
                 editor_df,
@@ -1621,6 +1770,31 @@ if 'processed_data' not in st.session_state:
     st.session_state.processed_data = None
 if 'error_message' not in st.session_state:
     st.session_state.error_message = None
+if 'report_key' not in st.session_state:
+    st.session_state.report_key = None
+
+def _format_distinct(values, formatter):
+    """Apply a per-value formatter once per distinct value, e.g. to the dates and slot times repeated down a report table."""
+    codes, uniques = pd.factorize(values)
+    labels = [formatter(value) for value in uniques]
+    if (codes < 0).any():
+        # factorize codes missing values as -1, which picks this trailing entry
+        labels.append(formatter(np.nan))
+    return np.array(labels, dtype=object)[codes]
+
+
+def _stack_frames(frames):
+    """Stack per-file frames; a single upload is used as is rather than copied by concat."""
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def _read_energy_workbooks(artifacts, energy_column):
+    """Read captured uploads concurrently, returning one DataFrame per artifact in upload order."""
+    if len(artifacts) < 2:
+        return [_read_energy_excel(artifact['hash'], artifact['bytes'], energy_column) for artifact in artifacts]
+    with ThreadPoolExecutor(max_workers=min(8, len(artifacts))) as pool:
+        return list(pool.map(lambda artifact: _read_energy_excel(artifact['hash'], artifact['bytes'], energy_column), artifacts))
+
 
 def process_energy_data(generated_files, cpp_files, consumed_files,
                        enable_iex, enable_cpp, t_and_d_loss, cpp_t_and_d_loss,
@@ -1639,26 +1813,18 @@ def process_energy_data(generated_files, cpp_files, consumed_files,
         gen_df = None
         if generated_files and enable_iex and len(generated_files) > 0:
             gen_dfs = []
-            for idx, gen_file in enumerate(generated_files, start=1):
-                artifact = capture_uploaded_artifact(gen_file, 'iex', idx)
-                temp_df = pd.read_excel(io.BytesIO(artifact['bytes']), header=0)
+            gen_artifacts = [capture_uploaded_artifact(f, 'iex', idx) for idx, f in enumerate(generated_files, start=1)]
+            for gen_file, artifact, temp_df in zip(generated_files, gen_artifacts, _read_energy_workbooks(gen_artifacts, 'Energy_MW')):
                 if temp_df.shape[1] < 3:
                     return {'success': False, 'error': f"Generated energy Excel file '{gen_file.name}' must have at least 3 columns: Date, Time, and Energy in MW."}
 
-                # Add filename to help with debugging
-                temp_df['Source_File'] = artifact['original_name']
                 gen_dfs.append(temp_df)
                 uploaded_artifacts.append(artifact)
             
             # Combine all generated energy dataframes
             if gen_dfs:
-                gen_df = pd.concat(gen_dfs, ignore_index=True)
-                gen_df = gen_df.iloc[:, :3]
-                gen_df.columns = ['Date', 'Time', 'Energy_MW']
-                # Strip whitespace from Date and Time columns
-                gen_df['Date'] = gen_df['Date'].astype(str).str.strip()
-                gen_df['Time'] = gen_df['Time'].astype(str).str.strip()
-                
+                gen_df = _stack_frames(gen_dfs)
+                del gen_dfs
                 # Convert Energy_MW to numeric, handling string values
                 gen_df['Energy_MW'] = pd.to_numeric(gen_df['Energy_MW'], errors='coerce')
                 nan_count = gen_df['Energy_MW'].isna().sum()
@@ -1666,40 +1832,33 @@ def process_energy_data(generated_files, cpp_files, consumed_files,
                     st.warning(f"{nan_count} non-numeric Energy_MW values found in I.E.X files and converted to NaN")
                 
                 # Standardize date format to yyyy-mm-dd for robust filtering
-                gen_df['Date'] = pd.to_datetime(gen_df['Date'], errors='coerce', dayfirst=True)
+                # (Time is stripped once when the slot labels are built)
+                gen_df['Date'] = _parse_upload_dates(gen_df['Date'])
                 gen_df['Source_Type'] = 'I.E.X'
 
         # Process C.P.P (Captive Power Purchase) files (if provided)
         cpp_df = None
         if cpp_files and enable_cpp and len(cpp_files) > 0:
             cpp_dfs = []
-            for idx, cpp_file in enumerate(cpp_files, start=1):
-                artifact = capture_uploaded_artifact(cpp_file, 'cpp', idx)
-                temp_df = pd.read_excel(io.BytesIO(artifact['bytes']), header=0)
+            cpp_artifacts = [capture_uploaded_artifact(f, 'cpp', idx) for idx, f in enumerate(cpp_files, start=1)]
+            for cpp_file, artifact, temp_df in zip(cpp_files, cpp_artifacts, _read_energy_workbooks(cpp_artifacts, 'Energy_MW')):
                 if temp_df.shape[1] < 3:
                     return {'success': False, 'error': f"C.P.P energy Excel file '{cpp_file.name}' must have at least 3 columns: Date, Time, and Energy in MW."}
                 
-                # Add filename to help with debugging
-                temp_df['Source_File'] = artifact['original_name']
-                temp_df['Source_Type'] = 'C.P.P'
                 cpp_dfs.append(temp_df)
                 uploaded_artifacts.append(artifact)
             
             # Process C.P.P data if files were uploaded
             if cpp_dfs:
-                cpp_df = pd.concat(cpp_dfs, ignore_index=True)
-                cpp_df = cpp_df.iloc[:, :3]
-                cpp_df.columns = ['Date', 'Time', 'Energy_MW']
-                cpp_df['Date'] = cpp_df['Date'].astype(str).str.strip()
-                cpp_df['Time'] = cpp_df['Time'].astype(str).str.strip()
-                
+                cpp_df = _stack_frames(cpp_dfs)
+                del cpp_dfs
                 # Convert Energy_MW to numeric, handling string values
                 cpp_df['Energy_MW'] = pd.to_numeric(cpp_df['Energy_MW'], errors='coerce')
                 nan_count = cpp_df['Energy_MW'].isna().sum()
                 if nan_count > 0:
                     st.warning(f"{nan_count} non-numeric Energy_MW values found in C.P.P files and converted to NaN")
                 
-                cpp_df['Date'] = pd.to_datetime(cpp_df['Date'], errors='coerce', dayfirst=True)
+                cpp_df['Date'] = _parse_upload_dates(cpp_df['Date'])
                 cpp_df['Source_Type'] = 'C.P.P'
 
         # Combine I.E.X and C.P.P data if both exist
@@ -1712,39 +1871,33 @@ def process_energy_data(generated_files, cpp_files, consumed_files,
         else:
             return {'success': False, 'error': "No valid generation energy files were found."}
         
-        gen_df = combined_gen_df
-
-        # Function to convert month number to month name
-        def get_month_name(month_num):
-            month_names = ['January', 'February', 'March', 'April', 'May', 'June', 
-                          'July', 'August', 'September', 'October', 'November', 'December']
-            try:
-                return month_names[int(month_num) - 1]
-            except (ValueError, IndexError):
-                return str(month_num)
+        # Source_Type only ever holds two labels
+        gen_df = combined_gen_df.astype({'Source_Type': 'category'})
 
         # Auto-detect month and year if enabled
         auto_detect_info = ""
         if auto_detect_month and not (month and year):
-            # Extract unique months and years from the data
-            unique_months = gen_df['Date'].dt.month.unique()
-            unique_years = gen_df['Date'].dt.year.unique()
-            
-            if len(unique_months) == 1 and not month:
-                month = str(int(unique_months[0]))
-                st.info(f"Auto-detected month: {month} ({get_month_name(month)})")
-            elif len(unique_months) > 1 and not month:
-                # If multiple months, use the most frequent one
-                month = str(int(gen_df['Date'].dt.month.value_counts().idxmax()))
-                st.info(f"Multiple months detected, using most frequent: {month} ({get_month_name(month)})")
+            # Only scan the data for the part the user left blank; one value_counts pass gives
+            # both the number of distinct values and the most frequent one
+            if not month:
+                month_counts = gen_df['Date'].dt.month.value_counts()
+                if len(month_counts) == 1:
+                    month = str(int(month_counts.index[0]))
+                    st.info(f"Auto-detected month: {month} ({get_month_name(month)})")
+                elif len(month_counts) > 1:
+                    # If multiple months, use the most frequent one
+                    month = str(int(month_counts.idxmax()))
+                    st.info(f"Multiple months detected, using most frequent: {month} ({get_month_name(month)})")
             
-            if len(unique_years) == 1 and not year:
-                year = str(int(unique_years[0]))
-                st.info(f"Auto-detected year: {year}")
-            elif len(unique_years) > 1 and not year:
-                # If multiple years, use the most frequent one
-                year = str(int(gen_df['Date'].dt.year.value_counts().idxmax()))
-                st.info(f"Multiple years detected, using most frequent: {year}")
+            if not year:
+                year_counts = gen_df['Date'].dt.year.value_counts()
+                if len(year_counts) == 1:
+                    year = str(int(year_counts.index[0]))
+                    st.info(f"Auto-detected year: {year}")
+                elif len(year_counts) > 1:
+                    # If multiple years, use the most frequent one
+                    year = str(int(year_counts.idxmax()))
+                    st.info(f"Multiple years detected, using most frequent: {year}")
                 
             # Add information to be displayed in PDF
             cpp_count = len(cpp_files) if cpp_files else 0
@@ -1753,14 +1906,11 @@ def process_energy_data(generated_files, cpp_files, consumed_files,
 
         # Process multiple consumed energy Excel files
         cons_dfs = []
-        for idx, cons_file in enumerate(consumed_files, start=1):
-            artifact = capture_uploaded_artifact(cons_file, 'consumption', idx)
-            temp_df = pd.read_excel(io.BytesIO(artifact['bytes']), header=0)
+        cons_artifacts = [capture_uploaded_artifact(f, 'consumption', idx) for idx, f in enumerate(consumed_files, start=1)]
+        for cons_file, artifact, temp_df in zip(consumed_files, cons_artifacts, _read_energy_workbooks(cons_artifacts, 'Energy_kWh')):
             if temp_df.shape[1] < 3:
                 return {'success': False, 'error': f"Consumed energy Excel file '{cons_file.name}' must have at least 3 columns: Date, Time, and Energy in kWh."}
             
-            # Add filename to help with debugging
-            temp_df['Source_File'] = artifact['original_name']
             cons_dfs.append(temp_df)
             uploaded_artifacts.append(artifact)
         
@@ -1768,18 +1918,16 @@ def process_energy_data(generated_files, cpp_files, consumed_files,
         if not cons_dfs:
             return {'success': False, 'error': "No valid consumed energy Excel files were found."}
         
-        cons_df = pd.concat(cons_dfs, ignore_index=True)
-        cons_df = cons_df.iloc[:, :3]
-        cons_df.columns = ['Date', 'Time', 'Energy_kWh']
-        # Strip whitespace from Date and Time columns
-        cons_df['Date'] = cons_df['Date'].astype(str).str.strip()
-        cons_df['Time'] = cons_df['Time'].astype(str).str.strip()
+        cons_df = _stack_frames(cons_dfs)
+        del cons_dfs
         # Standardize date format to yyyy-mm-dd for robust filtering
-        cons_df['Date'] = pd.to_datetime(cons_df['Date'], errors='coerce', dayfirst=True)
+        # (Time is stripped once when the slot labels are built)
+        cons_df['Date'] = _parse_upload_dates(cons_df['Date'])
         
-        # Apply date filtering logic (simplified version)
-        filtered_gen = gen_df.copy()
-        filtered_cons = cons_df.copy()
+        # Apply date filtering logic (simplified version); each filter builds a new frame,
+        # so the unfiltered inputs need no defensive copy
+        filtered_gen = gen_df
+        filtered_cons = cons_df
         
         if year and month:
             try:
@@ -1818,96 +1966,88 @@ def process_energy_data(generated_files, cpp_files, consumed_files,
         # Convert MW to kWh (MW * 250 for 15-minute intervals)
         gen_df['Energy_kWh'] = gen_df['Energy_MW'] * 250
         
-        # Apply T&D losses based on source type
-        def apply_td_loss(row):
-            if row['Source_Type'] == 'I.E.X':
-                return row['Energy_kWh'] * (1 - t_and_d_loss / 100) if t_and_d_loss > 0 else row['Energy_kWh']
-            elif row['Source_Type'] == 'C.P.P':
-                return row['Energy_kWh'] * (1 - cpp_t_and_d_loss / 100) if cpp_t_and_d_loss > 0 else row['Energy_kWh']
-            else:
-                return row['Energy_kWh']
-        
-        gen_df['After_Loss'] = gen_df.apply(apply_td_loss, axis=1)
+        # Apply T&D losses based on source type (no loss for anything else)
+        iex_loss_factor = (1 - t_and_d_loss / 100) if t_and_d_loss > 0 else 1.0
+        cpp_loss_factor = (1 - cpp_t_and_d_loss / 100) if cpp_t_and_d_loss > 0 else 1.0
+        source_type = gen_df['Source_Type'].to_numpy()
+        gen_df['After_Loss'] = gen_df['Energy_kWh'] * np.select(
+            [source_type == 'I.E.X', source_type == 'C.P.P'], [iex_loss_factor, cpp_loss_factor], 1.0)
         
         # Create slot time and date columns
-        def slot_time_range(row):
-            t = str(row['Time']).strip()
-            if '-' in t:
-                return t
-            try:
-                start = pd.to_datetime(t, format='%H:%M').time()
-                end_dt = (pd.Timestamp.combine(pd.Timestamp.today(), start) + pd.Timedelta(minutes=15)).time()
-                return f"{start.strftime('%H:%M')} - {end_dt.strftime('%H:%M')}"
-            except Exception:
-                return t
-        
-        gen_df['Slot_Time'] = gen_df.apply(slot_time_range, axis=1)
-        gen_df['Slot_Time'] = gen_df['Slot_Time'].replace({'23:45 - 24:00': '23:45 - 00:00'})
-        gen_df['Slot_Date'] = gen_df['Date'].dt.strftime('%d/%m/%Y')
+        # Slot_Day stays a parsed date for the joins and the sort; the dd/mm/yyyy label is added after the join
+        gen_df['Slot_Time'] = _slot_time_labels(gen_df['Time'])
+        gen_df['Slot_Day'] = gen_df['Date'].dt.normalize()
         
         # Apply same processing to consumption data
         cons_df['Energy_kWh'] = pd.to_numeric(cons_df['Energy_kWh'], errors='coerce') * multiplication_factor
-        cons_df['Slot_Time'] = cons_df.apply(slot_time_range, axis=1)
-        cons_df['Slot_Time'] = cons_df['Slot_Time'].replace({'23:45 - 24:00': '23:45 - 00:00'})
-        cons_df['Slot_Date'] = cons_df['Date'].dt.strftime('%d/%m/%Y')
+        cons_df['Slot_Time'] = _slot_time_labels(cons_df['Time'])
+        cons_df['Slot_Day'] = cons_df['Date'].dt.normalize()
 
         # Sequential adjustment logic: First I.E.X, then C.P.P
-        # Separate I.E.X and C.P.P data for sequential adjustment
-        iex_df = gen_df[gen_df['Source_Type'] == 'I.E.X'].copy() if enable_iex else pd.DataFrame()
-        cpp_df_only = gen_df[gen_df['Source_Type'] == 'C.P.P'].copy() if enable_cpp else pd.DataFrame()
-        
-        # Build all slot combinations from consumption and both generation sources
-        cons_slots_set = set((d, t) for d, t in zip(cons_df['Slot_Date'], cons_df['Slot_Time']))
-        iex_slots_set = set((d, t) for d, t in zip(iex_df['Slot_Date'], iex_df['Slot_Time'])) if not iex_df.empty else set()
-        cpp_slots_set = set((d, t) for d, t in zip(cpp_df_only['Slot_Date'], cpp_df_only['Slot_Time'])) if not cpp_df_only.empty else set()
-        
-        all_slots = pd.DataFrame(
-            list(cons_slots_set | iex_slots_set | cpp_slots_set),
-            columns=['Slot_Date', 'Slot_Time'])
-        
-        # Merge consumption data first
-        merged = pd.merge(all_slots, cons_df[['Slot_Date', 'Slot_Time', 'Energy_kWh']], on=['Slot_Date', 'Slot_Time'], how='left')
-        merged['Energy_kWh_cons'] = merged['Energy_kWh'].fillna(0)
-        merged.drop('Energy_kWh', axis=1, inplace=True)
-        
-        # Merge I.E.X data
+        # Separate I.E.X and C.P.P data for sequential adjustment in one pass over the categorical
+        # source codes; the parts are only read from, so they need no defensive copies
+        gen_by_source = dict(list(gen_df.groupby('Source_Type', observed=True, sort=False)))
+        iex_df = gen_by_source.get('I.E.X', gen_df.iloc[:0]) if enable_iex else pd.DataFrame()
+        cpp_df_only = gen_by_source.get('C.P.P', gen_df.iloc[:0]) if enable_cpp else pd.DataFrame()
+        
+        # Build all slot combinations by outer-joining consumption with both generation sources;
+        # each source carries a presence marker, so a NaN marker means the slot is missing there.
+        # The frames are aligned on a shared slot index that is built once per frame, not per merge.
+        slot_keys = ['Slot_Day', 'Slot_Time']
+        merged = cons_df.set_index(slot_keys)[['Energy_kWh']].set_axis(['Energy_kWh_cons'], axis=1)
+        merged['_has_cons'] = True
+        
+        # Join I.E.X data
         if not iex_df.empty:
-            iex_merge = iex_df[['Slot_Date', 'Slot_Time', 'After_Loss', 'Energy_kWh']].copy()
-            iex_merge.columns = ['Slot_Date', 'Slot_Time', 'IEX_After_Loss', 'IEX_Energy_kWh']
-            merged = pd.merge(merged, iex_merge, on=['Slot_Date', 'Slot_Time'], how='left')
-            merged['IEX_After_Loss'] = merged['IEX_After_Loss'].fillna(0)
-            merged['IEX_Energy_kWh'] = merged['IEX_Energy_kWh'].fillna(0)
+            iex_merge = iex_df.set_index(slot_keys)[['After_Loss', 'Energy_kWh']].set_axis(['IEX_After_Loss', 'IEX_Energy_kWh'], axis=1)
+            iex_merge['_has_iex'] = True
+            merged = merged.join(iex_merge, how='outer')
         else:
             merged['IEX_After_Loss'] = 0
             merged['IEX_Energy_kWh'] = 0
+            merged['_has_iex'] = np.nan
         
-        # Merge C.P.P data
+        # Join C.P.P data
         if not cpp_df_only.empty:
-            cpp_merge = cpp_df_only[['Slot_Date', 'Slot_Time', 'After_Loss', 'Energy_kWh']].copy()
-            cpp_merge.columns = ['Slot_Date', 'Slot_Time', 'CPP_After_Loss', 'CPP_Energy_kWh']
-            merged = pd.merge(merged, cpp_merge, on=['Slot_Date', 'Slot_Time'], how='left')
-            merged['CPP_After_Loss'] = merged['CPP_After_Loss'].fillna(0)
-            merged['CPP_Energy_kWh'] = merged['CPP_Energy_kWh'].fillna(0)
+            cpp_merge = cpp_df_only.set_index(slot_keys)[['After_Loss', 'Energy_kWh']].set_axis(['CPP_After_Loss', 'CPP_Energy_kWh'], axis=1)
+            cpp_merge['_has_cpp'] = True
+            merged = merged.join(cpp_merge, how='outer')
         else:
             merged['CPP_After_Loss'] = 0
             merged['CPP_Energy_kWh'] = 0
+            merged['_has_cpp'] = np.nan
+        merged = merged.reset_index()
+        # Format each distinct day once rather than every slot row of every frame
+        day_codes, days = pd.factorize(merged['Slot_Day'])
+        merged.insert(0, 'Slot_Date', days.strftime('%d/%m/%Y').array.take(day_codes, allow_fill=True))
+        
+        energy_cols = ['Energy_kWh_cons', 'IEX_After_Loss', 'IEX_Energy_kWh', 'CPP_After_Loss', 'CPP_Energy_kWh']
+        merged = merged.fillna(dict.fromkeys(energy_cols, 0))
         
         # Sequential Adjustment Calculation
+        iex_after_loss = merged['IEX_After_Loss'].to_numpy(dtype=float)
+        cpp_after_loss = merged['CPP_After_Loss'].to_numpy(dtype=float)
+        consumption = merged['Energy_kWh_cons'].to_numpy(dtype=float)
         # Step 1: I.E.X adjustment first
-        merged['IEX_Adjustment'] = merged[['IEX_After_Loss', 'Energy_kWh_cons']].min(axis=1)
-        merged['IEX_Excess'] = (merged['IEX_After_Loss'] - merged['Energy_kWh_cons']).apply(lambda x: max(0, x))
+        iex_adjustment = np.minimum(iex_after_loss, consumption)
+        merged['IEX_Adjustment'] = iex_adjustment
+        iex_excess = np.maximum(iex_after_loss - consumption, 0.0)
+        merged['IEX_Excess'] = iex_excess
         
         # Step 2: Calculate remaining consumption after I.E.X adjustment
-        merged['Remaining_Consumption'] = (merged['Energy_kWh_cons'] - merged['IEX_Adjustment']).apply(lambda x: max(0, x))
+        remaining = np.maximum(consumption - iex_adjustment, 0.0)
+        merged['Remaining_Consumption'] = remaining
         
         # Step 3: C.P.P adjustment with remaining consumption
-        merged['CPP_Adjustment'] = merged[['CPP_After_Loss', 'Remaining_Consumption']].min(axis=1)
-        merged['CPP_Excess'] = (merged['CPP_After_Loss'] - merged['Remaining_Consumption']).apply(lambda x: max(0, x))
+        merged['CPP_Adjustment'] = np.minimum(cpp_after_loss, remaining)
+        cpp_excess = np.maximum(cpp_after_loss - remaining, 0.0)
+        merged['CPP_Excess'] = cpp_excess
         
         # Step 4: Total calculations
-        merged['Total_Excess'] = merged['IEX_Excess'] + merged['CPP_Excess']
-        merged['Total_Generated_After_Loss'] = merged['IEX_After_Loss'] + merged['CPP_After_Loss']
-        merged['Total_Generated_Before_Loss'] = merged['IEX_Energy_kWh'] + merged['CPP_Energy_kWh']
+        merged['Total_Excess'] = iex_excess + cpp_excess
+        merged['Total_Generated_After_Loss'] = iex_after_loss + cpp_after_loss
+        merged['Total_Generated_Before_Loss'] = (merged['IEX_Energy_kWh'].to_numpy(dtype=float)
+                                                 + merged['CPP_Energy_kWh'].to_numpy(dtype=float))
         
         # For backward compatibility with existing PDF code
         merged['After_Loss'] = merged['Total_Generated_After_Loss']
@@ -1915,75 +2055,32 @@ def process_energy_data(generated_files, cpp_files, consumed_files,
         merged['Excess'] = merged['Total_Excess']
         
         # Track missing slots for reporting
-        merged['Missing_Info'] = ''
-        merged['is_missing_iex'] = ~merged.apply(lambda row: (row['Slot_Date'], row['Slot_Time']) in iex_slots_set, axis=1)
-        merged['is_missing_cpp'] = ~merged.apply(lambda row: (row['Slot_Date'], row['Slot_Time']) in cpp_slots_set, axis=1)
-        merged['is_missing_cons'] = ~merged.apply(lambda row: (row['Slot_Date'], row['Slot_Time']) in cons_slots_set, axis=1)
-        
-        if enable_iex:
-            merged.loc[merged['is_missing_iex'], 'Missing_Info'] = (
-                merged.loc[merged['is_missing_iex'], 'Missing_Info'].astype(str) + '[Missing in I.E.X] '
-            )
-        if enable_cpp:
-            merged.loc[merged['is_missing_cpp'], 'Missing_Info'] = (
-                merged.loc[merged['is_missing_cpp'], 'Missing_Info'].astype(str) + '[Missing in C.P.P] '
-            )
-        merged.loc[merged['is_missing_cons'], 'Missing_Info'] = (
-            merged.loc[merged['is_missing_cons'], 'Missing_Info'].astype(str) + '[Missing in CONSUMED] '
-        )
-        merged.drop(['is_missing_iex', 'is_missing_cpp', 'is_missing_cons'], axis=1, inplace=True)
+        missing_iex = merged['_has_iex'].isna().to_numpy() if enable_iex else np.zeros(len(merged), dtype=bool)
+        missing_cpp = merged['_has_cpp'].isna().to_numpy() if enable_cpp else np.zeros(len(merged), dtype=bool)
+        missing_cons = merged['_has_cons'].isna().to_numpy()
+        merged['Missing_Info'] = _missing_info(missing_iex, missing_cpp, missing_cons)
+        merged.drop(['_has_cons', '_has_iex', '_has_cpp'], axis=1, inplace=True)
         
         # Sort merged data chronologically by Slot_Date and Slot_Time
-        def slot_time_to_minutes(slot_time):
-            try:
-                start = slot_time.split('-')[0].strip()
-                h, m = map(int, start.split(':'))
-                return h * 60 + m
-            except Exception:
-                return 0
-        
-        # Be flexible with date parsing: accept various formats and day-first entries
-        merged['Slot_Date_dt'] = _robust_to_datetime(merged['Slot_Date'])
-        merged['Slot_Time_min'] = merged['Slot_Time'].apply(slot_time_to_minutes)
-        merged = merged.sort_values(['Slot_Date_dt', 'Slot_Time_min']).reset_index(drop=True)
-        
-        # Add TOD (Time of Day) classification
-        def classify_tod(slot_time):
-            try:
-                start_time = slot_time.split('-')[0].strip()
-                hour, minute = map(int, start_time.split(':'))
-                
-                # Morning peak: 6:00 AM - 10:00 AM (C1)
-                if 6 <= hour < 10:
-                    return 'C1'
-                # Evening peak: 6:00 PM - 10:00 PM (C2)
-                elif 18 <= hour < 22:
-                    return 'C2'
-                # Normal hours: 5:00 AM - 6:00 AM + 10:00 AM to 6:00 PM (C4)
-                elif (5 <= hour < 6) or (10 <= hour < 18):
-                    return 'C4'
-                # Night hours: 22:00 PM to 5:00 AM (C5)
-                elif (hour >= 22) or (hour < 5):
-                    return 'C5'
-                else:
-                    return 'Unknown'
-            except Exception:
-                return 'Unknown'
-        
-        merged['TOD_Category'] = merged['Slot_Time'].apply(classify_tod)
-        
-        # Clean up temporary columns
-        merged.drop(['Slot_Date_dt', 'Slot_Time_min'], axis=1, inplace=True)
-        
-        # Calculate totals
-        sum_injection = merged['Energy_kWh_gen'].sum()
-        total_generated_after_loss = merged['After_Loss'].sum()
-        total_consumed = merged['Energy_kWh_cons'].sum()
-        total_excess = merged['Total_Excess'].sum()
+        slot_hours, slot_minutes = _slot_start_parts(merged['Slot_Time'])
+        
+        # The carried Slot_Day plus the start minutes gives a single chronological key
+        # (unparseable start times count as midnight)
+        slot_minutes_total = (slot_hours * 60 + slot_minutes).fillna(0)
+        slot_start = merged.pop('Slot_Day') + pd.to_timedelta(slot_minutes_total, unit='m')
+        # Add TOD (Time of Day) classification before sorting so it shares the parsed hours
+        merged['TOD_Category'] = _classify_tod(slot_hours)
+        merged = merged.iloc[np.argsort(slot_start.to_numpy(), kind='stable')].reset_index(drop=True)
+        
+        # Calculate totals (one reduction over the four columns)
+        sum_injection, total_generated_after_loss, total_consumed, total_excess = (
+            merged[['Energy_kWh_gen', 'After_Loss', 'Energy_kWh_cons', 'Total_Excess']].sum().tolist()
+        )
         
-        # For PDF, show all slots or only excess slots
-        merged_excess = merged[merged['Total_Excess'] > 0].copy()
-        merged_all = merged.copy()
+        # For PDF, show all slots or only excess slots. Nothing downstream mutates these frames,
+        # so the excess rows are taken by position and the full frame is shared as is.
+        merged_excess = merged.take(np.flatnonzero(merged['Total_Excess'].to_numpy() > 0))
+        merged_all = merged
         
         # Count unique days
         unique_days_gen = merged['Slot_Date'].nunique()
@@ -1991,15 +2088,12 @@ def process_energy_data(generated_files, cpp_files, consumed_files,
         
         excess_status = 'Excess' if total_excess > 0 else 'No Excess'
         
-        # Calculate TOD-wise excess for financial calculations
-        tod_excess = merged.groupby('TOD_Category')['Total_Excess'].sum().reset_index()
-        
-        # Helper function for consistent rounding throughout the application
-        def round_kwh_financial(value):
-            return int(value + 0.5) if value >= 0 else int(value - 0.5)
+        # Calculate TOD-wise excess for financial calculations; the I.E.X excess rides along
+        # so every financial excess figure comes from this one pass
+        tod_excess = _tod_sums(merged, ['Total_Excess', 'IEX_Excess'])
         
         # Round the total for financial calculations to match table display values
-        total_excess_financial_rounded = round_kwh_financial(total_excess)
+        total_excess_financial_rounded = _round_kwh_half_up(total_excess)
         
         # Resolve tariff-specific rates using selected period
         tariff_rates = resolve_tariff_rates(tariff_selection, month, year)
@@ -2013,12 +2107,12 @@ def process_energy_data(generated_files, cpp_files, consumed_files,
         base_amount = total_excess_financial_rounded * base_rate
         
         # Additional charges for specific TOD categories using rounded values
-        c1_c2_excess_raw = tod_excess.loc[tod_excess['TOD_Category'].isin(['C1', 'C2']), 'Total_Excess'].sum()
-        c1_c2_excess = round_kwh_financial(c1_c2_excess_raw)
+        c1_c2_excess_raw = tod_excess['Total_Excess'].reindex(['C1', 'C2'], fill_value=0.0).sum()
+        c1_c2_excess = _round_kwh_half_up(c1_c2_excess_raw)
         c1_c2_additional = c1_c2_excess * c1_c2_rate  # rupees per kWh
         
-        c5_excess_raw = tod_excess.loc[tod_excess['TOD_Category'] == 'C5', 'Total_Excess'].sum()
-        c5_excess = round_kwh_financial(c5_excess_raw)
+        c5_excess_raw = tod_excess['Total_Excess'].get('C5', 0.0)
+        c5_excess = _round_kwh_half_up(c5_excess_raw)
         c5_additional = c5_excess * c5_rate  # rupees per kWh
         
         # Calculate total amount
@@ -2031,8 +2125,8 @@ def process_energy_data(generated_files, cpp_files, consumed_files,
         total_with_etax = total_amount + etax
 
         # Calculate IEX excess for specific charges using rounded values
-        iex_excess_financial_raw = merged['IEX_Excess'].sum()
-        iex_excess_financial = round_kwh_financial(iex_excess_financial_raw)
+        iex_excess_financial_raw = tod_excess['IEX_Excess'].sum()
+        iex_excess_financial = _round_kwh_half_up(iex_excess_financial_raw)
 
         # Calculate negative factors using rounded values
         etax_on_iex = total_excess_financial_rounded * 0.1
@@ -2049,12 +2143,13 @@ def process_energy_data(generated_files, cpp_files, consumed_files,
         wheeling_components = compute_wheeling_components(
             total_excess_financial_rounded,
             t_and_d_loss,
+            wheeling_unit_rate,
         )
         wheeling_reference_kwh = wheeling_components['reference_kwh']
         wheeling_combined_kwh = wheeling_components['combined_kwh']
         wheeling_reduction_kwh = wheeling_components['reduction_kwh']
         wheeling_adjusted_kwh = wheeling_components['adjusted_kwh']
-        wheeling_charges = wheeling_adjusted_kwh * wheeling_unit_rate
+        wheeling_charges = wheeling_components['charges']
         
         # Calculate final amount to be collected (Additional Surcharge is brought in less like E-Tax on IEX and Cross Subsidy)
         final_amount = total_with_etax - (etax_on_iex + cross_subsidy_surcharge + wheeling_charges + additional_surcharge)
@@ -2065,6 +2160,7 @@ def process_energy_data(generated_files, cpp_files, consumed_files,
         return {'success': True, 'data': {
             'merged_all': merged_all,
             'merged_excess': merged_excess,
+            'tod_excess_totals': tod_excess['Total_Excess'].to_dict(),
             'sum_injection': sum_injection,
             'total_generated_after_loss': total_generated_after_loss,
             'total_consumed': total_consumed,
@@ -2124,6 +2220,43 @@ def process_energy_data(generated_files, cpp_files, consumed_files,
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
+
+class _NamedBytesIO(io.BytesIO):
+    """In-memory stand-in for an UploadedFile, exposing its ``name``."""
+
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _process_energy_data_cached(upload_keys, _uploads, *params):
+    """Cached process_energy_data keyed on per-upload (filename, id) pairs and the scalar parameters.
+
+    The (filename, bytes) payloads in ``_uploads`` are left out of the cache key (leading underscore),
+    so a rerun does not hash every uploaded workbook again just to find the cached result.
+    """
+    def to_files(payloads):
+        return [_NamedBytesIO(name, data) for name, data in payloads]
+
+    return process_energy_data(*(to_files(payloads) for payloads in _uploads), *params)
+
+
+def _upload_key(uploaded_file):
+    """Identify an upload by name plus Streamlit's per-upload file id, or a digest of its bytes without one."""
+    file_id = getattr(uploaded_file, 'file_id', None)
+    if not file_id:
+        file_id = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    return uploaded_file.name, file_id
+
+
+def process_energy_data_cached(generated_files, cpp_files, consumed_files, *params):
+    """Run process_energy_data, reusing the last result when uploads and parameters are unchanged."""
+    file_groups = [list(files or []) for files in (generated_files, cpp_files, consumed_files)]
+    upload_keys = tuple(tuple(_upload_key(f) for f in files) for files in file_groups)
+    uploads = tuple(tuple((f.name, f.getvalue()) for f in files) for files in file_groups)
+    return _process_energy_data_cached(upload_keys, uploads, *params)
+
 def generate_custom_filename(base_name, consumer_number, consumer_name, month=None, year=None, extension=".pdf"):
     """Generate custom filename with optional extension and suffix logic."""
     extension = extension if str(extension).startswith('.') else f".{extension}"
@@ -2202,17 +2335,87 @@ def build_consumer_slug(consumer_number, consumer_name):
     clean_name = clean_name.replace(' ', '_') or "consumer"
     return f"{last_3_digits}_{clean_name}"
 
+def _new_report_pdf(data, title, tariff_selection, tariff_rates,
+                    multiplication_label='Multiplication Factor (Consumed Energy)'):
+    """Start a report PDF with the title, consumer information and T&D loss sections shared by every variant."""
+    pdf = AuthorPDF()
+    pdf.set_margins(20, 20, 20)  # Set proper margins: left, top, right (20mm each)
+    pdf.set_auto_page_break(auto=True, margin=20)  # Auto page break with bottom margin
+    pdf.add_page()
+
+    pdf.set_font('Arial', 'B', 16)  # Larger title font
+    pdf.cell(0, 15, title, ln=True, align='C')
+    pdf.ln(10)
+
+    # Consumer Information Section
+    pdf.set_font('Arial', 'B', 14)
+    pdf.cell(0, 10, 'Consumer Information:', ln=True)
+    pdf.set_font('Arial', '', 12)
+    pdf.cell(0, 8, f"Consumer Number: {data['consumer_number']}", ln=True)
+    pdf.cell(0, 8, f"Consumer Name: {data['consumer_name']}", ln=True)
+    pdf.cell(0, 8, f"{multiplication_label}: {data.get('multiplication_factor', 1)}", ln=True)
+    pdf.cell(0, 8, f"Tariff: {tariff_selection} ({tariff_rates.get('window_label', 'Latest')})", ln=True)
+    pdf.ln(5)
+
+    # Technical Parameters Section: T&D losses for the sources in use
+    pdf.set_font('Arial', 'B', 14)
+    pdf.cell(0, 10, 'Technical Parameters:', ln=True)
+    pdf.set_font('Arial', '', 12)
+    if data.get('enable_iex'):
+        pdf.cell(0, 8, f"I.E.X T&D Loss (%): {data.get('t_and_d_loss', 0)}", ln=True)
+    if data.get('enable_cpp'):
+        pdf.cell(0, 8, f"C.P.P T&D Loss (%): {data.get('cpp_t_and_d_loss', 0)}", ln=True)
+    pdf.ln(5)
+    return pdf
+
+
+def _tod_excess_totals(data, pdf_data, excess_only=False):
+    """Per-TOD excess sums for a report, reusing the aggregate from process_energy_data when it is present."""
+    totals = data.get('tod_excess_totals')
+    if totals is None:
+        return _tod_sums(pdf_data, ['Total_Excess'])['Total_Excess'].to_dict()
+    if excess_only:
+        # Categories without a single excess slot do not appear in merged_excess
+        return {category: excess for category, excess in totals.items() if excess > 0}
+    return totals
+
+
+def _add_tod_breakdown(pdf, tod_totals):
+    """Draw the TOD-wise excess table (C total first, then C1/C2/C4/C5 and any Unknown slots)."""
+    # Check if we need a new page for TOD breakdown
+    if pdf.get_y() > 220:
+        pdf.add_page()
+
+    pdf.ln(5)
+    pdf.set_font('Arial', 'B', 14)
+    pdf.cell(0, 10, 'TOD-wise Excess Energy Breakdown:', ln=True)
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(20, 10, 'TOD', 1)
+    pdf.cell(50, 10, 'Excess Energy (kWh)', 1)
+    pdf.ln()
+
+    pdf.set_font('Arial', '', 10)
+
+    # Round every category in one vectorised pass
+    tod_values = dict(zip(tod_totals, _round_kwh(list(tod_totals.values())).tolist()))
+
+    # Display C total (sum of C1, C2, C4, C5) first, then the individual categories
+    c_categories = ['C1', 'C2', 'C4', 'C5']
+    rows = [('C', sum(tod_values.get(category, 0) for category in c_categories))]
+    rows += [(category, tod_values[category]) for category in c_categories + ['Unknown'] if category in tod_values]
+    for category, excess in rows:
+        pdf.cell(20, 10, category, 1)
+        pdf.cell(50, 10, f"{excess}", 1)
+        pdf.ln()
+
+
 def generate_detailed_pdf(data, pdf_data, pdf_type):
     """Generate detailed PDF with complete table data and calculations"""
     try:
         # Import datetime for timestamp
         from datetime import datetime
 
-        # Ensure additional surcharge defaults exist at function scope to avoid unbound references
-        additional_surcharge = 0.0
-        additional_surcharge_breakdown = []
-
-        # Resolve tariff details for descriptive sections and fallback calculations
+        # Resolve tariff details for the descriptive sections
         tariff_selection = data.get('tariff_selection', TARIFF_OPTIONS[0])
         tariff_rates = data.get('tariff_rates') or resolve_tariff_rates(
             tariff_selection,
@@ -2225,41 +2428,9 @@ def generate_detailed_pdf(data, pdf_data, pdf_type):
         cross_subsidy_rate = data.get('tariff_cross_subsidy_rate', tariff_rates['cross_subsidy_rate'])
         wheeling_rate = data.get('tariff_wheeling_rate', tariff_rates['wheeling_rate'])
         
-        pdf = AuthorPDF()
-        pdf.set_margins(20, 20, 20)  # Set proper margins: left, top, right (20mm each)
-        pdf.set_auto_page_break(auto=True, margin=20)  # Auto page break with bottom margin
-        pdf.add_page()
-        
         # FIRST PAGE - DESCRIPTION AND INFORMATION ONLY
-        pdf.set_font('Arial', 'B', 16)  # Larger title font
         title = f"Energy Adjustment {pdf_type.replace('_', ' ').title()} Report"
-        pdf.cell(0, 15, title, ln=True, align='C')
-        pdf.ln(10)
-        
-        # Consumer Information Section
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Consumer Information:', ln=True)
-        pdf.set_font('Arial', '', 12)
-        pdf.cell(0, 8, f"Consumer Number: {data['consumer_number']}", ln=True)
-        pdf.cell(0, 8, f"Consumer Name: {data['consumer_name']}", ln=True)
-        pdf.cell(0, 8, f"Multiplication Factor (Consumed Energy): {data.get('multiplication_factor', 1)}", ln=True)
-        pdf.cell(0, 8, f"Tariff: {tariff_selection} ({tariff_rates.get('window_label', 'Latest')})", ln=True)
-        pdf.ln(5)
-        
-        # Technical Parameters Section
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Technical Parameters:', ln=True)
-        pdf.set_font('Arial', '', 12)
-        
-        # Display T&D losses based on what sources are used
-        if data.get('enable_iex') and data.get('enable_cpp'):
-            pdf.cell(0, 8, f"I.E.X T&D Loss (%): {data.get('t_and_d_loss', 0)}", ln=True)
-            pdf.cell(0, 8, f"C.P.P T&D Loss (%): {data.get('cpp_t_and_d_loss', 0)}", ln=True)
-        elif data.get('enable_iex'):
-            pdf.cell(0, 8, f"I.E.X T&D Loss (%): {data.get('t_and_d_loss', 0)}", ln=True)
-        elif data.get('enable_cpp'):
-            pdf.cell(0, 8, f"C.P.P T&D Loss (%): {data.get('cpp_t_and_d_loss', 0)}", ln=True)
-        pdf.ln(5)
+        pdf = _new_report_pdf(data, title, tariff_selection, tariff_rates)
         
         # Data Sources Section
         pdf.set_font('Arial', 'B', 14)
@@ -2310,168 +2481,161 @@ def generate_detailed_pdf(data, pdf_data, pdf_type):
         pdf.cell(0, 10, 'Energy Adjustment Tables', ln=True, align='C')
         pdf.ln(10)
         
-        # Helper functions for safe formatting
-        def safe_date_str(date_val):
-            """Safely convert date to string"""
-            if pd.isna(date_val):
-                return ""
-            return str(date_val)
-        
-        def format_time(time_val):
-            """Format time value for display"""
-            if pd.isna(time_val):
-                return ""
-            return str(time_val)
-        
+        is_dual_source = data.get('enable_iex') and data.get('enable_cpp')
+
         # Function to add table headers with proper text wrapping
         def add_table_headers():
-            is_dual_source = data.get('enable_iex') and data.get('enable_cpp')
-            
             if is_dual_source:
                 # Sequential adjustment table with detailed columns - improved headers
                 pdf.set_font('Arial', 'B', 8)  # Multi-source headers: Font size 8
                 
                 # First row - main headers
-                pdf.cell(16, 8, 'Date', 1, 0, 'C')
-                pdf.cell(20, 8, 'Time', 1, 0, 'C')
-                pdf.cell(12, 8, 'TOD', 1, 0, 'C')
-                pdf.cell(18, 8, 'Consumed', 1, 0, 'C')
-                pdf.cell(18, 8, 'IEX After', 1, 0, 'C')
-                pdf.cell(16, 8, 'IEX', 1, 0, 'C')
-                pdf.cell(18, 8, 'CPP After', 1, 0, 'C')
-                pdf.cell(16, 8, 'CPP', 1, 0, 'C')
-                pdf.cell(18, 8, 'Total', 1, 0, 'C')
-                pdf.cell(12, 8, 'Missing', 1, 0, 'C')
+                pdf.cell(16, 8, 'Date', border=1, align='C')
+                pdf.cell(20, 8, 'Time', border=1, align='C')
+                pdf.cell(12, 8, 'TOD', border=1, align='C')
+                pdf.cell(18, 8, 'Consumed', border=1, align='C')
+                pdf.cell(18, 8, 'IEX After', border=1, align='C')
+                pdf.cell(16, 8, 'IEX', border=1, align='C')
+                pdf.cell(18, 8, 'CPP After', border=1, align='C')
+                pdf.cell(16, 8, 'CPP', border=1, align='C')
+                pdf.cell(18, 8, 'Total', border=1, align='C')
+                pdf.cell(12, 8, 'Missing', border=1, align='C')
                 pdf.ln()
                 
                 # Second row - specifications
-                pdf.cell(16, 8, '', 1, 0, 'C')
-                pdf.cell(20, 8, '', 1, 0, 'C')
-                pdf.cell(12, 8, '', 1, 0, 'C')
-                pdf.cell(18, 8, '(kWh)', 1, 0, 'C')
-                pdf.cell(18, 8, 'Loss (kWh)', 1, 0, 'C')
-                pdf.cell(16, 8, 'Excess', 1, 0, 'C')
-                pdf.cell(18, 8, 'Loss (kWh)', 1, 0, 'C')
-                pdf.cell(16, 8, 'Excess', 1, 0, 'C')
-                pdf.cell(18, 8, 'Excess', 1, 0, 'C')
-                pdf.cell(12, 8, 'Info', 1, 0, 'C')
+                pdf.cell(16, 8, '', border=1, align='C')
+                pdf.cell(20, 8, '', border=1, align='C')
+                pdf.cell(12, 8, '', border=1, align='C')
+                pdf.cell(18, 8, '(kWh)', border=1, align='C')
+                pdf.cell(18, 8, 'Loss (kWh)', border=1, align='C')
+                pdf.cell(16, 8, 'Excess', border=1, align='C')
+                pdf.cell(18, 8, 'Loss (kWh)', border=1, align='C')
+                pdf.cell(16, 8, 'Excess', border=1, align='C')
+                pdf.cell(18, 8, 'Excess', border=1, align='C')
+                pdf.cell(12, 8, 'Info', border=1, align='C')
                 pdf.ln()
                 
                 # Third row - units
-                pdf.cell(16, 8, '', 1, 0, 'C')
-                pdf.cell(20, 8, '', 1, 0, 'C')
-                pdf.cell(12, 8, '', 1, 0, 'C')
-                pdf.cell(18, 8, '', 1, 0, 'C')
-                pdf.cell(18, 8, '', 1, 0, 'C')
-                pdf.cell(16, 8, '(kWh)', 1, 0, 'C')
-                pdf.cell(18, 8, '', 1, 0, 'C')
-                pdf.cell(16, 8, '(kWh)', 1, 0, 'C')
-                pdf.cell(18, 8, '(kWh)', 1, 0, 'C')
-                pdf.cell(12, 8, '', 1, 0, 'C')
+                pdf.cell(16, 8, '', border=1, align='C')
+                pdf.cell(20, 8, '', border=1, align='C')
+                pdf.cell(12, 8, '', border=1, align='C')
+                pdf.cell(18, 8, '', border=1, align='C')
+                pdf.cell(18, 8, '', border=1, align='C')
+                pdf.cell(16, 8, '(kWh)', border=1, align='C')
+                pdf.cell(18, 8, '', border=1, align='C')
+                pdf.cell(16, 8, '(kWh)', border=1, align='C')
+                pdf.cell(18, 8, '(kWh)', border=1, align='C')
+                pdf.cell(12, 8, '', border=1, align='C')
                 pdf.ln()
                 
-                # Reset font to table data font after headers
-                pdf.set_font('Arial', '', 9)  # Multi-source table content font size
-                
             else:
                 # Standard table for single source with properly formatted headers
                 pdf.set_font('Arial', 'B', 9)  # Single-source headers: Font size 9
                 
                 # First row - main headers with borders
-                pdf.cell(20, 8, 'Date', 1, 0, 'C')
-                pdf.cell(25, 8, 'Time', 1, 0, 'C')  
-                pdf.cell(15, 8, 'TOD', 1, 0, 'C')  
-                pdf.cell(25, 8, 'Generated', 1, 0, 'C')
-                pdf.cell(25, 8, 'Consumed', 1, 0, 'C') 
-                pdf.cell(25, 8, 'Excess', 1, 0, 'C')
-                pdf.cell(15, 8, 'Missing', 1, 0, 'C')
+                pdf.cell(20, 8, 'Date', border=1, align='C')
+                pdf.cell(25, 8, 'Time', border=1, align='C')  
+                pdf.cell(15, 8, 'TOD', border=1, align='C')  
+                pdf.cell(25, 8, 'Generated', border=1, align='C')
+                pdf.cell(25, 8, 'Consumed', border=1, align='C') 
+                pdf.cell(25, 8, 'Excess', border=1, align='C')
+                pdf.cell(15, 8, 'Missing', border=1, align='C')
                 pdf.ln()
                 
                 # Second row for "After Loss", "Energy", "Energy", "Info"
-                pdf.cell(20, 8, '', 1, 0, 'C')  # Border for Date column
-                pdf.cell(25, 8, '', 1, 0, 'C')  # Border for Time column
-                pdf.cell(15, 8, '', 1, 0, 'C')  # Border for TOD column
-                pdf.cell(25, 8, 'After Loss', 1, 0, 'C')
-                pdf.cell(25, 8, 'Energy', 1, 0, 'C')
-                pdf.cell(25, 8, 'Energy', 1, 0, 'C')
-                pdf.cell(15, 8, 'Info', 1, 0, 'C')
+                pdf.cell(20, 8, '', border=1, align='C')  # Border for Date column
+                pdf.cell(25, 8, '', border=1, align='C')  # Border for Time column
+                pdf.cell(15, 8, '', border=1, align='C')  # Border for TOD column
+                pdf.cell(25, 8, 'After Loss', border=1, align='C')
+                pdf.cell(25, 8, 'Energy', border=1, align='C')
+                pdf.cell(25, 8, 'Energy', border=1, align='C')
+                pdf.cell(15, 8, 'Info', border=1, align='C')
                 pdf.ln()
                 
                 # Third row for units "(kWh)"
-                pdf.cell(20, 8, '', 1, 0, 'C')  # Border for Date column
-                pdf.cell(25, 8, '', 1, 0, 'C')  # Border for Time column
-                pdf.cell(15, 8, '', 1, 0, 'C')  # Border for TOD column
-                pdf.cell(25, 8, '(kWh)', 1, 0, 'C')
-                pdf.cell(25, 8, '(kWh)', 1, 0, 'C')
-                pdf.cell(25, 8, '(kWh)', 1, 0, 'C')
-                pdf.cell(15, 8, '', 1, 0, 'C')  # Border for Missing Info column
+                pdf.cell(20, 8, '', border=1, align='C')  # Border for Date column
+                pdf.cell(25, 8, '', border=1, align='C')  # Border for Time column
+                pdf.cell(15, 8, '', border=1, align='C')  # Border for TOD column
+                pdf.cell(25, 8, '(kWh)', border=1, align='C')
+                pdf.cell(25, 8, '(kWh)', border=1, align='C')
+                pdf.cell(25, 8, '(kWh)', border=1, align='C')
+                pdf.cell(15, 8, '', border=1, align='C')  # Border for Missing Info column
                 pdf.ln()
             
-            # Reset font to table data font after headers
-            pdf.set_font('Arial', '', 8)  # Single-source table content font size
+            # Reset font to table data font after headers (one call per header block)
+            pdf.set_font('Arial', '', 8)
         
         # Add initial table headers
         add_table_headers()
         
-        # Set table content font size based on source type
-        is_dual_source = data.get('enable_iex') and data.get('enable_cpp')
+        # Multi-source rows on the first table page use font size 9; headers leave size 8 set for the rest
         if is_dual_source:
-            pdf.set_font('Arial', '', 9)  # Multi-source: table content font size 9
-        else:
-            pdf.set_font('Arial', '', 8)  # Single-source: table content font size 8
-        
-        table_complete = False  # Flag to track if table data is finished
+            pdf.set_font('Arial', '', 9)
         
-        # Helper function for proper rounding (≥0.5 rounds up) to avoid scope issues
-        def round_excess(value):
-            return int(value + 0.5) if value >= 0 else int(value - 0.5)
-        
-        for idx, row in pdf_data.iterrows():
-            # Check if we need a new page (leaving space for summary)
-            if pdf.get_y() > 250:  # Near bottom of page
+        if is_dual_source:
+            col_widths = (16, 20, 12, 18, 18, 16, 18, 16, 18, 12)
+            row_columns = ('Slot_Date', 'Slot_Time', 'TOD_Category', 'Energy_kWh_cons', 'IEX_After_Loss',
+                           'IEX_Excess', 'CPP_After_Loss', 'CPP_Excess', 'Total_Excess', 'Missing_Info')
+
+            # Sequential adjustment table data; energy values are rounded instead of decimals
+            rounded_columns = ('Energy_kWh_cons', 'IEX_After_Loss', 'IEX_Excess', 'CPP_After_Loss',
+                               'CPP_Excess', 'Total_Excess')
+            decimal_columns = ()
+            missing_chars = 3  # Truncate missing info
+        else:
+            col_widths = (20, 25, 15, 25, 25, 25, 15)
+            row_columns = ('Slot_Date', 'Slot_Time', 'TOD_Category', 'After_Loss', 'Energy_kWh_cons',
+                           'Total_Excess', 'Missing_Info')
+
+            # Standard table data for single source
+            rounded_columns = ('Total_Excess',)
+            decimal_columns = ('After_Loss', 'Energy_kWh_cons')
+            missing_chars = 4
+
+        # Iterate raw column arrays rather than boxing every row into a Series; column presence is
+        # checked once, and absent energy columns become float zeros so they format like real data
+        text_columns = ('TOD_Category', 'Missing_Info')
+        column_arrays = {
+            col: pdf_data[col].to_numpy() if col in pdf_data.columns
+            else np.full(len(pdf_data), '', dtype=object) if col in text_columns
+            else np.zeros(len(pdf_data))
+            for col in row_columns
+        }
+        # Format the cells in vectorised passes (text columns once per distinct value)
+        # so the row loop only emits strings
+        for col in rounded_columns:
+            column_arrays[col] = _format_rounded_kwh(column_arrays[col])
+        for col in decimal_columns:
+            column_arrays[col] = np.char.mod('%.2f', column_arrays[col].astype(float))
+        # Slot labels are already text; blank the missing ones with one mask per column
+        for col in ('Slot_Date', 'Slot_Time'):
+            values = column_arrays[col]
+            column_arrays[col] = np.where(pd.isna(values), '', values.astype(str))
+        # Missing_Info is a Categorical, so factorising works on its codes and each label is cut once
+        missing_info = pdf_data['Missing_Info'].array if 'Missing_Info' in pdf_data.columns else column_arrays['Missing_Info']
+        column_arrays['Missing_Info'] = _format_distinct(missing_info, lambda m: m[:missing_chars])
+        def rows_fitting_on_page():
+            # Rows are drawn while the cursor is above y=250, leaving space for the summary
+            y, count = pdf.get_y(), 0
+            while y <= 250:
+                y += 7
+                count += 1
+            return count
+
+        # Build the row writer once; the column layout was fixed above, so the loop carries no per-row lookups
+        write_row = pdf.row_writer(col_widths, 7)
+        # Emit the table one page-sized chunk at a time instead of testing the cursor per row
+        rows = zip(*(column_arrays[col] for col in row_columns))
+        remaining_rows = len(pdf_data)
+        while remaining_rows:
+            page_capacity = rows_fitting_on_page()
+            if page_capacity == 0:
                 pdf.add_page()
-                # Only add headers if we're still in the table data section
-                if not table_complete:
-                    add_table_headers()  # Add headers on new page only for table data
-            
-            if is_dual_source:
-                # Sequential adjustment table data with adjusted column widths
-                pdf.cell(16, 7, safe_date_str(row['Slot_Date']), 1, 0, 'C')
-                pdf.cell(20, 7, format_time(row['Slot_Time']), 1, 0, 'C')  # Increased time column width
-                
-                tod_cat = row.get('TOD_Category', '')
-                pdf.cell(12, 7, tod_cat, 1, 0, 'C')
-                
-                pdf.cell(18, 7, f"{round_excess(row['Energy_kWh_cons'])}", 1, 0, 'C')
-                pdf.cell(18, 7, f"{round_excess(row.get('IEX_After_Loss', 0))}", 1, 0, 'C')
-                # Show rounded excess values instead of decimals
-                iex_excess_rounded = round_excess(row.get('IEX_Excess', 0))
-                pdf.cell(16, 7, f"{iex_excess_rounded}", 1, 0, 'C')
-                pdf.cell(18, 7, f"{round_excess(row.get('CPP_After_Loss', 0))}", 1, 0, 'C')
-                cpp_excess_rounded = round_excess(row.get('CPP_Excess', 0))
-                pdf.cell(16, 7, f"{cpp_excess_rounded}", 1, 0, 'C')
-                total_excess_rounded = round_excess(row['Total_Excess'])
-                pdf.cell(18, 7, f"{total_excess_rounded}", 1, 0, 'C')
-                pdf.cell(12, 7, row.get('Missing_Info', '')[:3], 1, 0, 'C')  # Truncate missing info
-            else:
-                # Standard table data for single source
-                pdf.cell(20, 7, safe_date_str(row['Slot_Date']), 1, 0, 'C')
-                pdf.cell(25, 7, format_time(row['Slot_Time']), 1, 0, 'C')  # Increased time column width
-                
-                tod_cat = row.get('TOD_Category', '')
-                pdf.cell(15, 7, tod_cat, 1, 0, 'C')
-                
-                pdf.cell(25, 7, f"{row['After_Loss']:.2f}", 1, 0, 'C')
-                pdf.cell(25, 7, f"{row['Energy_kWh_cons']:.2f}", 1, 0, 'C')
-                # Show rounded excess values instead of decimals
-                total_excess_rounded = round_excess(row['Total_Excess'])
-                pdf.cell(25, 7, f"{total_excess_rounded}", 1, 0, 'C')
-                pdf.cell(15, 7, row.get('Missing_Info', '')[:4], 1, 0, 'C')
-            
-            pdf.ln()
-        
-        # Mark table as complete - no more headers needed for subsequent pages
-        table_complete = True
+                add_table_headers()  # Pages broken inside the table repeat its headers
+                continue
+            for values in islice(rows, page_capacity):
+                write_row(values)
+            remaining_rows -= min(page_capacity, remaining_rows)
         
         pdf.ln(2)
         
@@ -2484,10 +2648,6 @@ def generate_detailed_pdf(data, pdf_data, pdf_type):
         pdf.cell(0, 10, 'DETAILED CALCULATION SUMMARY:', ln=True)
         pdf.set_font('Arial', '', 11)
         
-        # Helper function for proper rounding (≥0.5 rounds up) to match table values
-        def round_kwh_summary(value):
-            return int(value + 0.5) if value >= 0 else int(value - 0.5)
-        
         # Calculate totals
         total_excess = data['total_excess']
         total_consumed = data['total_consumed']
@@ -2496,20 +2656,20 @@ def generate_detailed_pdf(data, pdf_data, pdf_type):
         # Enhanced summary for sequential adjustment
         if is_dual_source:
             # Sequential adjustment summary - use rounded totals from table data for precision
-            total_iex_before_loss = data.get('merged_all', pdf_data)['IEX_Energy_kWh'].sum()
-            total_cpp_before_loss = data.get('merged_all', pdf_data)['CPP_Energy_kWh'].sum()
-            total_iex_after_loss = data.get('merged_all', pdf_data)['IEX_After_Loss'].sum()
-            total_cpp_after_loss = data.get('merged_all', pdf_data)['CPP_After_Loss'].sum()
-            total_iex_excess = data.get('merged_all', pdf_data)['IEX_Excess'].sum()
-            total_cpp_excess = data.get('merged_all', pdf_data)['CPP_Excess'].sum()
+            # One reduction over the six source columns instead of a lookup and scan per total
+            source_totals = data.get('merged_all', pdf_data)[
+                ['IEX_Energy_kWh', 'CPP_Energy_kWh', 'IEX_After_Loss', 'CPP_After_Loss', 'IEX_Excess', 'CPP_Excess']
+            ].sum()
+            total_iex_before_loss = source_totals['IEX_Energy_kWh']
+            total_cpp_before_loss = source_totals['CPP_Energy_kWh']
+            total_iex_after_loss = source_totals['IEX_After_Loss']
+            total_cpp_after_loss = source_totals['CPP_After_Loss']
             
-            # Round all values
-            total_iex_before_loss_rounded = round_kwh_summary(total_iex_before_loss)
-            total_iex_after_loss_rounded = round_kwh_summary(total_iex_after_loss)
-            total_cpp_before_loss_rounded = round_kwh_summary(total_cpp_before_loss)
-            total_cpp_after_loss_rounded = round_kwh_summary(total_cpp_after_loss)
-            total_iex_excess_rounded = round_kwh_summary(total_iex_excess)
-            total_cpp_excess_rounded = round_kwh_summary(total_cpp_excess)
+            # Round all six totals in one vectorised pass (non-finite totals count as 0, as in _round_kwh_half_up)
+            (total_iex_before_loss_rounded, total_cpp_before_loss_rounded,
+             total_iex_after_loss_rounded, total_cpp_after_loss_rounded,
+             total_iex_excess_rounded, total_cpp_excess_rounded) = _round_kwh(
+                source_totals.where(np.isfinite(source_totals), 0.0)).tolist()
             
             pdf.cell(0, 8, f'I.E.X Generation (before T&D loss): {total_iex_before_loss_rounded} kWh', ln=True)
             pdf.cell(0, 8, f'I.E.X Generation (after {data.get("t_and_d_loss", 0)}% T&D loss): {total_iex_after_loss_rounded} kWh', ln=True)
@@ -2524,9 +2684,9 @@ def generate_detailed_pdf(data, pdf_data, pdf_type):
             pdf.set_font('Arial', 'B', 11)
             pdf.cell(0, 8, 'TOTAL CALCULATIONS:', ln=True)
             pdf.set_font('Arial', '', 11)
-            total_generation_before_rounded = round_kwh_summary(total_iex_before_loss + total_cpp_before_loss)
-            total_generation_after_rounded = round_kwh_summary(total_iex_after_loss + total_cpp_after_loss)
-            total_consumed_rounded = round_kwh_summary(total_consumed)
+            total_generation_before_rounded = _round_kwh_half_up(total_iex_before_loss + total_cpp_before_loss)
+            total_generation_after_rounded = _round_kwh_half_up(total_iex_after_loss + total_cpp_after_loss)
+            total_consumed_rounded = _round_kwh_half_up(total_consumed)
             total_excess_rounded = total_iex_excess_rounded + total_cpp_excess_rounded
             
             pdf.cell(0, 8, f'Total Generation (before loss): {total_generation_before_rounded} kWh', ln=True)
@@ -2535,9 +2695,9 @@ def generate_detailed_pdf(data, pdf_data, pdf_type):
             pdf.cell(0, 8, f'Total Excess Energy (rounded): {total_excess_rounded} kWh', ln=True)
         else:
             # Single source summary
-            total_excess_rounded = round_kwh_summary(total_excess)
-            total_consumed_rounded = round_kwh_summary(total_consumed)
-            total_generated_after_loss_rounded = round_kwh_summary(total_generated_after_loss)
+            total_excess_rounded = _round_kwh_half_up(total_excess)
+            total_consumed_rounded = _round_kwh_half_up(total_consumed)
+            total_generated_after_loss_rounded = _round_kwh_half_up(total_generated_after_loss)
             
             if data.get('enable_iex'):
                 pdf.cell(0, 8, f'I.E.X Generation (after {data.get("t_and_d_loss", 0)}% T&D loss): {total_generated_after_loss_rounded} kWh', ln=True)
@@ -2551,52 +2711,8 @@ def generate_detailed_pdf(data, pdf_data, pdf_type):
         pdf.cell(0, 8, f'Unique Days Used (Consumed): {data["unique_days_cons"]}', ln=True)
         pdf.cell(0, 8, f'Status: {data["excess_status"]}', ln=True)
         
-        # Check if we need a new page for TOD breakdown
-        if pdf.get_y() > 220:
-            pdf.add_page()
-        
         # Add TOD-wise excess energy breakdown
-        pdf.ln(5)
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'TOD-wise Excess Energy Breakdown:', ln=True)
-        pdf.set_font('Arial', 'B', 10)
-        pdf.cell(20, 10, 'TOD', 1)
-        pdf.cell(50, 10, 'Excess Energy (kWh)', 1)
-        pdf.ln()
-        
-        pdf.set_font('Arial', '', 10)
-        
-        # Calculate TOD-wise excess from the dataframe
-        tod_excess = pdf_data.groupby('TOD_Category')['Total_Excess'].sum().reset_index()
-        
-        # Calculate C category total (sum of C1, C2, C4, C5)
-        c_categories = ['C1', 'C2', 'C4', 'C5']
-        c_total = 0
-        tod_values = {}
-        
-        for _, row in tod_excess.iterrows():
-            category = row['TOD_Category']
-            excess_rounded = round_kwh_summary(row['Total_Excess'])
-            tod_values[category] = excess_rounded
-            if category in c_categories:
-                c_total += excess_rounded
-        
-        # Display C total first
-        pdf.cell(20, 10, 'C', 1)
-        pdf.cell(50, 10, f"{c_total}", 1)
-        pdf.ln()
-        
-        # Display individual categories
-        for category in ['C1', 'C2', 'C4', 'C5']:
-            if category in tod_values:
-                pdf.cell(20, 10, category, 1)
-                pdf.cell(50, 10, f"{tod_values[category]}", 1)
-                pdf.ln()
-        
-        if 'Unknown' in tod_values:
-            pdf.cell(20, 10, 'Unknown', 1)
-            pdf.cell(50, 10, f"{tod_values['Unknown']}", 1)
-            pdf.ln()
+        _add_tod_breakdown(pdf, _tod_excess_totals(data, pdf_data, excess_only=pdf_type == 'excess'))
         
         # Add financial calculations (using pre-calculated values from data processing)
         pdf.add_page()
@@ -2604,96 +2720,43 @@ def generate_detailed_pdf(data, pdf_data, pdf_type):
         pdf.cell(0, 10, 'Financial Calculations:', ln=True)
         pdf.set_font('Arial', '', 10)
         
-        # Use pre-calculated financial values if available, otherwise calculate on the fly
-        additional_surcharge = 0.0
-        additional_surcharge_breakdown = []
-        if 'total_excess_financial_rounded' in data:
-            total_excess_financial_rounded = data['total_excess_financial_rounded']
-            base_rate = data['base_rate']
-            c1_c2_rate = data.get('tariff_c1_c2_rate', c1_c2_rate)
-            c5_rate = data.get('tariff_c5_rate', c5_rate)
-            cross_subsidy_rate = data.get('tariff_cross_subsidy_rate', cross_subsidy_rate)
-            wheeling_rate = data.get('tariff_wheeling_rate', wheeling_rate)
-            base_amount = data['base_amount']
-            c1_c2_excess = data['c1_c2_excess']
-            c1_c2_additional = data['c1_c2_additional']
-            c5_excess = data['c5_excess']
-            c5_additional = data['c5_additional']
-            total_amount = data['total_amount']
-            etax = data['etax']
-            total_with_etax = data['total_with_etax']
-            iex_excess_financial = data['iex_excess_financial']
-            etax_on_iex = data['etax_on_iex']
-            cross_subsidy_surcharge = data['cross_subsidy_surcharge']
-            additional_surcharge = data.get('additional_surcharge', 0.0)
-            additional_surcharge_breakdown = data.get('additional_surcharge_breakdown', [])
-            wheeling_charges = data['wheeling_charges']
-            wheeling_reference_kwh = data.get('wheeling_reference_kwh', 0.0)
-            wheeling_combined_kwh = data.get('wheeling_combined_kwh', total_excess_financial_rounded + wheeling_reference_kwh)
-            wheeling_reduction_kwh = data.get('wheeling_reduction_kwh', wheeling_combined_kwh * WHEELING_PERCENT)
-            final_amount = data['final_amount']
-            final_amount_rounded = data['final_amount_rounded']
-        else:
-            # Calculate on the fly (fallback)
-            total_excess_financial_rounded = round_kwh_summary(total_excess)
-            base_rate = tariff_rates['base_rate']
-            c1_c2_rate = tariff_rates['c1_c2_rate']
-            c5_rate = tariff_rates['c5_rate']
-            cross_subsidy_rate = tariff_rates['cross_subsidy_rate']
-            wheeling_rate = tariff_rates['wheeling_rate']
-            base_amount = total_excess_financial_rounded * base_rate
-            c1_c2_excess = tod_values.get('C1', 0) + tod_values.get('C2', 0)
-            c1_c2_additional = c1_c2_excess * c1_c2_rate
-            c5_excess = tod_values.get('C5', 0)
-            c5_additional = c5_excess * c5_rate
-            total_amount = base_amount + c1_c2_additional + c5_additional
-            etax = total_amount * 0.05
-            total_with_etax = total_amount + etax
-
-            # Calculate IEX excess for specific charges
-            iex_excess_financial_raw = 0
-            if 'IEX_Excess' in pdf_data.columns:
-                iex_excess_financial_raw = pdf_data['IEX_Excess'].sum()
-            elif data.get('enable_iex') and not data.get('enable_cpp'):
-                iex_excess_financial_raw = total_excess
-
-            iex_excess_financial = round_kwh_summary(iex_excess_financial_raw)
-            etax_on_iex = total_excess_financial_rounded * 0.1
-            cross_subsidy_surcharge = iex_excess_financial * cross_subsidy_rate
-
-            additional_surcharge, additional_surcharge_breakdown, additional_surcharge_rate, additional_surcharge_period_label, additional_surcharge_note = calculate_monthly_additional_surcharge(
-                data.get('month'),
-                data.get('year'),
-                iex_excess_financial_raw,
-                iex_excess_financial,
-            )
-
-            wheeling_components = compute_wheeling_components(
-                total_excess_financial_rounded,
-                data.get('t_and_d_loss', 0.0),
-            )
-            wheeling_reference_kwh = wheeling_components['reference_kwh']
-            wheeling_combined_kwh = wheeling_components['combined_kwh']
-            wheeling_reduction_kwh = wheeling_components['reduction_kwh']
-            wheeling_adjusted_kwh = wheeling_components['adjusted_kwh']
-            wheeling_charges = wheeling_adjusted_kwh * wheeling_rate
-
-            final_amount = total_with_etax - (etax_on_iex + cross_subsidy_surcharge + wheeling_charges + additional_surcharge)
-            final_amount_rounded = math.ceil(final_amount)
+        # Every financial figure is computed once in process_energy_data
+        total_excess_financial_rounded = data['total_excess_financial_rounded']
+        base_amount = data['base_amount']
+        c1_c2_excess = data['c1_c2_excess']
+        c1_c2_additional = data['c1_c2_additional']
+        c5_excess = data['c5_excess']
+        c5_additional = data['c5_additional']
+        total_amount = data['total_amount']
+        etax = data['etax']
+        total_with_etax = data['total_with_etax']
+        iex_excess_financial = data['iex_excess_financial']
+        etax_on_iex = data['etax_on_iex']
+        cross_subsidy_surcharge = data['cross_subsidy_surcharge']
+        additional_surcharge = data.get('additional_surcharge', 0.0)
+        additional_surcharge_breakdown = data.get('additional_surcharge_breakdown', [])
+        wheeling_charges = data['wheeling_charges']
+        wheeling_reference_kwh = data.get('wheeling_reference_kwh', 0.0)
+        wheeling_combined_kwh = data.get('wheeling_combined_kwh', total_excess_financial_rounded + wheeling_reference_kwh)
+        wheeling_reduction_kwh = data.get('wheeling_reduction_kwh', wheeling_combined_kwh * WHEELING_PERCENT)
+        final_amount = data['final_amount']
+        final_amount_rounded = data['final_amount_rounded']
 
         # Display the financial calculations with proper formatting
-        pdf.cell(0, 8, f"1. Base Rate: Total Excess Energy ({total_excess_financial_rounded} kWh) x Rs.{base_rate:.4f} = Rs.{base_amount:.2f}", ln=True)
-        pdf.cell(0, 8, f"2. C1+C2 Additional: Excess in C1+C2 ({c1_c2_excess} kWh) x Rs.{c1_c2_rate:.4f} = Rs.{c1_c2_additional:.2f}", ln=True)
-        pdf.cell(0, 8, f"3. C5 Additional: Excess in C5 ({c5_excess} kWh) x Rs.{c5_rate:.4f} = Rs.{c5_additional:.2f}", ln=True)
-        pdf.cell(0, 8, f"4. Partial Total: Rs.{base_amount:.2f} + Rs.{c1_c2_additional:.2f} + Rs.{c5_additional:.2f} = Rs.{total_amount:.2f}", ln=True)
-        pdf.cell(0, 8, f"5. E-Tax (5% of Partial Total): Rs.{total_amount:.2f} x 0.05 = Rs.{etax:.2f}", ln=True)
-        pdf.cell(0, 8, f"6. Subtotal with E-Tax: Rs.{total_amount:.2f} + Rs.{etax:.2f} = Rs.{total_with_etax:.2f}", ln=True)
-        pdf.cell(0, 8, f"7. Less: E-Tax on IEX: Total Excess ({total_excess_financial_rounded} kWh) x Rs.0.1 = Rs.{etax_on_iex:.2f}", ln=True)
-        pdf.cell(0, 8, f"8. Less: Cross Subsidy Surcharge: IEX Excess ({iex_excess_financial} kWh) x Rs.{cross_subsidy_rate:.4f} = Rs.{cross_subsidy_surcharge:.2f}", ln=True)
-        pdf.cell(0, 8, f"8a. Less: Additional Surcharge (IEX): Rs.{additional_surcharge:.2f}", ln=True)
-        pdf.cell(0, 8, f"9. Wheeling Reference: Total Excess ({total_excess_financial_rounded} kWh) + Rounded Loss ({wheeling_reference_kwh:.2f} kWh) = {wheeling_combined_kwh:.2f} kWh", ln=True)
-        pdf.cell(0, 8, f"9a. Less 2.34%: {wheeling_combined_kwh:.2f} kWh × 2.34% = {wheeling_reduction_kwh:.2f} kWh", ln=True)
-        pdf.cell(0, 8, f"9b. Wheeling Charges: ({wheeling_combined_kwh:.2f} - {wheeling_reduction_kwh:.2f}) kWh × Rs.{wheeling_rate:.4f} = Rs.{wheeling_charges:.2f}", ln=True)
+        pdf.write_lines(8, [
+            f"1. Base Rate: Total Excess Energy ({total_excess_financial_rounded} kWh) x Rs.{base_rate:.4f} = Rs.{base_amount:.2f}",
+            f"2. C1+C2 Additional: Excess in C1+C2 ({c1_c2_excess} kWh) x Rs.{c1_c2_rate:.4f} = Rs.{c1_c2_additional:.2f}",
+            f"3. C5 Additional: Excess in C5 ({c5_excess} kWh) x Rs.{c5_rate:.4f} = Rs.{c5_additional:.2f}",
+            f"4. Partial Total: Rs.{base_amount:.2f} + Rs.{c1_c2_additional:.2f} + Rs.{c5_additional:.2f} = Rs.{total_amount:.2f}",
+            f"5. E-Tax (5% of Partial Total): Rs.{total_amount:.2f} x 0.05 = Rs.{etax:.2f}",
+            f"6. Subtotal with E-Tax: Rs.{total_amount:.2f} + Rs.{etax:.2f} = Rs.{total_with_etax:.2f}",
+            f"7. Less: E-Tax on IEX: Total Excess ({total_excess_financial_rounded} kWh) x Rs.0.1 = Rs.{etax_on_iex:.2f}",
+            f"8. Less: Cross Subsidy Surcharge: IEX Excess ({iex_excess_financial} kWh) x Rs.{cross_subsidy_rate:.4f} = Rs.{cross_subsidy_surcharge:.2f}",
+            f"8a. Less: Additional Surcharge (IEX): Rs.{additional_surcharge:.2f}",
+            f"9. Wheeling Reference: Total Excess ({total_excess_financial_rounded} kWh) + Rounded Loss ({wheeling_reference_kwh:.2f} kWh) = {wheeling_combined_kwh:.2f} kWh",
+            f"9a. Less 2.34%: {wheeling_combined_kwh:.2f} kWh × 2.34% = {wheeling_reduction_kwh:.2f} kWh",
+            f"9b. Wheeling Charges: ({wheeling_combined_kwh:.2f} - {wheeling_reduction_kwh:.2f}) kWh × Rs.{wheeling_rate:.4f} = Rs.{wheeling_charges:.2f}",
+        ])
         # If breakdown available, print details per date-range
         if additional_surcharge_breakdown:
             for entry in additional_surcharge_breakdown:
@@ -2713,23 +2776,18 @@ def generate_detailed_pdf(data, pdf_data, pdf_type):
             
         # Calculate deductions total for clarity (include Additional Surcharge)
         deductions_total = etax_on_iex + cross_subsidy_surcharge + wheeling_charges + additional_surcharge
-        pdf.cell(0, 8, f"10a. Total Amount to be Collected - Step 1:", ln=True)
-        pdf.cell(0, 8, f"     Rs.{total_with_etax:.2f} - (Rs.{etax_on_iex:.2f} + Rs.{cross_subsidy_surcharge:.2f} + Rs.{wheeling_charges:.2f} + Rs.{additional_surcharge:.2f})", ln=True)
-        pdf.cell(0, 8, f"10b. Total Amount to be Collected - Step 2:", ln=True)
-        pdf.cell(0, 8, f"     Rs.{total_with_etax:.2f} - Rs.{deductions_total:.2f} = Rs.{final_amount:.2f}", ln=True)
+        pdf.write_lines(8, [
+            f"10a. Total Amount to be Collected - Step 1:",
+            f"     Rs.{total_with_etax:.2f} - (Rs.{etax_on_iex:.2f} + Rs.{cross_subsidy_surcharge:.2f} + Rs.{wheeling_charges:.2f} + Rs.{additional_surcharge:.2f})",
+            f"10b. Total Amount to be Collected - Step 2:",
+            f"     Rs.{total_with_etax:.2f} - Rs.{deductions_total:.2f} = Rs.{final_amount:.2f}",
+        ])
 
         # Round up final amount to next highest value
         pdf.set_font('Arial', 'B', 10)  # Consistent with table data font size
         pdf.cell(0, 8, f"11. Final Amount (Rounded Up): Rs.{final_amount_rounded}", ln=True)
 
-        # Generate PDF bytes
-        pdf_output = io.BytesIO()
-        pdf_bytes = pdf.output(dest='S')
-        if isinstance(pdf_bytes, str):
-            pdf_bytes = pdf_bytes.encode('latin1')
-        pdf_output.write(pdf_bytes)
-        pdf_output.seek(0)
-        return pdf_output.getvalue()
+        return pdf.output_bytes()
 
     except Exception as e:
         st.error(f"Error generating detailed PDF: {str(e)}")
@@ -2754,47 +2812,9 @@ def generate_daywise_pdf(data, pdf_data):
         c5_rate = data.get('tariff_c5_rate', tariff_rates['c5_rate'])
         cross_subsidy_rate = data.get('tariff_cross_subsidy_rate', tariff_rates['cross_subsidy_rate'])
         wheeling_rate = data.get('tariff_wheeling_rate', tariff_rates['wheeling_rate'])
-
-        def round_kwh_summary(value):
-            try:
-                value = float(value)
-            except Exception:
-                value = 0.0
-            return int(value + 0.5) if value >= 0 else int(value - 0.5)
-        
-        pdf = AuthorPDF()
-        pdf.set_margins(20, 20, 20)
-        pdf.set_auto_page_break(auto=True, margin=20)
-        pdf.add_page()
         
         # FIRST PAGE - DESCRIPTION AND INFORMATION ONLY
-        pdf.set_font('Arial', 'B', 16)
-        pdf.cell(0, 15, 'Energy Adjustment Day-wise Summary Report', ln=True, align='C')
-        pdf.ln(10)
-        
-        # Consumer Information Section
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Consumer Information:', ln=True)
-        pdf.set_font('Arial', '', 12)
-        pdf.cell(0, 8, f"Consumer Number: {data['consumer_number']}", ln=True)
-        pdf.cell(0, 8, f"Consumer Name: {data['consumer_name']}", ln=True)
-        pdf.cell(0, 8, f"Multiplication Factor (Consumed Energy): {data.get('multiplication_factor', 1)}", ln=True)
-        pdf.cell(0, 8, f"Tariff: {tariff_selection} ({tariff_rates.get('window_label', 'Latest')})", ln=True)
-        pdf.ln(5)
-        
-        # Technical Parameters Section
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Technical Parameters:', ln=True)
-        pdf.set_font('Arial', '', 12)
-        
-        if data.get('enable_iex') and data.get('enable_cpp'):
-            pdf.cell(0, 8, f"I.E.X T&D Loss (%): {data.get('t_and_d_loss', 0)}", ln=True)
-            pdf.cell(0, 8, f"C.P.P T&D Loss (%): {data.get('cpp_t_and_d_loss', 0)}", ln=True)
-        elif data.get('enable_iex'):
-            pdf.cell(0, 8, f"I.E.X T&D Loss (%): {data.get('t_and_d_loss', 0)}", ln=True)
-        elif data.get('enable_cpp'):
-            pdf.cell(0, 8, f"C.P.P T&D Loss (%): {data.get('cpp_t_and_d_loss', 0)}", ln=True)
-        pdf.ln(5)
+        pdf = _new_report_pdf(data, 'Energy Adjustment Day-wise Summary Report', tariff_selection, tariff_rates)
         
         # Report Information Section
         pdf.set_font('Arial', 'B', 14)
@@ -2847,32 +2867,31 @@ def generate_daywise_pdf(data, pdf_data):
         pdf.ln()
         
         # Calculate day-wise data
+        # Named aggregation lands the generation sum directly in Total_After_Loss (keyed by Slot_Date)
         if data.get('enable_iex') and data.get('enable_cpp'):
-            daywise = pdf_data.groupby('Slot_Date').agg({
-                'IEX_After_Loss': 'sum',
-                'CPP_After_Loss': 'sum',
-                'Energy_kWh_cons': 'sum',
-                'Total_Excess': 'sum'
-            }).reset_index()
-            daywise['Total_After_Loss'] = daywise['IEX_After_Loss'] + daywise['CPP_After_Loss']
+            daywise = pdf_data.groupby('Slot_Date').agg(
+                Total_After_Loss=('IEX_After_Loss', 'sum'),
+                CPP_After_Loss=('CPP_After_Loss', 'sum'),
+                Energy_kWh_cons=('Energy_kWh_cons', 'sum'),
+                Total_Excess=('Total_Excess', 'sum'),
+            )
+            daywise['Total_After_Loss'] += daywise.pop('CPP_After_Loss')
         else:
-            daywise = pdf_data.groupby('Slot_Date').agg({
-                'After_Loss': 'sum',
-                'Energy_kWh_cons': 'sum',
-                'Total_Excess': 'sum'
-            }).reset_index()
-            daywise['Total_After_Loss'] = daywise['After_Loss']
+            daywise = pdf_data.groupby('Slot_Date').agg(
+                Total_After_Loss=('After_Loss', 'sum'),
+                Energy_kWh_cons=('Energy_kWh_cons', 'sum'),
+                Total_Excess=('Total_Excess', 'sum'),
+            )
         
         pdf.set_font('Arial', '', 8)
-        for _, row in daywise.iterrows():
-            pdf.cell(date_col_width, 10, str(row['Slot_Date']), 1)
-            pdf.cell(other_col_width, 10, f"{row['Total_After_Loss']:.4f}", 1)
-            pdf.cell(other_col_width, 10, f"{row['Energy_kWh_cons']:.4f}", 1)
-
-            # Round excess values for display
-            total_excess_rounded = int(row['Total_Excess'] + 0.5) if row['Total_Excess'] >= 0 else int(row['Total_Excess'] - 0.5)
-            pdf.cell(other_col_width, 10, f"{total_excess_rounded}", 1)
-            pdf.ln()
+        write_row = pdf.row_writer((date_col_width, other_col_width, other_col_width, other_col_width), 10, align='')
+        # Excess values are rounded for display
+        for texts in zip(
+                daywise.index.astype(str).to_numpy(),
+                np.char.mod('%.4f', daywise['Total_After_Loss'].to_numpy(dtype=float)),
+                np.char.mod('%.4f', daywise['Energy_kWh_cons'].to_numpy(dtype=float)),
+                _format_rounded_kwh(daywise['Total_Excess'])):
+            write_row(texts)
         
         # Add same calculation summary as detailed PDF
         pdf.ln(10)
@@ -2880,17 +2899,13 @@ def generate_daywise_pdf(data, pdf_data):
         pdf.cell(0, 10, 'DETAILED CALCULATION SUMMARY:', ln=True)
         pdf.set_font('Arial', '', 11)
         
-        # Helper function for proper rounding
-        def round_kwh(value):
-            return int(value + 0.5) if value >= 0 else int(value - 0.5)
-        
         # Include same financial calculations as detailed PDF
         total_excess = data['total_excess']
-        total_excess_rounded = round_kwh(total_excess)
+        total_excess_rounded = _round_kwh_half_up(total_excess)
         total_consumed = data['total_consumed']
-        total_consumed_rounded = round_kwh(total_consumed)
+        total_consumed_rounded = _round_kwh_half_up(total_consumed)
         total_generated_after_loss = data['total_generated_after_loss']
-        total_generated_after_loss_rounded = round_kwh(total_generated_after_loss)
+        total_generated_after_loss_rounded = _round_kwh_half_up(total_generated_after_loss)
         
         # Basic summary
         pdf.cell(0, 8, f'Total Generated (after loss): {total_generated_after_loss_rounded} kWh', ln=True)
@@ -2900,52 +2915,8 @@ def generate_daywise_pdf(data, pdf_data):
         pdf.cell(0, 8, f'Unique Days Used (Consumed): {data["unique_days_cons"]}', ln=True)
         pdf.cell(0, 8, f'Status: {data["excess_status"]}', ln=True)
         
-        # Check if we need a new page for TOD breakdown
-        if pdf.get_y() > 220:
-            pdf.add_page()
-        
         # Add TOD-wise excess energy breakdown
-        pdf.ln(5)
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'TOD-wise Excess Energy Breakdown:', ln=True)
-        pdf.set_font('Arial', 'B', 10)
-        pdf.cell(20, 10, 'TOD', 1)
-        pdf.cell(50, 10, 'Excess Energy (kWh)', 1)
-        pdf.ln()
-        
-        pdf.set_font('Arial', '', 10)
-        
-        # Calculate TOD-wise excess from the dataframe
-        tod_excess = pdf_data.groupby('TOD_Category')['Total_Excess'].sum().reset_index()
-        
-        # Calculate C category total (sum of C1, C2, C4, C5)
-        c_categories = ['C1', 'C2', 'C4', 'C5']
-        c_total = 0
-        tod_values = {}
-        
-        for _, row in tod_excess.iterrows():
-            category = row['TOD_Category']
-            excess_rounded = round_kwh(row['Total_Excess'])
-            tod_values[category] = excess_rounded
-            if category in c_categories:
-                c_total += excess_rounded
-        
-        # Display C total first
-        pdf.cell(20, 10, 'C', 1)
-        pdf.cell(50, 10, f"{c_total}", 1)
-        pdf.ln()
-        
-        # Display individual categories
-        for category in ['C1', 'C2', 'C4', 'C5']:
-            if category in tod_values:
-                pdf.cell(20, 10, category, 1)
-                pdf.cell(50, 10, f"{tod_values[category]}", 1)
-                pdf.ln()
-        
-        if 'Unknown' in tod_values:
-            pdf.cell(20, 10, 'Unknown', 1)
-            pdf.cell(50, 10, f"{tod_values['Unknown']}", 1)
-            pdf.ln()
+        _add_tod_breakdown(pdf, _tod_excess_totals(data, pdf_data))
         
         # Add financial calculations (using pre-calculated values from data processing)
         pdf.add_page()
@@ -2953,93 +2924,40 @@ def generate_daywise_pdf(data, pdf_data):
         pdf.cell(0, 10, 'Financial Calculations:', ln=True)
         pdf.set_font('Arial', '', 10)
 
-        if 'total_excess_financial_rounded' in data:
-            total_excess_financial_rounded = data['total_excess_financial_rounded']
-            base_rate = data['base_rate']
-            c1_c2_rate = data.get('tariff_c1_c2_rate', c1_c2_rate)
-            c5_rate = data.get('tariff_c5_rate', c5_rate)
-            cross_subsidy_rate = data.get('tariff_cross_subsidy_rate', cross_subsidy_rate)
-            wheeling_rate = data.get('tariff_wheeling_rate', wheeling_rate)
-            base_amount = data['base_amount']
-            c1_c2_excess = data['c1_c2_excess']
-            c1_c2_additional = data['c1_c2_additional']
-            c5_excess = data['c5_excess']
-            c5_additional = data['c5_additional']
-            total_amount = data['total_amount']
-            etax = data['etax']
-            total_with_etax = data['total_with_etax']
-            iex_excess_financial = data['iex_excess_financial']
-            etax_on_iex = data['etax_on_iex']
-            cross_subsidy_surcharge = data['cross_subsidy_surcharge']
-            wheeling_charges = data['wheeling_charges']
-            wheeling_reference_kwh = data.get('wheeling_reference_kwh', 0.0)
-            wheeling_combined_kwh = data.get('wheeling_combined_kwh', total_excess_financial_rounded + wheeling_reference_kwh)
-            wheeling_reduction_kwh = data.get('wheeling_reduction_kwh', wheeling_combined_kwh * WHEELING_PERCENT)
-            wheeling_adjusted_kwh = data.get('wheeling_adjusted_kwh', wheeling_combined_kwh - wheeling_reduction_kwh)
-            final_amount = data['final_amount']
-            final_amount_rounded = data['final_amount_rounded']
-        else:
-            total_excess_financial_rounded = round_kwh_summary(total_excess)
-            base_rate = tariff_rates['base_rate']
-            c1_c2_rate = tariff_rates['c1_c2_rate']
-            c5_rate = tariff_rates['c5_rate']
-            cross_subsidy_rate = tariff_rates['cross_subsidy_rate']
-            wheeling_rate = tariff_rates['wheeling_rate']
-            base_amount = total_excess_financial_rounded * base_rate
-            c1_c2_excess = tod_values.get('C1', 0) + tod_values.get('C2', 0)
-            c1_c2_additional = c1_c2_excess * c1_c2_rate
-            c5_excess = tod_values.get('C5', 0)
-            c5_additional = c5_excess * c5_rate
-            total_amount = base_amount + c1_c2_additional + c5_additional
-            etax = total_amount * 0.05
-            total_with_etax = total_amount + etax
-
-            iex_excess_financial_raw = 0
-            if data.get('enable_iex') and 'IEX_Excess' in pdf_data.columns:
-                iex_excess_financial_raw = pdf_data['IEX_Excess'].sum()
-            elif data.get('enable_iex') and not data.get('enable_cpp'):
-                iex_excess_financial_raw = total_excess
-
-            iex_excess_financial = round_kwh_summary(iex_excess_financial_raw)
-            etax_on_iex = total_excess_financial_rounded * 0.1
-            cross_subsidy_surcharge = iex_excess_financial * cross_subsidy_rate
-
-            additional_surcharge, additional_surcharge_breakdown, additional_surcharge_rate, additional_surcharge_period_label, additional_surcharge_note = calculate_monthly_additional_surcharge(
-                data.get('month'),
-                data.get('year'),
-                iex_excess_financial_raw,
-                iex_excess_financial,
-            )
-
-            wheeling_components = compute_wheeling_components(
-                total_excess_financial_rounded,
-                data.get('t_and_d_loss', 0.0),
-            )
-            wheeling_reference_kwh = wheeling_components['reference_kwh']
-            wheeling_combined_kwh = wheeling_components['combined_kwh']
-            wheeling_reduction_kwh = wheeling_components['reduction_kwh']
-            wheeling_adjusted_kwh = wheeling_components['adjusted_kwh']
-            wheeling_charges = wheeling_adjusted_kwh * wheeling_rate
-
-            final_amount = total_with_etax - (etax_on_iex + cross_subsidy_surcharge + wheeling_charges + additional_surcharge)
-            final_amount_rounded = math.ceil(final_amount)
-
-        line_gap = 1.8
-
-        def add_spaced_line(text, bold=False):
-            pdf.set_font('Arial', 'B' if bold else '', 10)
-            pdf.cell(0, 8, text, ln=True)
-            pdf.ln(line_gap)
-
-        add_spaced_line(f"1. Base Rate: Total Excess Energy ({total_excess_financial_rounded} kWh) x Rs.{base_rate:.4f} = Rs.{base_amount:.2f}")
-        add_spaced_line(f"2. C1+C2 Additional: Excess in C1+C2 ({c1_c2_excess} kWh) x Rs.{c1_c2_rate:.4f} = Rs.{c1_c2_additional:.2f}")
-        add_spaced_line(f"3. C5 Additional: Excess in C5 ({c5_excess} kWh) x Rs.{c5_rate:.4f} = Rs.{c5_additional:.2f}")
-        add_spaced_line(f"4. Partial Total: Rs.{total_amount:.2f}")
-        add_spaced_line(f"5. E-Tax (5%): Rs.{etax:.2f}")
-        add_spaced_line(f"6. Subtotal with E-Tax: Rs.{total_with_etax:.2f}")
-        add_spaced_line(f"7. Less: E-Tax on IEX: Rs.{etax_on_iex:.2f}")
-        add_spaced_line(f"8. Less: Cross Subsidy Surcharge: {iex_excess_financial} kWh x Rs.{cross_subsidy_rate:.4f} = Rs.{cross_subsidy_surcharge:.2f}")
-        add_spaced_line(f"8a. Less: Additional Surcharge (IEX): Rs.{additional_surcharge:.2f}")
+        # Every financial figure is computed once in process_energy_data
+        total_excess_financial_rounded = data['total_excess_financial_rounded']
+        base_amount = data['base_amount']
+        c1_c2_excess = data['c1_c2_excess']
+        c1_c2_additional = data['c1_c2_additional']
+        c5_excess = data['c5_excess']
+        c5_additional = data['c5_additional']
+        total_amount = data['total_amount']
+        etax = data['etax']
+        total_with_etax = data['total_with_etax']
+        iex_excess_financial = data['iex_excess_financial']
+        etax_on_iex = data['etax_on_iex']
+        cross_subsidy_surcharge = data['cross_subsidy_surcharge']
+        wheeling_charges = data['wheeling_charges']
+        wheeling_reference_kwh = data.get('wheeling_reference_kwh', 0.0)
+        wheeling_combined_kwh = data.get('wheeling_combined_kwh', total_excess_financial_rounded + wheeling_reference_kwh)
+        wheeling_reduction_kwh = data.get('wheeling_reduction_kwh', wheeling_combined_kwh * WHEELING_PERCENT)
+        final_amount = data['final_amount']
+        final_amount_rounded = data['final_amount_rounded']
+
+        # Each step keeps its 8 mm line plus the 1.8 mm gap as the multi_cell line height
+        line_h = 8 + 1.8
+
+        pdf.write_lines(line_h, [
+            f"1. Base Rate: Total Excess Energy ({total_excess_financial_rounded} kWh) x Rs.{base_rate:.4f} = Rs.{base_amount:.2f}",
+            f"2. C1+C2 Additional: Excess in C1+C2 ({c1_c2_excess} kWh) x Rs.{c1_c2_rate:.4f} = Rs.{c1_c2_additional:.2f}",
+            f"3. C5 Additional: Excess in C5 ({c5_excess} kWh) x Rs.{c5_rate:.4f} = Rs.{c5_additional:.2f}",
+            f"4. Partial Total: Rs.{total_amount:.2f}",
+            f"5. E-Tax (5%): Rs.{etax:.2f}",
+            f"6. Subtotal with E-Tax: Rs.{total_with_etax:.2f}",
+            f"7. Less: E-Tax on IEX: Rs.{etax_on_iex:.2f}",
+            f"8. Less: Cross Subsidy Surcharge: {iex_excess_financial} kWh x Rs.{cross_subsidy_rate:.4f} = Rs.{cross_subsidy_surcharge:.2f}",
+            f"8a. Less: Additional Surcharge (IEX): Rs.{additional_surcharge:.2f}",
+        ])
         if additional_surcharge_breakdown:
             for entry in additional_surcharge_breakdown:
                 if isinstance(entry, dict):
@@ -3058,76 +2976,49 @@ def generate_daywise_pdf(data, pdf_data):
                     except Exception:
                         continue
 
-        add_spaced_line(
-            f"9. Wheeling Reference: Total Excess ({total_excess_financial_rounded} kWh) + Rounded Loss ({wheeling_reference_kwh:.2f} kWh) = {wheeling_combined_kwh:.2f} kWh"
-        )
-        add_spaced_line(
-            f"9a. Less 2.34%: {wheeling_combined_kwh:.2f} kWh × 2.34% = {wheeling_reduction_kwh:.2f} kWh"
-        )
-        add_spaced_line(
-            f"9b. Wheeling Charges: ({wheeling_combined_kwh:.2f} - {wheeling_reduction_kwh:.2f}) kWh × Rs.{wheeling_rate:.4f} = Rs.{wheeling_charges:.2f}"
-        )
-
         deductions_total = etax_on_iex + cross_subsidy_surcharge + wheeling_charges + additional_surcharge
 
-        add_spaced_line(f"10. Final Amount: Rs.{total_with_etax:.2f} - Rs.{deductions_total:.2f} = Rs.{final_amount:.2f}", bold=True)
-        add_spaced_line(f"11. Final Amount (Rounded Up): Rs.{final_amount_rounded}", bold=True)
+        pdf.write_lines(line_h, [
+            f"9. Wheeling Reference: Total Excess ({total_excess_financial_rounded} kWh) + Rounded Loss ({wheeling_reference_kwh:.2f} kWh) = {wheeling_combined_kwh:.2f} kWh",
+            f"9a. Less 2.34%: {wheeling_combined_kwh:.2f} kWh × 2.34% = {wheeling_reduction_kwh:.2f} kWh",
+            f"9b. Wheeling Charges: ({wheeling_combined_kwh:.2f} - {wheeling_reduction_kwh:.2f}) kWh × Rs.{wheeling_rate:.4f} = Rs.{wheeling_charges:.2f}",
+        ])
+        pdf.set_font('Arial', 'B', 10)
+        pdf.write_lines(line_h, [
+            f"10. Final Amount: Rs.{total_with_etax:.2f} - Rs.{deductions_total:.2f} = Rs.{final_amount:.2f}",
+            f"11. Final Amount (Rounded Up): Rs.{final_amount_rounded}",
+        ])
 
-        # Generate PDF bytes
-        pdf_output = io.BytesIO()
-        pdf_bytes = pdf.output(dest='S')
-        if isinstance(pdf_bytes, str):
-            pdf_bytes = pdf_bytes.encode('latin1')
-        pdf_output.write(pdf_bytes)
-        pdf_output.seek(0)
-        return pdf_output.getvalue()
+        return pdf.output_bytes()
 
     except Exception as e:
         st.error(f"Error generating daywise PDF: {str(e)}")
         return None
 
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _generate_report_pdf(report_key, report_type, _data):
+    """Build one report PDF ('excess', 'all_slots' or 'daywise'), cached per processing run.
+
+    ``report_key`` identifies the submit that produced ``_data`` (left out of the cache key), so widget
+    reruns reuse the PDF bytes while a new submit lays the reports out afresh.
+    """
+    if report_type == 'daywise':
+        return generate_daywise_pdf(_data, _data['merged_all'])
+    pdf_data = _data['merged_excess'] if report_type == 'excess' else _data['merged_all']
+    return generate_detailed_pdf(_data, pdf_data, report_type)
+
 def generate_simple_pdf(data, pdf_type="excess"):
     """Generate a simple PDF report"""
     try:
-        pdf = AuthorPDF()
-        pdf.set_margins(20, 20, 20)
-        pdf.set_auto_page_break(auto=True, margin=20)
-        pdf.add_page()
-        
-        # Title
-        pdf.set_font('Arial', 'B', 16)
-        pdf.cell(0, 15, 'Energy Adjustment Report', ln=True, align='C')
-        pdf.ln(10)
-        
-        # Consumer Information
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Consumer Information:', ln=True)
-        pdf.set_font('Arial', '', 12)
-        pdf.cell(0, 8, f'Consumer Number: {data["consumer_number"]}', ln=True)
-        pdf.cell(0, 8, f'Consumer Name: {data["consumer_name"]}', ln=True)
-        pdf.cell(0, 8, f'Multiplication Factor: {data["multiplication_factor"]}', ln=True)
         tariff_selection = data.get('tariff_selection', TARIFF_OPTIONS[0])
         tariff_rates = data.get('tariff_rates') or resolve_tariff_rates(
             tariff_selection,
             data.get('month'),
             data.get('year'),
         )
-        pdf.cell(0, 8, f'Tariff: {tariff_selection} ({tariff_rates.get("window_label", "Latest")})', ln=True)
-        pdf.ln(5)
-        
-        # Technical Parameters
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Technical Parameters:', ln=True)
-        pdf.set_font('Arial', '', 12)
-        
-        if data['enable_iex'] and data['enable_cpp']:
-            pdf.cell(0, 8, f'I.E.X T&D Loss (%): {data["t_and_d_loss"]}', ln=True)
-            pdf.cell(0, 8, f'C.P.P T&D Loss (%): {data["cpp_t_and_d_loss"]}', ln=True)
-        elif data['enable_iex']:
-            pdf.cell(0, 8, f'I.E.X T&D Loss (%): {data["t_and_d_loss"]}', ln=True)
-        elif data['enable_cpp']:
-            pdf.cell(0, 8, f'C.P.P T&D Loss (%): {data["cpp_t_and_d_loss"]}', ln=True)
-        pdf.ln(5)
+        pdf = _new_report_pdf(data, 'Energy Adjustment Report', tariff_selection, tariff_rates,
+                              multiplication_label='Multiplication Factor')
         
         # Summary
         pdf.set_font('Arial', 'B', 14)
@@ -3148,12 +3039,7 @@ def generate_simple_pdf(data, pdf_type="excess"):
         if data.get('auto_detect_info'):
             pdf.cell(0, 8, f'Period: {data["auto_detect_info"]}', ln=True)
         
-        # Generate PDF bytes
-        pdf_bytes = pdf.output(dest='S')
-        if isinstance(pdf_bytes, str):
-            pdf_bytes = pdf_bytes.encode('latin1')
-        
-        return pdf_bytes
+        return pdf.output_bytes()
         
     except Exception as e:
         st.error(f"Error generating PDF: {str(e)}")
@@ -3372,7 +3258,7 @@ if submitted:
         try:
             # Process data with progress tracking
             with st.spinner("Processing uploaded files..."):
-                result = process_energy_data(
+                result = process_energy_data_cached(
                     generated_files, cpp_files, consumed_files,
                     enable_iex, enable_cpp, t_and_d_loss, cpp_t_and_d_loss,
                     consumer_number, consumer_name, multiplication_factor, tariff_selection,
@@ -3381,6 +3267,7 @@ if submitted:
                 
                 if result['success']:
                     st.session_state.processed_data = result['data']
+                    st.session_state.report_key = datetime.now().isoformat()
                     st.success("Data processed successfully!")
                 else:
                     st.session_state.error_message = result['error']
@@ -3422,191 +3309,72 @@ if st.session_state.processed_data:
     # Financial Calculations Display on Web Page
     st.subheader("💰 Financial Calculations")
     
-    # Helper function for consistent rounding throughout the application
-    def round_kwh_financial(value):
-        return int(value + 0.5) if value >= 0 else int(value - 0.5)
-    
-    # Check if financial calculation data is available
-    if 'total_excess_financial_rounded' in data:
-        col1, col2 = st.columns(2)
+    # Every financial figure is computed once in process_energy_data
+    col1, col2 = st.columns(2)
 
-        total_excess_financial_rounded = data['total_excess_financial_rounded']
-        additional_surcharge_value = data.get('additional_surcharge', 0.0)
-        additional_surcharge_rate = data.get('additional_surcharge_rate', 0.0)
-        additional_surcharge_period_label = data.get('additional_surcharge_period_label') or "Selected Period"
-        additional_surcharge_note = data.get('additional_surcharge_note', '')
-        additional_surcharge_kwh = data.get('additional_surcharge_kwh', data.get('iex_excess_financial', 0))
-
-        tariff_label = data.get('tariff_selection', TARIFF_OPTIONS[0])
-        tariff_window_label = data.get('tariff_window_label', '')
-        tariff_c1_c2_rate = data.get('tariff_c1_c2_rate', data.get('tariff_rates', {}).get('c1_c2_rate', 0))
-        tariff_c5_rate = data.get('tariff_c5_rate', data.get('tariff_rates', {}).get('c5_rate', 0))
-        tariff_cross_subsidy_rate = data.get('tariff_cross_subsidy_rate', data.get('tariff_rates', {}).get('cross_subsidy_rate', 0))
-        tariff_wheeling_rate = data.get('tariff_wheeling_rate', data.get('tariff_rates', {}).get('wheeling_rate', 0.0))
-        wheeling_reference = data.get('wheeling_reference_kwh', 0.0)
-        wheeling_combined = data.get('wheeling_combined_kwh', total_excess_financial_rounded + wheeling_reference)
-        wheeling_reduction = data.get('wheeling_reduction_kwh', wheeling_combined * WHEELING_PERCENT)
-        wheeling_adjusted = data.get('wheeling_adjusted_kwh', wheeling_combined - wheeling_reduction)
-
-        st.info(f"**Tariff Applied:** {tariff_label} ({tariff_window_label or 'Latest Tariff'})")
+    total_excess_financial_rounded = data['total_excess_financial_rounded']
+    additional_surcharge_value = data.get('additional_surcharge', 0.0)
+    additional_surcharge_rate = data.get('additional_surcharge_rate', 0.0)
+    additional_surcharge_period_label = data.get('additional_surcharge_period_label') or "Selected Period"
+    additional_surcharge_note = data.get('additional_surcharge_note', '')
+    additional_surcharge_kwh = data.get('additional_surcharge_kwh', data.get('iex_excess_financial', 0))
+
+    tariff_label = data.get('tariff_selection', TARIFF_OPTIONS[0])
+    tariff_window_label = data.get('tariff_window_label', '')
+    tariff_c1_c2_rate = data.get('tariff_c1_c2_rate', data.get('tariff_rates', {}).get('c1_c2_rate', 0))
+    tariff_c5_rate = data.get('tariff_c5_rate', data.get('tariff_rates', {}).get('c5_rate', 0))
+    tariff_cross_subsidy_rate = data.get('tariff_cross_subsidy_rate', data.get('tariff_rates', {}).get('cross_subsidy_rate', 0))
+    tariff_wheeling_rate = data.get('tariff_wheeling_rate', data.get('tariff_rates', {}).get('wheeling_rate', 0.0))
+    wheeling_reference = data.get('wheeling_reference_kwh', 0.0)
+    wheeling_combined = data.get('wheeling_combined_kwh', total_excess_financial_rounded + wheeling_reference)
+    wheeling_reduction = data.get('wheeling_reduction_kwh', wheeling_combined * WHEELING_PERCENT)
+    wheeling_adjusted = data.get('wheeling_adjusted_kwh', wheeling_combined - wheeling_reduction)
+
+    st.info(f"**Tariff Applied:** {tariff_label} ({tariff_window_label or 'Latest Tariff'})")
 
-        with col1:
-            st.write("**Positive Charges:**")
-            st.info(f"**Base Rate:** {data['total_excess_financial_rounded']} kWh × Rs.{data['base_rate']:.4f} = Rs.{data['base_amount']:.2f}")
-            st.info(f"**C1+C2 Additional:** {data['c1_c2_excess']} kWh × Rs.{tariff_c1_c2_rate:.4f} = Rs.{data['c1_c2_additional']:.2f}")
-            st.info(f"**C5 Additional:** {data['c5_excess']} kWh × Rs.{tariff_c5_rate:.4f} = Rs.{data['c5_additional']:.2f}")
-            st.info(f"**Subtotal:** Rs.{data['total_amount']:.2f}")
-            st.info(f"**E-Tax (5%):** Rs.{data['etax']:.2f}")
-            st.success(f"**Total with E-Tax:** Rs.{data['total_with_etax']:.2f}")
+    with col1:
+        st.write("**Positive Charges:**")
+        st.info(f"**Base Rate:** {data['total_excess_financial_rounded']} kWh × Rs.{data['base_rate']:.4f} = Rs.{data['base_amount']:.2f}")
+        st.info(f"**C1+C2 Additional:** {data['c1_c2_excess']} kWh × Rs.{tariff_c1_c2_rate:.4f} = Rs.{data['c1_c2_additional']:.2f}")
+        st.info(f"**C5 Additional:** {data['c5_excess']} kWh × Rs.{tariff_c5_rate:.4f} = Rs.{data['c5_additional']:.2f}")
+        st.info(f"**Subtotal:** Rs.{data['total_amount']:.2f}")
+        st.info(f"**E-Tax (5%):** Rs.{data['etax']:.2f}")
+        st.success(f"**Total with E-Tax:** Rs.{data['total_with_etax']:.2f}")
 
-        with col2:
-            st.write("**Negative Charges (Deductions):**")
-            st.warning(f"**E-Tax on IEX:** Rs.{data['etax_on_iex']:.2f}")
-            st.warning(f"**Cross Subsidy Surcharge:** {data['iex_excess_financial']} kWh × Rs.{tariff_cross_subsidy_rate:.4f} = Rs.{data['cross_subsidy_surcharge']:.2f}")
+    with col2:
+        st.write("**Negative Charges (Deductions):**")
+        st.warning(f"**E-Tax on IEX:** Rs.{data['etax_on_iex']:.2f}")
+        st.warning(f"**Cross Subsidy Surcharge:** {data['iex_excess_financial']} kWh × Rs.{tariff_cross_subsidy_rate:.4f} = Rs.{data['cross_subsidy_surcharge']:.2f}")
+        st.warning(
+            f"**Wheeling Charges:** ({wheeling_combined:.2f} - {wheeling_reduction:.2f}) kWh × Rs.{tariff_wheeling_rate:.4f} = Rs.{data['wheeling_charges']:.2f}"
+            f" (Loss add {wheeling_reference:.2f} kWh, T&D {data.get('t_and_d_loss', 0)}%)"
+        )
+        if additional_surcharge_value > 0:
             st.warning(
-                f"**Wheeling Charges:** ({wheeling_combined:.2f} - {wheeling_reduction:.2f}) kWh × Rs.{tariff_wheeling_rate:.4f} = Rs.{data['wheeling_charges']:.2f}"
-                f" (Loss add {wheeling_reference:.2f} kWh, T&D {data.get('t_and_d_loss', 0)}%)"
+                f"**Additional Surcharge (IEX):** {additional_surcharge_kwh} kWh × Rs.{additional_surcharge_rate:.2f}"
+                f" = Rs.{additional_surcharge_value:.2f} ({additional_surcharge_period_label})"
             )
-            if additional_surcharge_value > 0:
-                st.warning(
-                    f"**Additional Surcharge (IEX):** {additional_surcharge_kwh} kWh × Rs.{additional_surcharge_rate:.2f}"
-                    f" = Rs.{additional_surcharge_value:.2f} ({additional_surcharge_period_label})"
-                )
-            else:
-                st.info(
-                    f"**Additional Surcharge (IEX):** Not applied. {additional_surcharge_note or 'Select a month & year covered by a TNERC window.'}"
-                )
-
-            total_deductions = data['etax_on_iex'] + data['cross_subsidy_surcharge'] + data['wheeling_charges'] + additional_surcharge_value
-            st.warning(f"**Total Deductions:** Rs.{total_deductions:.2f}")
-            st.success(f"**Final Amount:** Rs.{data['final_amount']:.2f}")
-            st.success(f"**Final Amount (Rounded Up):** Rs.{data['final_amount_rounded']}")
-    else:
-        # Fallback to calculating on the fly if the pre-calculated values aren't available
-        # Calculate financial values using rounded values for consistency
-        total_excess_financial_rounded = round_kwh_financial(data['total_excess'])
-
-        fallback_tariff = data.get('tariff_rates') or resolve_tariff_rates(
-            data.get('tariff_selection', TARIFF_OPTIONS[0]),
-            data.get('month'),
-            data.get('year'),
-        )
-
-        base_rate = fallback_tariff['base_rate']
-        c1_c2_rate = fallback_tariff['c1_c2_rate']
-        c5_rate = fallback_tariff['c5_rate']
-        cross_subsidy_rate = fallback_tariff['cross_subsidy_rate']
-        wheeling_rate = fallback_tariff['wheeling_rate']
-        base_amount = total_excess_financial_rounded * base_rate
-
-        # Calculate TOD-wise excess for financial calculations
-        merged_data = data.get('merged_all', pd.DataFrame())
-        additional_surcharge = 0.0
-        additional_surcharge_breakdown = []
-        additional_surcharge_rate = 0.0
-        additional_surcharge_period_label = "Month & Year not selected"
-        additional_surcharge_note = "Select a valid month & year to apply Additional Surcharge"
-        if not merged_data.empty:
-            tod_excess = merged_data.groupby('TOD_Category')['Total_Excess'].sum().reset_index()
-
-            # Additional charges for specific TOD categories using rounded values
-            c1_c2_excess_raw = tod_excess.loc[tod_excess['TOD_Category'].isin(['C1', 'C2']), 'Total_Excess'].sum()
-            c1_c2_excess = round_kwh_financial(c1_c2_excess_raw)
-            c1_c2_additional = c1_c2_excess * c1_c2_rate  # rupees per kWh
-
-            c5_excess_raw = tod_excess.loc[tod_excess['TOD_Category'] == 'C5', 'Total_Excess'].sum()
-            c5_excess = round_kwh_financial(c5_excess_raw)
-            c5_additional = c5_excess * c5_rate  # rupees per kWh
-
-            # Calculate total amount
-            total_amount = base_amount + c1_c2_additional + c5_additional
-
-            # Calculate E-Tax (5% of total amount)
-            etax = total_amount * 0.05
-
-            # Calculate total amount with E-Tax
-            total_with_etax = total_amount + etax
-
-            # Calculate IEX excess for specific charges using rounded values
-            iex_excess_financial_raw = merged_data['IEX_Excess'].sum() if 'IEX_Excess' in merged_data.columns else data['total_excess']
-            iex_excess_financial = round_kwh_financial(iex_excess_financial_raw)
-
-            # Calculate negative factors using rounded values
-            etax_on_iex = total_excess_financial_rounded * 0.1
-            cross_subsidy_surcharge = iex_excess_financial * cross_subsidy_rate  # Only for IEX excess
-            additional_surcharge, additional_surcharge_breakdown, additional_surcharge_rate, additional_surcharge_period_label, additional_surcharge_note = calculate_monthly_additional_surcharge(
-                data.get('month'),
-                data.get('year'),
-                iex_excess_financial_raw,
-                iex_excess_financial,
+        else:
+            st.info(
+                f"**Additional Surcharge (IEX):** Not applied. {additional_surcharge_note or 'Select a month & year covered by a TNERC window.'}"
             )
 
-            # Wheeling charges derived from total excess and configured T&D loss
-            wheeling_components = compute_wheeling_components(
-                total_excess_financial_rounded,
-                data.get('t_and_d_loss', 0.0),
-            )
-            wheeling_reference_kwh = wheeling_components['reference_kwh']
-            wheeling_combined_kwh = wheeling_components['combined_kwh']
-            wheeling_reduction_kwh = wheeling_components['reduction_kwh']
-            wheeling_adjusted_kwh = wheeling_components['adjusted_kwh']
-            wheeling_charges = wheeling_adjusted_kwh * wheeling_rate
-
-            # Calculate final amount to be collected (include Additional Surcharge as deduction)
-            final_amount = total_with_etax - (etax_on_iex + cross_subsidy_surcharge + wheeling_charges + additional_surcharge)
-
-            # Round up final amount to next highest value
-            final_amount_rounded = math.ceil(final_amount)
-
-            # Display financial calculations in organized columns
-            col1, col2 = st.columns(2)
-
-            with col1:
-                st.write("**Positive Charges:**")
-                st.info(f"**Base Rate:** {total_excess_financial_rounded} kWh × Rs.{base_rate:.4f} = Rs.{base_amount:.2f}")
-                st.info(f"**C1+C2 Additional:** {c1_c2_excess} kWh × Rs.{c1_c2_rate:.4f} = Rs.{c1_c2_additional:.2f}")
-                st.info(f"**C5 Additional:** {c5_excess} kWh × Rs.{c5_rate:.4f} = Rs.{c5_additional:.2f}")
-                st.info(f"**Subtotal:** Rs.{total_amount:.2f}")
-                st.info(f"**E-Tax (5%):** Rs.{etax:.2f}")
-                st.success(f"**Total with E-Tax:** Rs.{total_with_etax:.2f}")
-
-            with col2:
-                st.write("**Negative Charges (Deductions):**")
-                st.warning(f"**E-Tax on IEX:** Rs.{etax_on_iex:.2f}")
-                st.warning(f"**Cross Subsidy Surcharge:** {iex_excess_financial} kWh × Rs.{cross_subsidy_rate:.4f} = Rs.{cross_subsidy_surcharge:.2f}")
-                st.warning(
-                    f"**Wheeling Charges:** ({wheeling_combined_kwh:.2f} - {wheeling_reduction_kwh:.2f}) kWh × Rs.{wheeling_rate:.4f} = Rs.{wheeling_charges:.2f}"
-                    f" (Loss add {wheeling_reference_kwh:.2f} kWh, T&D {data.get('t_and_d_loss', 0)}%)"
-                )
-                if additional_surcharge > 0:
-                    st.warning(
-                        f"**Additional Surcharge (IEX):** {iex_excess_financial} kWh × Rs.{additional_surcharge_rate:.2f}"
-                        f" = Rs.{additional_surcharge:.2f} ({additional_surcharge_period_label})"
-                    )
-                else:
-                    st.info(
-                        f"**Additional Surcharge (IEX):** Not applied. {additional_surcharge_note or 'Select a month & year covered by a TNERC window.'}"
-                    )
-                total_deductions = etax_on_iex + cross_subsidy_surcharge + wheeling_charges + additional_surcharge
-                st.warning(f"**Total Deductions:** Rs.{total_deductions:.2f}")
-                st.success(f"**Final Amount:** Rs.{final_amount:.2f}")
-                st.success(f"**Final Amount (Rounded Up):** Rs.{final_amount_rounded}")
-        else:
-            st.warning("No merged data available for financial calculations.")
+        total_deductions = data['etax_on_iex'] + data['cross_subsidy_surcharge'] + data['wheeling_charges'] + additional_surcharge_value
+        st.warning(f"**Total Deductions:** Rs.{total_deductions:.2f}")
+        st.success(f"**Final Amount:** Rs.{data['final_amount']:.2f}")
+        st.success(f"**Final Amount (Rounded Up):** Rs.{data['final_amount_rounded']}")
     
     # TOD-wise breakdown
     st.subheader("⏰ TOD-wise Excess Energy Breakdown")
     merged_data = data.get('merged_all', pd.DataFrame())
     if not merged_data.empty:
-        tod_excess = merged_data.groupby('TOD_Category')['Total_Excess'].sum().reset_index()
-        tod_display = []
-        for _, row in tod_excess.iterrows():
-            category = row['TOD_Category']
-            excess_rounded = round_kwh_financial(row['Total_Excess'])
-            tod_display.append({"TOD Category": category, "Excess Energy (kWh)": excess_rounded})
-        
-        if tod_display:
-            tod_df = pd.DataFrame(tod_display)
+        tod_totals = _tod_excess_totals(data, merged_data)
+        
+        if tod_totals:
+            tod_df = pd.DataFrame({
+                "TOD Category": list(tod_totals),
+                "Excess Energy (kWh)": _round_kwh(list(tod_totals.values())),
+            })
             st.dataframe(tod_df, use_container_width=True)
     else:
         st.warning("No TOD data available for breakdown.")
@@ -3616,26 +3384,21 @@ if st.session_state.processed_data:
     st.info("Processing your data and generating PDF reports based on your selections...")
     
     with st.spinner("Generating PDF reports..."):
-        # Generate PDFs based on checkbox selections
-        pdfs_generated = []
-        
-        if show_excess_only:
-            if not data['merged_excess'].empty:
-                pdf_bytes = generate_detailed_pdf(data, data['merged_excess'], "excess")
-                if pdf_bytes:
-                    filename = generate_custom_filename("excess_only", data['consumer_number'], data['consumer_name'], data.get('month'), data.get('year'))
-                    pdfs_generated.append((filename, pdf_bytes))
-        
+        # Collect the selected report variants as (report type, filename hint), then build them in one pass;
+        # they all read the TOD and financial figures computed once in process_energy_data
+        selected_reports = []
+        if show_excess_only and not data['merged_excess'].empty:
+            selected_reports.append(("excess", "excess_only"))
         if show_all_slots:
-            pdf_bytes = generate_detailed_pdf(data, data['merged_all'], "all_slots")
-            if pdf_bytes:
-                filename = generate_custom_filename("all_slots", data['consumer_number'], data['consumer_name'], data.get('month'), data.get('year'))
-                pdfs_generated.append((filename, pdf_bytes))
-        
+            selected_reports.append(("all_slots", "all_slots"))
         if show_daywise:
-            pdf_bytes = generate_daywise_pdf(data, data['merged_all'])
+            selected_reports.append(("daywise", "daywise"))
+
+        pdfs_generated = []
+        for report_type, name_hint in selected_reports:
+            pdf_bytes = _generate_report_pdf(st.session_state.report_key, report_type, data)
             if pdf_bytes:
-                filename = generate_custom_filename("daywise", data['consumer_number'], data['consumer_name'], data.get('month'), data.get('year'))
+                filename = generate_custom_filename(name_hint, data['consumer_number'], data['consumer_name'], data.get('month'), data.get('year'))
                 pdfs_generated.append((filename, pdf_bytes))
     
     # Display download option (complete package only)
@@ -3684,7 +3447,8 @@ if st.session_state.processed_data:
             "Complete Package Manifest",
             "-------------------------",
         ]
-        with zipfile.ZipFile(bundle_buffer, 'w') as bundle_zip:
+        # Source workbooks and the manifest shrink well; PDF streams are already deflated, so level 1 is enough
+        with zipfile.ZipFile(bundle_buffer, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as bundle_zip:
             if pdfs_generated:
                 manifest_lines.append("Reports Included:")
                 for fname, pdf_bytes in pdfs_generated:
@@ -3699,7 +3463,6 @@ if st.session_state.processed_data:
                         f" - {entry['final_name']} | sha256={entry['hash_full']} | original={entry['original_name']}"
                     )
             bundle_zip.writestr("MANIFEST.txt", "\n".join(manifest_lines))
-        bundle_buffer.seek(0)
         bundle_zip_name = f"{slug}_reports_and_sources.zip"
         st.download_button(
             label="📦 Download Complete Package (ZIP)",